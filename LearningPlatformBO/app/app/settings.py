@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework_simplejwt",
     "rest_framework_simplejwt.token_blacklist",
@@ -139,19 +140,44 @@ STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "static"
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# How permission-checked file downloads are sent (see `core.downloads`): by the worker (`DjangoResponder`), or handed
+# over to the front proxy (`NginxResponder`, through the internal DOWNLOAD_ACCEL_LOCATION mapped to MEDIA_ROOT, or
+# `ApacheResponder`)
+DOWNLOAD_RESPONDER = env.as_string("DOWNLOAD_RESPONDER", "core.downloads.DjangoResponder")
+DOWNLOAD_ACCEL_LOCATION = env.as_string("DOWNLOAD_ACCEL_LOCATION", "/protected-media/")
 
 
 # Rest framework settings
 
 REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "drf_standardized_errors.handler.exception_handler",
-    "DEFAULT_AUTHENTICATION_CLASSES": ("rest_framework_simplejwt.authentication.JWTAuthentication",),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("users.token_authentication.CachedJWTAuthentication",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "TEST_REQUEST_DEFAULT_FORMAT": "json",
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # Token buckets of the throttled endpoints, per scope (see `core.throttling`): "<N>/<second|minute|hour|day>" lets
+    # bursts of N requests through, refilled at N per period. THROTTLE_RATES overrides them, `null` disables a scope.
+    "DEFAULT_THROTTLE_RATES": {
+        "login": "20/minute",  # Per client IP address
+        "login_identifier": "5/minute",  # Per username or email
+        "registration": "10/hour",  # Per client IP address
+        "enrollment_request": "10/minute",  # Per user
+        **env.as_json("THROTTLE_RATES", {}),
+    },
+    # Proxies in front of the app, for the client IP address to be read from X-Forwarded-For (0 uses REMOTE_ADDR, which
+    # behind a proxy is the proxy's address: set it there)
+    "NUM_PROXIES": env.as_int("NUM_PROXIES", 0),
 }
 
+# Caches, as the JSON of Django's CACHES setting (by default, one in-process cache)
+CACHES = env.as_json("CACHES", {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+# Cache alias to keep the throttling buckets in, shared by every node using it (empty keeps them in-process)
+THROTTLE_CACHE = env.as_string("THROTTLE_CACHE", "")
+# Cache alias to keep the users' permissions versions in, which validate the course claims of their tokens (see
+# `course.membership.CourseMembership`). It must be shared by every process; empty reads them from the database
+PERMISSIONS_VERSION_CACHE = env.as_string("PERMISSIONS_VERSION_CACHE", "")
+
 
 # SimpleJWT settings
 
@@ -160,7 +186,8 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=90),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
-    "UPDATE_LAST_LOGIN": True,  # This hinders performance; can be turned off if necessary.
+    # Written in batches by the login view instead (see `users.last_login`)
+    "UPDATE_LAST_LOGIN": False,
 }
 
 
@@ -206,8 +233,41 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 AUTHENTICATION_BACKENDS = ["users.authentication.AuthenticationBackend"]
+# Passwords are hashed with AUTH_PASSWORD_HASHER; hashes made by the others are still accepted, and upgraded on login
+AUTH_PASSWORD_HASHER = env.as_string("AUTH_PASSWORD_HASHER", "users.hashers.PBKDF2PasswordHasher")
+AUTH_PASSWORD_ITERATIONS = env.as_int("AUTH_PASSWORD_ITERATIONS", 0)  # PBKDF2 iterations, 0 for Django's default
+PASSWORD_HASHERS = [AUTH_PASSWORD_HASHER] + [
+    hasher
+    for hasher in (
+        "users.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "django.contrib.auth.hashers.Argon2PasswordHasher",
+        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+        "django.contrib.auth.hashers.ScryptPasswordHasher",
+    )
+    if hasher != AUTH_PASSWORD_HASHER
+]
+# In-process cache of the users authenticated by their JWT (see `users.token_authentication.CachedJWTAuthentication`)
+AUTH_USER_CACHE_SIZE = env.as_int("AUTH_USER_CACHE_SIZE", 10000)
+AUTH_USER_CACHE_TTL = env.as_int("AUTH_USER_CACHE_TTL", 60)
+
+# Seconds between the batched writes of the users' last login (0 writes each login right away, see `users.last_login`)
+AUTH_LAST_LOGIN_FLUSH_INTERVAL = env.as_int("AUTH_LAST_LOGIN_FLUSH_INTERVAL", 5)
+
+# Seconds between the syncs of each process' filter of blacklisted tokens with the database, which saves the blacklist
+# lookup of most refreshes, but lets a token rotated by another process be replayed for that long (0 always looks the
+# blacklist up, see `users.token_blacklist`)
+AUTH_TOKEN_BLACKLIST_SYNC_INTERVAL = env.as_int("AUTH_TOKEN_BLACKLIST_SYNC_INTERVAL", 0)
 AUTH_USER_REGISTRATION_ENABLED = env.as_bool("AUTH_USER_REGISTRATION_ENABLED", True)
 
+# UUID version of the primary keys of new rows (see `core.extensions.models.BaseAbstractModel`): 4 (random) or 7
+# (time-ordered, inserted at the end of the primary key index, but revealing the creation time). Existing rows keep
+# theirs. Measure with `python manage.py benchmark_uuid_keys`
+MODEL_ID_UUID_VERSION = env.as_int("MODEL_ID_UUID_VERSION", 4)
+
+# Days soft deleted rows are kept before the `purge_deleted` command hard deletes them
+SOFT_DELETE_RETENTION_DAYS = env.as_int("SOFT_DELETE_RETENTION_DAYS", 30)
+
 
 # Miscellaneous Settings
 LANGUAGE_CODE = "en"
@@ -0,0 +1,189 @@
+"""
+File downloads, served after the view checked the permissions.
+
+`download_response` builds the response with the responder set in `DOWNLOAD_RESPONDER`:
+- `DjangoResponder` (default) sends the file from the worker, with `Range` requests (resumable downloads) and
+  conditional GETs. Full files and single ranges are sent with `sendfile` when the WSGI server supports it (e.g.
+  gunicorn), without copying them through Python.
+- `NginxResponder` replies with an `X-Accel-Redirect` to the internal location `DOWNLOAD_ACCEL_LOCATION`, which must
+  map to `MEDIA_ROOT`, e.g. `location /protected-media/ { internal; alias /app/media/; }`.
+- `ApacheResponder` replies with an `X-Sendfile` header with the file's path (requires `mod_xsendfile`).
+
+With the last two, the worker is freed right away, and the proxy streams the file and handles `Range` itself.
+"""
+import os
+import re
+from calendar import timegm
+from typing import Any, Optional, cast
+from urllib.parse import quote
+from django.conf import settings
+from django.core.files.storage import Storage
+from django.db.models.fields.files import FieldFile
+from django.http import FileResponse, HttpRequest, HttpResponse, HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header  # type: ignore[attr-defined]
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.utils.module_loading import import_string
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested byte range is out of the file, answered with a `416`."""
+
+
+class DownloadResponder:
+    """Base class of the responders: build the response that sends a file, see `download_response`."""
+
+    def respond(self, request: HttpRequest, file: FieldFile, filename: str, content_type: str) -> HttpResponseBase:
+        raise NotImplementedError("`respond()` must be implemented.")
+
+    def offloaded_response(self, filename: str, content_type: str) -> HttpResponse:
+        """Empty response whose body the proxy fills in."""
+        response = HttpResponse(content_type=content_type)
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+        return response
+
+
+class NginxResponder(DownloadResponder):
+    """Hand the file over to nginx, with an `X-Accel-Redirect` to `DOWNLOAD_ACCEL_LOCATION`."""
+
+    def respond(self, request: HttpRequest, file: FieldFile, filename: str, content_type: str) -> HttpResponseBase:
+        response = self.offloaded_response(filename, content_type)
+        response["X-Accel-Redirect"] = settings.DOWNLOAD_ACCEL_LOCATION.rstrip("/") + "/" + quote(cast(str, file.name))
+        return response
+
+
+class ApacheResponder(DownloadResponder):
+    """Hand the file over to Apache, with an `X-Sendfile` header (the storage must be on the local disk)."""
+
+    def respond(self, request: HttpRequest, file: FieldFile, filename: str, content_type: str) -> HttpResponseBase:
+        response = self.offloaded_response(filename, content_type)
+        response["X-Sendfile"] = file.path
+        return response
+
+
+class FileRange:
+    """
+    File-like view of `length` bytes of a file from `start`. Exposes the file's descriptor, so WSGI servers can send it
+    with `sendfile`, which starts from the current position and is bounded by the `Content-Length`.
+    """
+
+    def __init__(self, file: Any, start: int, length: int):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data: bytes = self.file.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return int(self.file.fileno())
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class DjangoResponder(DownloadResponder):
+    """
+    Send the file from the worker, answering conditional GETs, and a single `Range` with a `206` (or `416` if it's out
+    of the file). Multiple ranges and stale `If-Range` validators are answered with the whole file, as allowed by
+    RFC 9110.
+    """
+
+    RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+    def respond(self, request: HttpRequest, file: FieldFile, filename: str, content_type: str) -> HttpResponseBase:
+        size = file.size
+        etag, last_modified = self.get_validators(file.storage, cast(str, file.name), size)
+        response: Optional[HttpResponseBase] = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            try:
+                byte_range = self.get_range(request, size, etag, last_modified)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+            else:
+                response = self.file_response(file, filename, content_type, size, byte_range)
+        if etag:
+            response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    def file_response(
+        self, file: FieldFile, filename: str, content_type: str, size: int, byte_range: Optional[tuple[int, int]]
+    ) -> FileResponse:
+        handle = file.storage.open(cast(str, file.name), "rb")
+        start, end = byte_range or (0, size - 1)
+        response = FileResponse(
+            FileRange(handle, start, end - start + 1),
+            as_attachment=True,
+            filename=filename,
+            content_type=content_type,
+            status=206 if byte_range else 200,
+        )
+        response["Content-Length"] = str(end - start + 1)
+        if byte_range:
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return response
+
+    def get_validators(self, storage: Storage, name: str, size: int) -> tuple[Optional[str], Optional[int]]:
+        """The `(etag, last_modified)` of the file, from its size and modification time, when the storage has it."""
+        try:
+            modified_at = storage.get_modified_time(name)
+        except (NotImplementedError, OSError):
+            return None, None
+        last_modified = timegm(modified_at.utctimetuple())
+        return quote_etag(f"{size:x}-{int(modified_at.timestamp() * 1_000_000):x}"), last_modified
+
+    def get_range(
+        self, request: HttpRequest, size: int, etag: Optional[str], last_modified: Optional[int]
+    ) -> Optional[tuple[int, int]]:
+        """
+        The `(start, end)` (inclusive) of the requested byte range, or `None` for the whole file. Raises
+        `RangeNotSatisfiable` if it's out of the file.
+        """
+        match = self.RANGE_PATTERN.match(request.headers.get("Range", "").replace(" ", ""))
+        if match is None or not (match[1] or match[2]) or not self.if_range_matches(request, etag, last_modified):
+            return None
+        if not match[1]:
+            # The last N bytes
+            length = int(match[2])
+            if length == 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - length), size - 1
+        start = int(match[1])
+        if match[2] and int(match[2]) < start:
+            return None  # Invalid, ignored
+        if start >= size:
+            raise RangeNotSatisfiable()
+        return start, min(int(match[2]), size - 1) if match[2] else size - 1
+
+    def if_range_matches(self, request: HttpRequest, etag: Optional[str], last_modified: Optional[int]) -> bool:
+        """Whether the `If-Range` validator, if any, still matches the file."""
+        if_range = request.headers.get("If-Range")
+        if if_range is None:
+            return True
+        if if_range.startswith("W/"):
+            # `If-Range` uses the strong comparison, which weak validators never pass
+            return False
+        if if_range.startswith('"'):
+            return etag is not None and if_range == etag
+        return last_modified is not None and parse_http_date_safe(if_range) == last_modified
+
+
+def download_response(
+    request: HttpRequest, file: FieldFile, filename: Optional[str] = None, content_type: Optional[str] = None
+) -> HttpResponseBase:
+    """
+    Response that sends the `file` as an attachment named `filename` (by default, its own name), with the responder
+    set in `DOWNLOAD_RESPONDER`. Permissions must have been checked already.
+    """
+    responder: DownloadResponder = import_string(settings.DOWNLOAD_RESPONDER)()
+    filename = filename or os.path.basename(cast(str, file.name))
+    return responder.respond(request, file, filename, content_type or "application/octet-stream")
@@ -1 +1 @@
-from .base_abstract_model import BaseAbstractModel
+from .base_abstract_model import BaseAbstractModel, SoftDeleteManager
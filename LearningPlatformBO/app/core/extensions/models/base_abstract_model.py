@@ -1,5 +1,32 @@
-from uuid import uuid4
+from uuid import UUID, uuid4
+from django.conf import settings
 from django.db import models
+from core.utilities import uuid7
+
+
+def generate_id() -> UUID:
+    """
+    Primary key of new rows: a random `uuid4`, or a time-ordered `uuid7` with `MODEL_ID_UUID_VERSION = 7`. Both kinds
+    can be mixed in a table, so switching only affects new rows.
+    """
+    return uuid7() if settings.MODEL_ID_UUID_VERSION == 7 else uuid4()
+
+
+class SoftDeleteManager(models.Manager):
+    """
+    Manager that leaves out the soft deleted rows, unless created with `include_deleted=True`. Models without an
+    `is_deleted` field have all their rows returned, so managers built on it can be used by any model.
+    """
+
+    def __init__(self, include_deleted: bool = False):
+        super().__init__()
+        self.include_deleted = include_deleted
+
+    def get_queryset(self) -> models.QuerySet:
+        queryset = super().get_queryset()
+        if self.include_deleted or not any(field.name == "is_deleted" for field in self.model._meta.fields):
+            return queryset
+        return queryset.filter(is_deleted=False)
 
 
 class BaseAbstractModel(models.Model):
@@ -9,19 +36,28 @@ class BaseAbstractModel(models.Model):
     - `updated_at`
     - `is_deleted`
 
-    Also uses a UUID as primary key.
+    Also uses a UUID as primary key (see `generate_id`).
+
+    `objects` leaves out the soft deleted rows, `all_objects` includes them. The latter is Django's default manager,
+    so uniqueness validation, the admin and dumps still see every row: concrete models that define their own `Meta`
+    should inherit this one. Soft deleted rows are hard deleted after a retention period by the `purge_deleted`
+    command.
     """
 
-    id = models.UUIDField(primary_key=True, unique=True, default=uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, unique=True, default=generate_id, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, editable=False, help_text="Object creation datetime.")
     updated_at = models.DateTimeField(auto_now=True, editable=False, help_text="Last updated datetime.")
     is_deleted = models.BooleanField(
         default=False, help_text="Designates this object as soft deleted.", verbose_name="deleted status"
     )
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteManager(include_deleted=True)
+
     class Meta:
         abstract = True
         ordering = ["-created_at"]
+        default_manager_name = "all_objects"
 
     def soft_delete(self) -> None:
         """Soft delete this instance by marking `is_deleted` as `True`."""
@@ -0,0 +1 @@
+from .conditional_retrieve_mixin import ConditionalRetrieveMixin
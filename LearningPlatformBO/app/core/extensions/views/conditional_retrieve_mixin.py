@@ -0,0 +1,51 @@
+from calendar import timegm
+from datetime import datetime
+from typing import Any, Optional, Sequence
+from django.db.models import Model, prefetch_related_objects
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.request import Request
+from rest_framework.response import Response
+from core.utilities.types import GenericViewMixin
+
+
+class ConditionalRetrieveMixin(GenericViewMixin):
+    """
+    Mixin for detail views that answer conditional GETs (`If-None-Match` / `If-Modified-Since`) with a 304.
+
+    Views implement `get_validators`, which returns the `(etag, last_modified)` pair of an instance. It runs before
+    serialization, so it should be cheap: ideally everything it needs is annotated on the instance by `get_queryset`.
+    Relations that are only needed to serialize the instance go in `retrieve_prefetch`, and are only loaded when the
+    client's copy is stale.
+    """
+
+    retrieve_prefetch: Sequence[str] = ()
+
+    def get_validators(self, instance: Model) -> tuple[str, Optional[datetime]]:
+        """
+        Return the `(etag, last_modified)` validators of the instance. The etag should not be quoted. `last_modified`
+        should be `None` when the representation includes children whose deletion leaves every timestamp unchanged.
+        """
+        raise NotImplementedError("`get_validators()` must be implemented.")
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        return self.conditional_retrieve(request, self.get_object())
+
+    def conditional_retrieve(self, request: Request, instance: Model) -> HttpResponseBase:
+        """Serialize the instance, unless the client's copy is still fresh, in which case reply with a 304."""
+        etag, last_modified = self.get_validators(instance)
+        etag = quote_etag(etag)
+        timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+        response: Optional[HttpResponseBase] = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            if self.retrieve_prefetch:
+                prefetch_related_objects([instance], *self.retrieve_prefetch)
+            response = Response(self.get_serializer(instance).data)
+        response.headers["ETag"] = etag
+        if timestamp is not None:
+            response.headers["Last-Modified"] = http_date(timestamp)
+        # Responses may depend on who's asking, so they can only be cached privately and must be revalidated
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Authorization",))
+        return response
@@ -0,0 +1,62 @@
+import time
+import uuid
+from argparse import ArgumentParser
+from typing import Any, Callable
+from django.db import connection
+from core.management.commands._base_command import BaseCommand
+from core.utilities import uuid7
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare random (`uuid4`) and time-ordered (`uuid7`) UUID primary keys, to choose the
+    `MODEL_ID_UUID_VERSION`.
+
+    For each version, it inserts `--rows` rows with ids generated in Python into a scratch table shaped like a small
+    `BaseAbstractModel` table, `--batch-size` rows per statement, and reports the insert throughput and the final size
+    of the table and its primary key index. The scratch tables are dropped at the end. A run at the scale of the largest
+    tables (e.g. `--rows 10000000`) takes a while, and the database's disk should have room for both tables.
+    """
+
+    help = "Compare the insert throughput and index size of uuid4 and uuid7 primary keys."
+
+    GENERATORS: dict[int, Callable[[], uuid.UUID]] = {4: uuid.uuid4, 7: uuid7}
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Rows inserted per UUID version.")
+        parser.add_argument("--batch-size", type=int, default=10_000, help="Rows inserted per statement.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rows, batch_size = options["rows"], options["batch_size"]
+        self.info(f"Inserting {rows} rows per UUID version, {batch_size} per statement...")
+        for version, generate in self.GENERATORS.items():
+            table = connection.ops.quote_name(f"benchmark_uuid_v{version}")
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                cursor.execute(
+                    f"""
+                    CREATE TABLE {table} (
+                        id uuid PRIMARY KEY,
+                        created_at timestamp with time zone NOT NULL DEFAULT now(),
+                        is_deleted boolean NOT NULL DEFAULT false
+                    )
+                    """
+                )
+                try:
+                    elapsed = 0.0
+                    for start in range(0, rows, batch_size):
+                        ids = [str(generate()) for _ in range(min(batch_size, rows - start))]
+                        started_at = time.perf_counter()
+                        cursor.execute(f"INSERT INTO {table} (id) SELECT unnest(%s::uuid[])", [ids])
+                        elapsed += time.perf_counter() - started_at
+                    cursor.execute(
+                        "SELECT pg_relation_size(%s::regclass), pg_relation_size(%s::regclass)",
+                        [table, f"benchmark_uuid_v{version}_pkey"],
+                    )
+                    table_size, index_size = cursor.fetchone()
+                finally:
+                    cursor.execute(f"DROP TABLE {table}")
+            self.success(
+                f"uuid{version}: {rows / elapsed:,.0f} rows/s, table {table_size / 2**20:,.1f} MiB, "
+                f"primary key index {index_size / 2**20:,.1f} MiB"
+            )
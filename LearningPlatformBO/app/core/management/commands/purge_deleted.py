@@ -0,0 +1,58 @@
+import time
+from argparse import ArgumentParser
+from datetime import timedelta
+from typing import Any
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Model
+from django.utils import timezone
+from core.extensions.models import BaseAbstractModel
+from core.management.commands._base_command import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    Django command to hard delete the rows soft deleted (see `BaseAbstractModel`) more than `--days` days ago
+    (`SOFT_DELETE_RETENTION_DAYS` by default), `--batch-size` rows per transaction.
+
+    The deletion date is taken from `updated_at`, as `soft_delete()` saves the row. Rows are deleted through the ORM,
+    so related rows are cascaded and the delete signals sent, in short transactions (pausing `--sleep` seconds between
+    them) that skip the rows locked by live traffic, so it can run regularly next to it, e.g. daily.
+    """
+
+    help = "Hard delete the rows soft deleted longer ago than the retention period, in batches."
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            "--days", type=int, default=settings.SOFT_DELETE_RETENTION_DAYS, help="Retention period, in days."
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per transaction.")
+        parser.add_argument("--sleep", type=float, default=0, help="Seconds to pause between batches.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        deleted_before = timezone.now() - timedelta(days=options["days"])
+        self.info(f"Purging the rows soft deleted before {deleted_before.isoformat()}...")
+        for model in apps.get_models():
+            if not issubclass(model, BaseAbstractModel):
+                continue
+            deleted = 0
+            while batch := self.delete_batch(model, deleted_before, options["batch_size"]):
+                deleted += batch
+                if options["sleep"]:
+                    time.sleep(options["sleep"])
+            self.success(f"{model._meta.label}: purged {deleted} rows.")
+
+    def delete_batch(self, model: type[Model], deleted_before: Any, batch_size: int) -> int:
+        """Hard delete up to `batch_size` rows of the model soft deleted before `deleted_before`, returning how many."""
+        with transaction.atomic():
+            ids = list(
+                model._base_manager.filter(is_deleted=True, updated_at__lt=deleted_before)
+                .order_by()
+                .select_for_update(skip_locked=True)
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                return 0
+            model._base_manager.filter(pk__in=ids).delete()
+            return len(ids)
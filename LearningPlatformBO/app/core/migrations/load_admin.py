@@ -4,7 +4,9 @@ the project settings.
 
 Taken from: https://stackoverflow.com/questions/6244382/
 """
-from django.contrib.auth import get_user_model
+from typing import Any
+from django.contrib.auth.base_user import BaseUserManager
+from django.contrib.auth.hashers import make_password
 from django.db import migrations
 from django.db.backends.base.schema import BaseDatabaseSchemaEditor
 from core.utilities import env
@@ -13,15 +15,25 @@ from core.utilities import env
 class Migration(migrations.Migration):
     initial = True
 
-    # Make sure we always have the most recent user model.
-    dependencies = [("users", "__latest__")]
+    # Pinned to the initial user schema, using the historical model: depending on `__latest__` made every new users
+    # migration an inconsistent history for databases where this migration was already applied.
+    dependencies = [("users", "0001_initial")]
 
-    def generate_superuser(self, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    def generate_superuser(apps: Any, schema_editor: BaseDatabaseSchemaEditor) -> None:
         credentials = env.as_json("ADMIN_CREDENTIALS")
         if not isinstance(credentials, dict):  # pragma: no cover
             raise ValueError("ADMIN_CREDENTIALS must be a dictionary.")
-        get_user_model().objects.create_superuser(**credentials)
+        User = apps.get_model("users", "User")
+        # Replicate `UserManager.create_superuser`, which the historical model doesn't have
+        field_names = {field.name for field in User._meta.get_fields()}
+        fields = {key: value for key, value in credentials.items() if key in field_names}
+        if "username" in fields:
+            fields["username"] = fields["username"].strip()
+        if "email" in fields:
+            fields["email"] = BaseUserManager.normalize_email(fields["email"].strip())
+        fields.update({"is_staff": True, "is_superuser": True, "password": make_password(credentials.get("password"))})
+        User.objects.create(**fields)
 
     operations = [
-        migrations.RunPython(generate_superuser),  # type: ignore
+        migrations.RunPython(generate_superuser),
     ]
@@ -0,0 +1,173 @@
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any, Optional, Sequence
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (a.k.a. seek) pagination over a fixed, unique ordering.
+
+    Instead of an `OFFSET`, each page continues right after the last row of the previous one, so a deep page costs
+    exactly the same as the first one. The cursor is an opaque token that encodes the ordering values of that last
+    row, and no total count is computed.
+
+    Subclass it to change the `ordering` (ascending, local fields only, and the last one must be unique) or the page
+    sizes. Works with both model and `.values()` querysets.
+
+    A total can still be requested with `?count=estimate` (the query planner's row estimate, on PostgreSQL) or
+    `?count=cached` (an exact `COUNT(*)` cached for `count_cache_timeout` seconds); without it, none is computed.
+    """
+
+    ordering: Sequence[str] = ("id",)
+    page_size = 10
+    page_size_query_param: Optional[str] = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    count_cache_timeout = 60
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: Optional[APIView] = None) -> list[Any]:
+        self.request = request
+        self.model = queryset.model
+        self.limit = self.get_page_size(request)
+        self.count = self.get_count(queryset.order_by(), request.query_params.get(self.count_query_param))
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(position))
+        # Fetch one extra row to know if there's a next page without counting
+        rows = list(queryset[: self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        self.page = rows[: self.limit]
+        return self.page
+
+    def get_paginated_response(self, data: Any) -> Response:
+        response = {"next": self.get_next_link(), "results": data}
+        if self.count is not None:
+            response["count"] = self.count
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view: APIView) -> list[dict[str, Any]]:
+        parameters = [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Include a total: `estimate` (planner estimate) or `cached` (exact, cached).",
+                "schema": {"type": "string", "enum": ["estimate", "cached"]},
+            },
+        ]
+        if self.page_size_query_param:
+            parameters.append(
+                {
+                    "name": self.page_size_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Number of results to return per page.",
+                    "schema": {"type": "integer"},
+                }
+            )
+        return parameters
+
+    def get_page_size(self, request: Request) -> int:
+        if self.page_size_query_param:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+            except (KeyError, ValueError):
+                return self.page_size
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        return self.page_size
+
+    def get_count(self, queryset: QuerySet, mode: Optional[str]) -> Optional[int]:
+        """Return the total for the requested `mode`, or `None` if no (valid) total was requested."""
+        if mode == "estimate":
+            estimate = self.estimate_count(queryset)
+            if estimate is not None:
+                return estimate
+            mode = "cached"
+        if mode == "cached":
+            sql, params = queryset.query.sql_with_params()
+            key = "keyset-count:" + hashlib.md5(f"{sql}{params!r}".encode()).hexdigest()
+            return cache.get_or_set(key, queryset.count, self.count_cache_timeout)
+        return None
+
+    def estimate_count(self, queryset: QuerySet) -> Optional[int]:
+        """Return the planner's row estimate for the queryset; only available on PostgreSQL."""
+        if connections[queryset.db].vendor != "postgresql":
+            return None
+        plan = json.loads(queryset.explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def seek_filter(self, position: list[Any]) -> Q:
+        """
+        Build the filter for the rows that come after `position` in the ordering. For `(a, b)` this is
+        `a > x OR (a = x AND b > y)`, which the database resolves with a range scan over a matching `(a, b)` index.
+        """
+        seek = Q()
+        for i in reversed(range(len(self.ordering))):
+            equal = {field: value for field, value in zip(self.ordering[:i], position[:i])}
+            seek |= Q(**equal, **{f"{self.ordering[i]}__gt": position[i]})
+        return seek
+
+    def encode_cursor(self, row: Model | dict[str, Any]) -> str:
+        values = [str(row[field] if isinstance(row, dict) else getattr(row, field)) for field in self.ordering]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, request: Request) -> Optional[list[Any]]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [self.model._meta.get_field(field).to_python(value) for field, value in zip(self.ordering, values)]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class CreatedAtKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination in creation order, for the large, append-mostly tables. Paginated models should have an index on
+    `(created_at, id)`, prefixed by whatever columns the view filters on, so every page is a single index range scan.
+    """
+
+    ordering = ("created_at", "id")
@@ -1,6 +1,10 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from io import StringIO
 from unittest.mock import MagicMock, patch
+from django.core.management import call_command
 from django.db.models import DO_NOTHING, OneToOneField
+from django.test import override_settings
+from django.utils import timezone
 from django.utils.timezone import make_aware
 from core.extensions.models import BaseAbstractModel
 from core.utilities.test import AbstractModelTestCase
@@ -65,6 +69,35 @@ class TestBaseAbstractModel(AbstractModelTestCase):
         self.assertEqual(dt_updated, obj.updated_at)
         self.assertTrue(obj.is_deleted)
 
+    def test_time_ordered_ids(self) -> None:
+        """Test the primary keys are random UUIDs by default, and time-ordered ones with `MODEL_ID_UUID_VERSION=7`."""
+        self.assertEqual(4, self.sample_object().id.version)
+        with override_settings(MODEL_ID_UUID_VERSION=7):
+            objects = [self.sample_object() for _ in range(3)]
+        self.assertEqual([7, 7, 7], [obj.id.version for obj in objects])
+        self.assertEqual(
+            objects, list(self.ConcreteModel.objects.order_by("id").filter(id__in=[o.id for o in objects]))
+        )
+
+    def test_managers(self) -> None:
+        """Test `objects` leaves out the soft deleted rows, and the default manager doesn't."""
+        live, deleted = self.sample_object(), self.sample_object()
+        deleted.soft_delete()
+        self.assertEqual([live], list(self.ConcreteModel.objects.all()))
+        self.assertEqual({live, deleted}, set(self.ConcreteModel.all_objects.all()))
+        self.assertIs(self.ConcreteModel.all_objects, self.ConcreteModel._default_manager)
+
+    def test_purge_deleted(self) -> None:
+        """Test the `purge_deleted` command only hard deletes the rows soft deleted before the retention period."""
+        live, recent, old = self.sample_object(), self.sample_object(), self.sample_object()
+        recent.soft_delete()
+        old.soft_delete()
+        self.ConcreteModel.all_objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=31))
+        out = StringIO()
+        call_command("purge_deleted", "--days", "30", "--batch-size", "1", stdout=out)
+        self.assertIn(f"{self.ConcreteModel._meta.label}: purged 1 rows.", out.getvalue())
+        self.assertEqual({live, recent}, set(self.ConcreteModel.all_objects.all()))
+
     def test_repr_recursion(self) -> None:
         """Assure that `repr` on a model with a OneToOneField doesn't generate a `RecursionError`."""
         obj = self.sample_object()
@@ -1,4 +1,5 @@
 import json
+import time
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 from django.core.files import File
@@ -65,6 +66,18 @@ class TestUtilities(TestCase):
             with self.subTest("Testing the extensions", case=case, ext=expected):
                 self.assertEqual(expected, utils.ext(case))
 
+    def test_uuid7(self) -> None:
+        """Test the `uuid7` function generates time-ordered version 7 UUIDs, in order even within a millisecond."""
+        started_at = time.time_ns() // 1_000_000
+        uuids = [utils.uuid7() for _ in range(1000)]
+        self.assertEqual(uuids, sorted(uuids))
+        self.assertEqual(len(uuids), len(set(uuids)))
+        for uuid in (uuids[0], uuids[-1]):
+            self.assertEqual(7, uuid.version)
+            self.assertEqual("specified in RFC 4122", uuid.variant)
+            self.assertLessEqual(started_at, uuid.int >> 80)
+            self.assertLessEqual(uuid.int >> 80, time.time_ns() // 1_000_000 + 1)
+
     def test_is_svg(self) -> None:
         """Test the `is_svg` function."""
         PNG_FILE = FILES_FOLDER / "icon.png"
@@ -0,0 +1,146 @@
+"""
+Token bucket throttling for expensive endpoints (logins, registrations, enrollment requests...).
+
+Each `(scope, identifier)` has a bucket of `N` tokens refilled at `N` per period, from a DRF rate (`"N/period"`, set
+per scope in `DEFAULT_THROTTLE_RATES`): bursts of up to `N` requests are let through, then one every `period / N`
+seconds. Rejected requests get a `429` with a `Retry-After` header.
+
+Buckets are stored as a single timestamp each (the "theoretical arrival time" of the generic cell rate algorithm,
+equivalent to a token bucket), in-process by default, or in the `THROTTLE_CACHE` cache so every node shares them. The
+in-process store takes a few microseconds per request; the shared one a single cache read and write, which isn't
+atomic: concurrent requests from the same identifier on several nodes may let a few extra requests through.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Callable, Optional, cast
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework.views import APIView
+from core.utilities.cache import LRUCache
+
+
+class Buckets:
+    """Base class of the bucket stores."""
+
+    def take(self, key: str, interval: float, period: float, now: float) -> float:
+        """
+        Take a token from the bucket `key`, refilled every `interval` seconds up to `period / interval` tokens. Return
+        `0`, or the seconds until there's one if it's empty (see `next_arrival`).
+        """
+        raise NotImplementedError("`take()` must be implemented.")
+
+    def clear(self) -> None:
+        raise NotImplementedError("`clear()` must be implemented.")
+
+
+class LocalBuckets(Buckets):
+    """In-process bucket store, bounded to the `MAX_SIZE` most recently used identifiers of each period."""
+
+    MAX_SIZE = 100_000
+
+    def __init__(self) -> None:
+        self._caches: dict[float, LRUCache[float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, interval: float, period: float, now: float) -> float:
+        with self._lock:
+            # A bucket untouched for a whole period is full again, so its entry can expire
+            cache = self._caches.get(period)
+            if cache is None:
+                cache = self._caches[period] = LRUCache(self.MAX_SIZE, period)
+            arrival, wait = next_arrival(cache.get(key), interval, period, now)
+            if arrival is not None:
+                cache.set(key, arrival)
+            return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._caches.clear()
+
+
+class CacheBuckets(Buckets):
+    """Bucket store in a Django cache, shared by every process using it."""
+
+    def __init__(self, alias: str):
+        self.alias = alias
+
+    def take(self, key: str, interval: float, period: float, now: float) -> float:
+        cache = caches[self.alias]
+        arrival, wait = next_arrival(cache.get(key), interval, period, now)
+        if arrival is not None:
+            cache.set(key, arrival, timeout=int(period) + 1)
+        return wait
+
+    def clear(self) -> None:
+        caches[self.alias].clear()
+
+
+def next_arrival(
+    arrival: Optional[float], interval: float, period: float, now: float
+) -> tuple[Optional[float], float]:
+    """
+    Take a token from the bucket whose theoretical arrival time is `arrival` (`None` for a full one). Return its new
+    arrival time and `0` if there was one, or `None` and the seconds until there's one if it's empty.
+    """
+    arrival = max(arrival or now, now) + interval
+    wait = arrival - now - period
+    if wait > 0:
+        return None, wait
+    return arrival, 0.0
+
+
+throttle_buckets: Buckets = CacheBuckets(settings.THROTTLE_CACHE) if settings.THROTTLE_CACHE else LocalBuckets()
+"""The buckets of every `TokenBucketThrottle`, see `THROTTLE_CACHE`."""
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Throttle each identifier (by default the user, or the client's IP address for anonymous requests, see DRF's
+    `NUM_PROXIES` behind a proxy) with a token bucket per `scope`. A scope without a rate isn't throttled.
+
+    Subclasses set the `scope`, and override `get_identifier` to throttle by something else.
+    """
+
+    timer: Callable[[], float] = time.time
+    # Parsed from the rate when the throttle is created, if there's one
+    num_requests: int
+    duration: int
+    _wait: float = 0.0
+
+    def get_rate(self) -> Optional[str]:
+        if self.scope is None:
+            return None
+        # Read when the throttle is created, so rates can be overridden in tests
+        return cast(Optional[str], api_settings.DEFAULT_THROTTLE_RATES.get(self.scope))
+
+    def get_identifier(self, request: Request, view: APIView) -> Optional[str]:
+        """The identifier to throttle the request by, or `None` to let it through."""
+        if request.user and request.user.is_authenticated:
+            return str(request.user.pk)
+        return self.get_ident(request)
+
+    def get_cache_key(self, request: Request, view: APIView) -> Optional[str]:
+        identifier = self.get_identifier(request, view)
+        if identifier is None:
+            return None
+        # Identifiers may come from the request body: hash them to keep keys short and safe for any cache
+        digest = hashlib.blake2b(identifier.encode(), digest_size=16).hexdigest()
+        return self.cache_format % {"scope": self.scope, "ident": digest}
+
+    def allow_request(self, request: Request, view: APIView) -> bool:
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        self._wait = throttle_buckets.take(key, self.duration / self.num_requests, self.duration, self.timer())
+        return self._wait == 0
+
+    def wait(self) -> Optional[float]:
+        # `Retry-After` is a whole number of seconds: round up, so a retry right on time is let through
+        return float(max(1, math.ceil(self._wait))) if self._wait else None
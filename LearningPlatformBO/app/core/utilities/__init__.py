@@ -1,9 +1,12 @@
 from __future__ import annotations  # Required by the `if TYPE_CHECKING` block
+import os
+import threading
+import time
 import xml.etree.cElementTree as et
 from io import TextIOWrapper
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Optional, overload
-from uuid import uuid4
+from uuid import UUID, uuid4
 from django.core.files import File
 
 
@@ -57,6 +60,38 @@ def uuid() -> str:
     return str(uuid4())
 
 
+_uuid7_lock = threading.Lock()
+_uuid7_last = (0, 0)  # (timestamp in milliseconds, random bits) of the last uuid7
+
+
+def uuid7() -> UUID:
+    """
+    Generate a time-ordered UUID (version 7, RFC 9562): the Unix timestamp in milliseconds followed by 74 random bits.
+    As primary keys they're appended to the end of the index instead of scattered across it.
+
+    They're also monotonic within the process: in the same millisecond (or if the clock went back), the random bits of
+    the previous one are incremented by a random amount instead of drawn again, so even a burst of inserts lands in
+    order, and index pages are filled instead of split in half.
+    """
+    global _uuid7_last
+    timestamp = time.time_ns() // 1_000_000
+    with _uuid7_lock:
+        last_timestamp, last_random = _uuid7_last
+        if timestamp > last_timestamp:
+            random = int.from_bytes(os.urandom(10)) >> 6
+        else:
+            timestamp = last_timestamp
+            random = last_random + 1 + int.from_bytes(os.urandom(4))
+            if random >> 74:
+                timestamp, random = timestamp + 1, int.from_bytes(os.urandom(10)) >> 6
+        _uuid7_last = (timestamp, random)
+    # Timestamp (48 bits), version (4 bits), random (12 bits), variant (2 bits), random (62 bits)
+    value = (
+        (timestamp & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | (random >> 62) << 64 | 0x2 << 62 | random & (2**62 - 1)
+    )
+    return UUID(int=value)
+
+
 def is_svg(filepath: str | Path | File) -> bool:
     """
     Validate that a file is a valid SVG file.
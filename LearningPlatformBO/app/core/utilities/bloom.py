@@ -0,0 +1,42 @@
+import math
+from hashlib import blake2b
+
+
+class BloomFilter:
+    """
+    Probabilistic set of strings: `item in bloom_filter` is never `False` for an added item, and is wrongly `True` for
+    roughly `error_rate` of the others while no more than `capacity` items were added. Items can't be removed.
+
+    Memory use is about `1.2 * capacity` bytes for an `error_rate` of 1%, whatever the size of the items.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> list[int]:
+        # Double hashing: the k positions are derived from two independent 64 bit hashes
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        """Number of items added, counting repeated ones."""
+        return self.count
+
+    @property
+    def is_full(self) -> bool:
+        """Whether more than `capacity` items were added, so the false positive rate exceeds `error_rate`."""
+        return self.count > self.capacity
@@ -0,0 +1,60 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+class LRUCache(Generic[T]):
+    """
+    Bounded, thread-safe, in-process least recently used cache whose entries expire `ttl` seconds after being set.
+
+    Being in-process, each worker has its own copy: invalidating an entry only affects the current process, other
+    processes keep theirs until it expires. Keep the `ttl` as short as the data's tolerance for staleness.
+    """
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, T]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """Return the value for `key`, or `None` if it's missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: T) -> None:
+        """Store `value` for `key`, evicting the least recently used entry if the cache is full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key) is not None
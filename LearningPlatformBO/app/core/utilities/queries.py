@@ -0,0 +1,20 @@
+from django.db.models import Aggregate, Func, QuerySet, Subquery
+
+
+def aggregate_subquery(queryset: QuerySet, group_by: str, aggregate: Aggregate) -> Subquery:
+    """
+    Turn an aggregate over a correlated queryset (one filtered on `group_by=OuterRef(...)`) into a scalar subquery.
+
+    Annotating aggregates over several relations at once with joins multiplies the rows of one relation by the other;
+    a scalar subquery per aggregate keeps each of them a single index lookup. Empty relations yield `NULL`.
+    """
+    return Subquery(queryset.order_by().values(group_by).annotate(result=aggregate).values("result")[:1])
+
+
+class Array(Func):
+    """
+    PostgreSQL `ARRAY[...]` constructor over the given expressions. Pass an `ArrayField` as `output_field` to use the
+    array lookups (`contains`, `overlap`...) on it, e.g. to match it against an expression index.
+    """
+
+    template = "ARRAY[%(expressions)s]"
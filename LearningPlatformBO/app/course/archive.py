@@ -0,0 +1,109 @@
+"""
+Streaming ZIP export of a course's files.
+
+The archive is generated while it's sent: `zipfile` writes into a sink that only holds what was written since the
+response last pulled from it, and files are copied from storage `CHUNK_SIZE` bytes at a time, so memory use doesn't
+depend on the size of the course and nothing touches the disk. Files are stored uncompressed: course material is
+mostly already compressed (PDFs, images, videos) and deflating gigabytes would only cost CPU.
+"""
+import logging
+import os
+import zipfile
+from topic.models import QuestionAttachment, TopicItem
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ZipStream:
+    """Write-only, unseekable file object for `zipfile.ZipFile`, drained by the response as the archive is built."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def clean_name(name):
+    return name.replace('/', '-').replace('\\', '-').strip() or 'untitled'
+
+
+def course_archive_entries(course_id):
+    """
+    List the `(path in the archive, file field, date)` of every file of a course: topic items under their topic,
+    topics in `order`, then question attachments under `forums/<forum>/<question>/`. Only metadata is loaded.
+    """
+    entries = []
+    seen = set()
+
+    def add(folder, file, date):
+        path = f'{folder}/{os.path.basename(file.name)}'
+        if path in seen:
+            # Same file name twice in a folder: keep both
+            root, extension = os.path.splitext(path)
+            path = f'{root}-{len(seen)}{extension}'
+        seen.add(path)
+        entries.append((path, file, date))
+
+    items = (
+        TopicItem.objects.filter(topic__course_id=course_id)
+        .select_related('topic')
+        .only('file', 'added_at', 'topic__title', 'topic__order')
+        .order_by('topic__order', 'topic_id', 'added_at', 'id')
+    )
+    for item in items:
+        add(f'{item.topic.order:03d} - {clean_name(item.topic.title)}', item.file, item.added_at)
+
+    attachments = (
+        QuestionAttachment.objects.filter(question__forum__course_id=course_id)
+        .select_related('question__forum')
+        .only('file', 'uploaded_at', 'question__title', 'question__forum__title')
+        .order_by('question__forum__order', 'question__forum_id', 'question_id', 'id')
+    )
+    for attachment in attachments:
+        question = attachment.question
+        folder = f'forums/{clean_name(question.forum.title)}/{question.pk} - {clean_name(question.title)}'
+        add(folder, attachment.file, attachment.uploaded_at)
+    return entries
+
+
+def stream_course_archive(entries):
+    """
+    Yield the bytes of a ZIP archive of the given entries (see `course_archive_entries`). Files that can't be read are
+    left out and listed in a `MISSING.txt` at the end of the archive.
+    """
+    sink = ZipStream()
+    missing = []
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for path, file, date in entries:
+            try:
+                source = file.storage.open(file.name, 'rb')
+            except OSError:
+                logger.warning(f"Could not read {file.name} for a course archive", exc_info=True)
+                missing.append(path)
+                continue
+            info = zipfile.ZipInfo(path, date_time=date.timetuple()[:6])
+            with source, archive.open(info, 'w', force_zip64=True) as target:
+                while chunk := source.read(CHUNK_SIZE):
+                    target.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+        if missing:
+            archive.writestr('MISSING.txt', 'These files could not be read:\n' + '\n'.join(missing) + '\n')
+    yield sink.drain()
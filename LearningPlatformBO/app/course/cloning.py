@@ -0,0 +1,46 @@
+from django.db import transaction
+from .models import Course, CourseAdmin
+from topic.models import Forum, Topic, TopicItem
+
+
+@transaction.atomic
+def clone_course(course, user, title=None, visibility=None, batch_size=1000):
+    """
+    Copy a course with its topics (in `order`), their items and its forums, in a fixed number of set-based queries
+    whatever the size of the course. Returns the new course and how many of each were copied.
+
+    Topic items share their files with the originals: only the storage names are copied, never the files themselves
+    (background course deletions only remove the files no other item references, see `course/deletion.py`). Forums
+    are copied as empty shells, without their questions, and `user` is made the sole admin of the copy. Enrollments,
+    requests and stats start empty. The copy's outline is built by the usual `post_save` receiver once the transaction commits.
+    """
+    clone = Course.objects.create(
+        title=title or f'{course.title} (copy)',
+        visibility=visibility or course.visibility,
+    )
+    CourseAdmin.objects.create(user=user, course=clone, is_admin=True)
+
+    topics = list(Topic.objects.filter(course=course).order_by('order', 'id').values('id', 'title', 'description', 'order'))
+    cloned_topics = Topic.objects.bulk_create(
+        [
+            Topic(course=clone, title=topic['title'], description=topic['description'], order=topic['order'],
+                  created_by=user, updated_by=user)
+            for topic in topics
+        ],
+        batch_size=batch_size,
+    )
+    # `bulk_create` sets the primary keys on PostgreSQL, in the order the objects were given
+    topic_ids = {topic['id']: cloned.pk for topic, cloned in zip(topics, cloned_topics)}
+
+    items = TopicItem.objects.filter(topic__course=course).order_by('added_at', 'id').values_list('topic_id', 'file')
+    cloned_items = TopicItem.objects.bulk_create(
+        (TopicItem(topic_id=topic_ids[topic_id], file=file, created_by=user, updated_by=user) for topic_id, file in items.iterator()),
+        batch_size=batch_size,
+    )
+
+    forums = Forum.objects.filter(course=course).order_by('order', 'id').values('title', 'description', 'order')
+    cloned_forums = Forum.objects.bulk_create(
+        [Forum(course=clone, created_by=user, updated_by=user, **forum) for forum in forums],
+        batch_size=batch_size,
+    )
+    return clone, {'topics': len(cloned_topics), 'topic_items': len(cloned_items), 'forums': len(cloned_forums)}
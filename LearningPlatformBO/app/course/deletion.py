@@ -0,0 +1,104 @@
+"""
+Background deletion of large courses.
+
+Deleting a course with `Model.delete()` cascades over all of its content in a single transaction, which on a large
+course holds locks for minutes. Instead, `schedule_course_deletion` hides the course right away and records a
+`CourseDeletion`; the `process_course_deletions` command then deletes the content table by table, children first,
+`batch_size` rows per transaction, and finally the (by then empty) course itself.
+"""
+import logging
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Course, CourseDeletion, CourseOutline, EnrollmentRequest
+from topic.models import Forum, Question, QuestionAttachment, Topic, TopicItem
+
+logger = logging.getLogger(__name__)
+
+# Each step: its name, the content of a course it deletes, and the field holding its media files, if any
+DELETION_STEPS = (
+    ('question_attachments', lambda course_id: QuestionAttachment.objects.filter(question__forum__course_id=course_id), 'file'),
+    ('questions', lambda course_id: Question.objects.filter(forum__course_id=course_id), None),
+    ('forums', lambda course_id: Forum.objects.filter(course_id=course_id), None),
+    ('topic_items', lambda course_id: TopicItem.objects.filter(topic__course_id=course_id), 'file'),
+    ('topics', lambda course_id: Topic.objects.filter(course_id=course_id), None),
+    ('enrollment_requests', lambda course_id: EnrollmentRequest.objects.filter(course_id=course_id), None),
+    ('enrollments', lambda course_id: Course.enrolled_users.through.objects.filter(course_id=course_id), None),
+)
+
+
+@transaction.atomic
+def schedule_course_deletion(course, user):
+    """Hide a course at once and schedule its deletion. Its outline goes too, as it's served without a course lookup."""
+    Course.all_objects.filter(pk=course.pk).update(is_hidden=True)
+    CourseOutline.objects.filter(course_id=course.pk).delete()
+    return CourseDeletion.objects.create(course_id=course.pk, course_title=course.title, requested_by=user)
+
+
+def run_course_deletion(deletion, batch_size=1000):
+    """
+    Run a scheduled deletion to completion, resuming where a previous run stopped. Each batch is its own transaction,
+    taken with the deletion row locked, so several workers never process the same deletion at once; a worker that
+    finds it locked simply moves on. Returns whether the deletion is done.
+    """
+    if not deletion.progress:
+        deletion.progress = {
+            step: {'total': queryset(deletion.course_id).count(), 'deleted': 0} for step, queryset, _ in DELETION_STEPS
+        }
+        deletion.status = 'running'
+        deletion.save(update_fields=['progress', 'status', 'updated_at'])
+    try:
+        for step, queryset, file_field in DELETION_STEPS:
+            while True:
+                with transaction.atomic():
+                    locked = CourseDeletion.objects.select_for_update(skip_locked=True).filter(pk=deletion.pk).first()
+                    if locked is None:
+                        return False
+                    deleted = delete_batch(queryset(deletion.course_id), batch_size, file_field)
+                    if not deleted:
+                        break
+                    locked.progress[step]['deleted'] += deleted
+                    locked.save(update_fields=['progress', 'updated_at'])
+                    deletion.progress = locked.progress
+        with transaction.atomic():
+            Course.all_objects.filter(pk=deletion.course_id).delete()
+            CourseDeletion.objects.filter(pk=deletion.pk).update(status='done', finished_at=timezone.now(), updated_at=timezone.now())
+    except Exception as e:
+        logger.exception(f"Deletion {deletion.pk} of course {deletion.course_id} failed")
+        CourseDeletion.objects.filter(pk=deletion.pk).update(status='failed', error=str(e), updated_at=timezone.now())
+        raise
+    deletion.status = 'done'
+    return True
+
+
+def delete_batch(queryset, batch_size, file_field=None):
+    """
+    Delete up to `batch_size` rows of a queryset with a plain `DELETE`: the rows' own children are deleted by earlier
+    steps, and no signal is sent (the receivers would only update aggregates of the course that's going away). The
+    media files of the deleted rows are removed once the transaction commits. Returns how many rows were deleted.
+    """
+    model = queryset.model
+    fields = ('pk', file_field) if file_field else ('pk',)
+    rows = list(queryset.order_by().values_list(*fields)[:batch_size])
+    if not rows:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} '
+            f'WHERE {connection.ops.quote_name(model._meta.pk.column)} = ANY(%s)',
+            [[row[0] for row in rows]],
+        )
+    if file_field:
+        file_names = {row[1] for row in rows if row[1]}
+        transaction.on_commit(lambda: delete_unreferenced_files(model, file_field, file_names))
+    return len(rows)
+
+
+def delete_unreferenced_files(model, file_field, file_names):
+    """Delete the given files from storage, except those still referenced by a row (cloned courses share files)."""
+    referenced = set(model.objects.filter(**{f'{file_field}__in': file_names}).values_list(file_field, flat=True))
+    storage = model._meta.get_field(file_field).storage
+    for name in file_names - referenced:
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning(f"Could not delete file {name}", exc_info=True)
@@ -0,0 +1,186 @@
+import csv
+import io
+from itertools import islice
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Course, CourseEnrollmentDailyStats, CourseEnrollmentStats, EnrollmentRequest
+from .stats import record_status_changes
+
+User = get_user_model()
+
+
+def enroll_users(course_id, user_ids, batch_size=1000, refresh_count=True):
+    """
+    Enroll many users in a course with set-based inserts into the `Course.enrolled_users` through table, `batch_size`
+    users per statement.
+
+    Users that are already enrolled are skipped by the unique constraint (`ON CONFLICT DO NOTHING`), so this is safe
+    to run concurrently. The course row itself is never loaded or saved: its `enrolled_count` is only increased by the
+    number of inserted rows, without recounting the enrollments, so concurrent approvals hold its lock briefly
+    (callers enrolling in several steps can skip it with `refresh_count=False` and recount once at the end). No
+    `m2m_changed` signal is sent. Returns how many users were actually enrolled.
+    """
+    Enrollment = Course.enrolled_users.through
+    quote_name = connection.ops.quote_name
+    enrollment_table = quote_name(Enrollment._meta.db_table)
+    course_column = quote_name(Enrollment._meta.get_field('course').column)
+    user_column = quote_name(Enrollment._meta.get_field('user').column)
+    user_ids = iter([str(user_id) for user_id in user_ids])
+    enrolled = 0
+    with connection.cursor() as cursor:
+        while batch := list(islice(user_ids, batch_size)):
+            cursor.execute(
+                f"""
+                INSERT INTO {enrollment_table} ({course_column}, {user_column})
+                SELECT %s, user_id FROM unnest(%s::uuid[]) AS user_id
+                ON CONFLICT ({course_column}, {user_column}) DO NOTHING
+                """,
+                [course_id, batch],
+            )
+            enrolled += cursor.rowcount
+    if refresh_count and enrolled:
+        Course.objects.filter(pk=course_id).update(enrolled_count=F('enrolled_count') + enrolled)
+    return enrolled
+
+
+def request_enrollments(course_id, user_ids):
+    """
+    Create pending enrollment requests for many users of a course in a single set-based insert, skipping the users
+    that already have a request for it (`ON CONFLICT DO NOTHING`). The course's counters are bumped for the inserted
+    rows only (see `course/stats.py`); no signal is sent. Returns how many requests were created.
+    """
+    user_ids = [str(user_id) for user_id in user_ids]
+    if not user_ids:
+        return 0
+    request_table = connection.ops.quote_name(EnrollmentRequest._meta.db_table)
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {request_table} (user_id, course_id, status, created_at, updated_at)
+            SELECT user_id, %s, 'pending', %s, %s FROM unnest(%s::uuid[]) AS user_id
+            ON CONFLICT (user_id, course_id) DO NOTHING
+            """,
+            [course_id, now, now, user_ids],
+        )
+        created = cursor.rowcount
+    record_status_changes(course_id, [(None, 'pending')] * created)
+    return created
+
+
+def request_enrollment(user_id, course_id):
+    """
+    Create a pending enrollment request in a single statement, without checking anything beforehand.
+
+    The insert selects from the course table and skips conflicts on the `(user, course)` unique constraint, so a
+    missing (or hidden) course and an existing request both insert nothing, even under concurrent requests. The same statement
+    bumps the course's pending counter and today's bucket (see `course/stats.py`) for the inserted row, if any.
+    Returns a `(request, course_exists)` pair: the inserted `EnrollmentRequest` (or `None` if nothing was inserted)
+    and whether the course exists, which tells the two cases apart.
+    """
+    quote_name = connection.ops.quote_name
+    course_table = quote_name(Course._meta.db_table)
+    request_table = quote_name(EnrollmentRequest._meta.db_table)
+    stats_table = quote_name(CourseEnrollmentStats._meta.db_table)
+    daily_table = quote_name(CourseEnrollmentDailyStats._meta.db_table)
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH course AS (SELECT id FROM {course_table} WHERE id = %s AND NOT is_hidden),
+            inserted AS (
+                INSERT INTO {request_table} (user_id, course_id, status, created_at, updated_at)
+                SELECT %s, id, 'pending', %s, %s FROM course
+                ON CONFLICT (user_id, course_id) DO NOTHING
+                RETURNING id, course_id
+            ),
+            totals AS (
+                INSERT INTO {stats_table} AS stats (course_id, pending, approved, denied, updated_at)
+                SELECT course_id, 1, 0, 0, %s FROM inserted
+                ON CONFLICT (course_id) DO UPDATE SET pending = stats.pending + 1, updated_at = EXCLUDED.updated_at
+            ),
+            daily AS (
+                INSERT INTO {daily_table} AS daily (course_id, day, requested, approved, denied)
+                SELECT course_id, %s, 1, 0, 0 FROM inserted
+                ON CONFLICT (course_id, day) DO UPDATE SET requested = daily.requested + 1
+            )
+            SELECT (SELECT id FROM inserted), EXISTS(SELECT 1 FROM course)
+            """,
+            [course_id, user_id, now, now, now, timezone.localdate(now)],
+        )
+        request_id, course_exists = cursor.fetchone()
+    if request_id is None:
+        return None, course_exists
+    enrollment_request = EnrollmentRequest(
+        id=request_id, user_id=user_id, course_id=course_id, status='pending', created_at=now, updated_at=now
+    )
+    return enrollment_request, course_exists
+
+
+class EnrollmentImportReport:
+    """Outcome of an enrollment import. Only the first `max_errors` row errors are kept, to bound its size."""
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.enrolled = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row, value, error):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row, 'value': value, 'error': error})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'enrolled': self.enrolled,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors),
+        }
+
+
+def import_enrollments(course_id, csv_file, chunk_size=1000, max_errors=1000):
+    """
+    Enroll the users listed in a CSV file (one username or email per row, in the first column, with an optional
+    `username`/`email` header) in a course.
+
+    The file is parsed as a stream and handled `chunk_size` rows at a time: each chunk's users are resolved with a
+    single `IN` lookup and enrolled with `enroll_users`, so memory stays bounded whatever the size of the file.
+    Raises `UnicodeDecodeError` if the file isn't valid UTF-8.
+    """
+    report = EnrollmentImportReport(max_errors)
+    rows = enumerate(csv.reader(io.TextIOWrapper(csv_file, encoding='utf-8-sig', newline='')), start=1)
+    while chunk := list(islice(rows, chunk_size)):
+        identifiers = {}
+        for row_number, row in chunk:
+            if not any(cell.strip() for cell in row):
+                continue  # Blank line
+            value = row[0].strip()
+            if row_number == 1 and value.lower() in ('username', 'email'):
+                continue  # Header
+            report.rows += 1
+            if not value:
+                report.add_error(row_number, value, 'Empty username or email.')
+                continue
+            identifiers[row_number] = value
+
+        values = set(identifiers.values())
+        users = User.objects.filter(Q(username__in=values) | Q(email__in=values), is_active=True)
+        user_ids = {}
+        for user_id, username, email in users.values_list('id', 'username', 'email'):
+            user_ids[username] = user_ids[email] = user_id
+
+        for row_number, value in identifiers.items():
+            if value not in user_ids:
+                report.add_error(row_number, value, 'User not found.')
+        resolved = {user_ids[value] for value in values if value in user_ids}
+        # Users already enrolled aren't inserted, so they aren't counted
+        report.enrolled += enroll_users(course_id, resolved, refresh_count=False)
+
+    Course.refresh_enrolled_counts([course_id])
+    return report
@@ -0,0 +1,40 @@
+import time
+from core.management.commands._base_command import BaseCommand
+from course.deletion import run_course_deletion
+from course.models import CourseDeletion
+
+
+class Command(BaseCommand):
+    """
+    Run the scheduled background course deletions (see `course/deletion.py`), oldest first.
+
+    Runs once by default; with `--loop` it keeps polling for new deletions every `--sleep` seconds, as a worker.
+    Several workers can run side by side: each deletion is only processed by one of them at a time.
+    """
+
+    help = 'Run the scheduled background course deletions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new deletions.')
+        parser.add_argument('--sleep', type=float, default=5, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            self.process(options['batch_size'])
+            if not options['loop']:
+                return
+            time.sleep(options['sleep'])
+
+    def process(self, batch_size):
+        for deletion in CourseDeletion.objects.filter(status__in=['pending', 'running']).order_by('created_at', 'id'):
+            self.info(f'Deleting course {deletion.course_id} ({deletion.course_title})...')
+            try:
+                done = run_course_deletion(deletion, batch_size=batch_size)
+            except Exception as e:
+                self.error(f'Deletion of course {deletion.course_id} failed: {e}')
+                continue
+            if done:
+                self.success(f'Deleted course {deletion.course_id}.')
+            else:
+                self.warning(f'Course {deletion.course_id} is being deleted by another worker, skipping.')
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.4 on 2026-10-18 17:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_enrolled_count(apps, schema_editor):
+    Course = apps.get_model('course', 'Course')
+    enrollments = (
+        Course.enrolled_users.through.objects.filter(course_id=OuterRef('pk'))
+        .order_by()
+        .values('course_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Course.objects.update(enrolled_count=Coalesce(Subquery(enrollments), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0004_remove_course_topics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrolled_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_enrolled_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.4 on 2026-10-18 17:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0005_course_enrolled_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollmentrequest',
+            index=models.Index(fields=['created_at', 'id'], name='enrollreq_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollmentrequest',
+            index=models.Index(fields=['course', 'created_at', 'id'], name='enrollreq_course_created_idx'),
+        ),
+    ]
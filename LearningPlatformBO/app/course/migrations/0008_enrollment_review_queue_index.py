@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-18 18:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0007_courseoutline'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollmentrequest',
+            index=models.Index(fields=['course', 'status', 'created_at', 'id'], name='enrollreq_review_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.0.4 on 2026-10-18 18:06
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_enrollment_stats(apps, schema_editor):
+    EnrollmentRequest = apps.get_model('course', 'EnrollmentRequest')
+    CourseEnrollmentStats = apps.get_model('course', 'CourseEnrollmentStats')
+    CourseEnrollmentDailyStats = apps.get_model('course', 'CourseEnrollmentDailyStats')
+
+    totals = defaultdict(dict)
+    for row in EnrollmentRequest.objects.order_by().values('course_id', 'status').annotate(total=Count('id')):
+        totals[row['course_id']][row['status']] = row['total']
+    CourseEnrollmentStats.objects.bulk_create(
+        [CourseEnrollmentStats(course_id=course_id, **counts) for course_id, counts in totals.items()], batch_size=1000
+    )
+
+    # Requests count on the day they were made; decisions on the day of their last change, the best history available
+    daily = defaultdict(dict)
+    requested = EnrollmentRequest.objects.order_by().annotate(day=TruncDate('created_at')).values('course_id', 'day')
+    for row in requested.annotate(total=Count('id')):
+        daily[row['course_id'], row['day']]['requested'] = row['total']
+    decided = (
+        EnrollmentRequest.objects.order_by()
+        .filter(status__in=['approved', 'denied'])
+        .annotate(day=TruncDate('updated_at'))
+        .values('course_id', 'day', 'status')
+    )
+    for row in decided.annotate(total=Count('id')):
+        daily[row['course_id'], row['day']][row['status']] = row['total']
+    CourseEnrollmentDailyStats.objects.bulk_create(
+        [CourseEnrollmentDailyStats(course_id=course_id, day=day, **counts) for (course_id, day), counts in daily.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0008_enrollment_review_queue_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseEnrollmentStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='enrollment_stats', serialize=False, to='course.course')),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('approved', models.PositiveIntegerField(default=0)),
+                ('denied', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseEnrollmentDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('requested', models.PositiveIntegerField(default=0)),
+                ('approved', models.PositiveIntegerField(default=0)),
+                ('denied', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollment_daily_stats', to='course.course')),
+            ],
+            options={
+                'unique_together': {('course', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_enrollment_stats, migrations.RunPython.noop),
+    ]
@@ -1,19 +1,57 @@
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.contrib.postgres.indexes import GinIndex
 from core.extensions.models.base_abstract_model import BaseAbstractModel
+from core.utilities.search import SearchableManager, search_vector_field
 from django.conf import settings
 from topic.models import Topic
 
+class CourseManager(SearchableManager):
+    """Leaves out the courses hidden while they're deleted in the background (see `course/deletion.py`)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_hidden=False)
+
+
 class Course(models.Model):
     title = models.CharField(max_length=255)
     visibility = models.CharField(max_length=50, choices=(('public', 'Public'), ('private', 'Private')))
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized size of `enrolled_users`, kept up to date by the signals in `course/signals.py`
+    enrolled_count = models.PositiveIntegerField(default=0, editable=False)
+    # Generated column, recomputed by the database on every write (see `core.utilities.search`)
+    search_vector = search_vector_field(title='A')
+    # Set while the course is deleted in the background; hidden courses are left out of `Course.objects`
+    is_hidden = models.BooleanField(default=False, editable=False)
+
+    objects = CourseManager()
+    all_objects = SearchableManager()
 
     # Relationships
     enrolled_users = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='enrolled_courses')
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='course_search_vector_idx'),
+        ]
+
     def __str__(self):
         return self.title
+
+    @staticmethod
+    def refresh_enrolled_counts(course_ids):
+        """Recompute `enrolled_count` from the enrollment table for the given courses, in a single statement."""
+        enrollments = (
+            Course.enrolled_users.through.objects.filter(course_id=OuterRef('pk'))
+            .order_by()
+            .values('course_id')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        Course.objects.filter(pk__in=course_ids).update(enrolled_count=Coalesce(Subquery(enrollments), 0))
     
 class CourseAdmin(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -26,12 +64,42 @@ class CourseAdmin(models.Model):
     def __str__(self):
         return f"{self.user.get_full_name()} - Admin of {self.course.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored user, so moving the row to another user invalidates both (see `course/signals.py`)
+        instance._loaded_user_id = instance.__dict__.get('user_id')
+        return instance
+
     @staticmethod
     def has_course_admin_permission(user, course):
         return CourseAdmin.objects.filter(user=user, course=course).exists()
         #, is_admin=True Add this when I create new database TODO
     
 
+class CourseOutline(models.Model):
+    """
+    Denormalized, read-only outline of a course (topics in order with their items, forums with their question counts),
+    stored as a single JSON document so reading it is a primary-key lookup. See `course/outline.py`.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='outline')
+    document = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Outline of course {self.course_id}"
+
+
+class EnrollmentRequestQuerySet(models.QuerySet):
+    def delete(self):
+        # Bulk deletes skip `EnrollmentRequest.delete()`: recount the affected courses instead
+        with transaction.atomic():
+            course_ids = set(self.order_by().values_list('course_id', flat=True).distinct())
+            deleted = super().delete()
+            CourseEnrollmentStats.recount(course_ids)
+        return deleted
+
+
 class EnrollmentRequest(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -45,8 +113,98 @@ class EnrollmentRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = EnrollmentRequestQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.user.username} - {self.course.title} ({self.status})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status, so a save can tell which transition it makes (see `course/signals.py`)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def delete(self, *args, **kwargs):
+        # Take the request out of its course's counters; cascades are handled in bulk (see `course/signals.py`)
+        status = getattr(self, '_loaded_status', None) or self.status
+        with transaction.atomic():
+            stats = CourseEnrollmentStats.objects.filter(course_id=self.course_id)
+            stats.update(**{status: Greatest(F(status) - 1, 0)})
+            return super().delete(*args, **kwargs)
+
     class Meta:
-        unique_together = ('user', 'course')  # Prevent duplicate requests
\ No newline at end of file
+        unique_together = ('user', 'course')  # Prevent duplicate requests
+        indexes = [
+            # Keyset pagination of the enrollment request lists (see `core.pagination.CreatedAtKeysetPagination`)
+            models.Index(fields=['created_at', 'id'], name='enrollreq_created_id_idx'),
+            models.Index(fields=['course', 'created_at', 'id'], name='enrollreq_course_created_idx'),
+            # Enrollment review queue, filtered by course and status (see `ListEnrollmentRequestsView`)
+            models.Index(fields=['course', 'status', 'created_at', 'id'], name='enrollreq_review_queue_idx'),
+        ]
+
+
+class CourseEnrollmentStats(models.Model):
+    """
+    Running totals of a course's enrollment requests per status. Maintained incrementally, in the same transaction as
+    every status change (see `course/stats.py`), so reading them never scans `EnrollmentRequest`.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='enrollment_stats')
+    pending = models.PositiveIntegerField(default=0)
+    approved = models.PositiveIntegerField(default=0)
+    denied = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Enrollment stats of course {self.course_id}"
+
+    @staticmethod
+    def recount(course_ids):
+        """Recompute the totals of the given courses from `EnrollmentRequest` in a single statement, after bulk deletes."""
+        requests = EnrollmentRequest.objects.filter(course_id=OuterRef('course_id')).order_by().values('course_id')
+        CourseEnrollmentStats.objects.filter(course_id__in=course_ids).update(**{
+            status: Coalesce(Subquery(requests.filter(status=status).annotate(total=Count('pk')).values('total')), 0)
+            for status, _ in EnrollmentRequest.STATUS_CHOICES
+        })
+
+
+class CourseEnrollmentDailyStats(models.Model):
+    """Enrollment requests made, approved and denied in a course on a given day."""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollment_daily_stats')
+    day = models.DateField()
+    requested = models.PositiveIntegerField(default=0)
+    approved = models.PositiveIntegerField(default=0)
+    denied = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('course', 'day')
+
+    def __str__(self):
+        return f"Enrollment stats of course {self.course_id} on {self.day}"
+
+
+class CourseDeletion(models.Model):
+    """
+    A course being deleted in the background, in bounded batches, by the `process_course_deletions` command. Keeps the
+    per-step progress (`{step: {'total': n, 'deleted': n}}`) for the status endpoint. The course id is a plain column
+    so the record outlives the course.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    course_id = models.PositiveIntegerField(db_index=True)
+    course_title = models.CharField(max_length=255)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='course_deletions')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    progress = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Deletion of course {self.course_id} ({self.status})"
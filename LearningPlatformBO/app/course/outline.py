@@ -0,0 +1,114 @@
+"""
+The course outline read model.
+
+The outline document has one section per kind of content, each rebuilt on its own when that content changes (see the
+receivers in `course/signals.py`, and `schedule_rebuild`):
+- `course`: the course's own fields;
+- `topics`: the topics in `order`, each with the metadata of its items;
+- `forums`: the forums in `order`, each with its question count.
+"""
+import os
+import threading
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Count
+from .models import Course, CourseOutline
+from topic.models import Forum, Topic, TopicItem
+
+SECTIONS = ('course', 'topics', 'forums')
+
+
+def build_course_section(course_id):
+    return Course.objects.filter(pk=course_id).values('id', 'title', 'visibility', 'updated_at').first()
+
+
+def build_topics_section(course_id):
+    items = {}
+    for item in TopicItem.objects.filter(topic__course_id=course_id).order_by('added_at', 'id').values('id', 'topic_id', 'file', 'added_at'):
+        items.setdefault(item['topic_id'], []).append({
+            'id': item['id'],
+            'name': os.path.basename(item['file']),
+            'url': default_storage.url(item['file']),
+            'added_at': item['added_at'],
+        })
+    topics = Topic.objects.filter(course_id=course_id).order_by('order', 'id').values('id', 'title', 'description', 'order')
+    return [{**topic, 'items': items.get(topic['id'], [])} for topic in topics]
+
+
+def build_forums_section(course_id):
+    forums = (
+        Forum.objects.filter(course_id=course_id)
+        .order_by('order', 'id')
+        .annotate(question_count=Count('questions'))
+        .values('id', 'title', 'description', 'order', 'question_count')
+    )
+    return list(forums)
+
+
+SECTION_BUILDERS = {
+    'course': build_course_section,
+    'topics': build_topics_section,
+    'forums': build_forums_section,
+}
+
+
+def rebuild_outline(course_id, sections=SECTIONS):
+    """
+    Rebuild the given sections of a course's outline, keeping the others as they are. Missing outlines are built in
+    full, and the outline of a course that no longer exists is left alone. Returns the outline, if any.
+
+    The outline row is locked while its sections are rebuilt, so concurrent rebuilds of different sections apply one
+    after the other, each on the document the previous one wrote.
+    """
+    with transaction.atomic():
+        outline = CourseOutline.objects.select_for_update().filter(course_id=course_id).first()
+        if outline is None:
+            course = build_course_section(course_id)
+            if course is None:
+                return None
+            document = {'course': course, 'topics': build_topics_section(course_id), 'forums': build_forums_section(course_id)}
+            outline, created = CourseOutline.objects.get_or_create(course_id=course_id, defaults={'document': document})
+            if created:
+                return outline
+            # Created by a concurrent rebuild in the meantime
+            outline = CourseOutline.objects.select_for_update().get(course_id=course_id)
+        for section in sections:
+            outline.document[section] = SECTION_BUILDERS[section](course_id)
+        outline.save(update_fields=['document', 'updated_at'])
+    return outline
+
+
+_scheduled = threading.local()
+
+
+def schedule_rebuild(section, course_id=None, topic_id=None, forum_id=None):
+    """
+    Rebuild a section of a course's outline once the current transaction commits. The course is given directly, or
+    through one of its topics or forums, resolved at commit time so a parent deleted in the meantime rebuilds nothing.
+
+    Everything scheduled in a transaction is applied together: each section of each course is rebuilt once, and the
+    topics and forums are resolved with a query each, however many rows were written.
+    """
+    scheduled = getattr(_scheduled, 'rebuilds', None)
+    if scheduled is None or not connection.run_on_commit:
+        # No callback is pending, so what's left was scheduled by a transaction that rolled back
+        scheduled = _scheduled.rebuilds = {'course': {}, 'topic': {}, 'forum': {}}
+    for kind, pk in (('course', course_id), ('topic', topic_id), ('forum', forum_id)):
+        if pk is not None:
+            scheduled[kind].setdefault(pk, set()).add(section)
+    # The first callback to run applies everything; the others, and those of a rolled back transaction, find nothing
+    transaction.on_commit(apply_scheduled_rebuilds)
+
+
+def apply_scheduled_rebuilds():
+    scheduled = getattr(_scheduled, 'rebuilds', None)
+    if scheduled is None:
+        return
+    _scheduled.rebuilds = None
+    sections = scheduled['course']
+    for model, kind in ((Topic, 'topic'), (Forum, 'forum')):
+        if scheduled[kind]:
+            for pk, course_id in model.objects.filter(pk__in=scheduled[kind]).values_list('pk', 'course_id'):
+                sections.setdefault(course_id, set()).update(scheduled[kind][pk])
+    for course_id, course_sections in sections.items():
+        rebuild_outline(course_id, sections=[section for section in SECTIONS if section in course_sections])
@@ -0,0 +1,75 @@
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F, Q, Value
+from core.utilities.search import SEARCH_CONFIG
+from topic.models import Question, Topic
+from .models import Course
+
+HEADLINE_OPTIONS = {'start_sel': '<mark>', 'stop_sel': '</mark>', 'max_fragments': 2, 'max_words': 25}
+
+# What each result type searches: its model, the path to its course (as a lookup prefix) and to its course's id, the
+# field its snippet is cut from and the extra columns its results carry
+SEARCH_SOURCES = {
+    'course': (Course, '', 'id', 'title', ()),
+    'topic': (Topic, 'course__', 'course_id', 'description', ()),
+    'question': (Question, 'forum__course__', 'forum__course_id', 'description', ('forum_id',)),
+}
+SEARCH_TYPES = tuple(SEARCH_SOURCES)
+
+
+def search_content(text, membership, types=SEARCH_TYPES, limit=20):
+    """
+    Rank courses, topics and forum questions against a web-search style query (`"exact phrase"`, `or`, `-word`).
+
+    Only content of public courses and of the courses the user administers or is enrolled in is searched, and never
+    that of courses being deleted. Each type is matched against its GIN-indexed `search_vector` and cut down to its
+    own top `limit` rows; the candidates are then merged by rank in a single `UNION ALL` query, and highlighted
+    snippets are only computed for the final results (`ts_headline` re-parses the text, so it's by far the most
+    expensive part). Snippets are plain text with the matches wrapped in `<mark>` tags: escape them before rendering
+    them as HTML.
+    """
+    query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+    visible_course_ids = membership.admin_course_ids | membership.enrolled_course_ids
+    candidates = []
+    for result_type in types:
+        model, course_prefix, course_path, _, _ = SEARCH_SOURCES[result_type]
+        visible = Q(**{f'{course_prefix}visibility': 'public'}) | Q(**{f'{course_path}__in': visible_course_ids})
+        candidates.append(
+            model.objects.filter(visible, search_vector=query, **{f'{course_prefix}is_hidden': False})
+            .annotate(
+                result_type=Value(result_type),
+                result_course_id=F(course_path),
+                rank=SearchRank(F('search_vector'), query),
+            )
+            .values('id', 'title', 'result_type', 'result_course_id', 'rank')
+            .order_by('-rank')[:limit]
+        )
+    if not candidates:
+        return []
+    hits = candidates[0]
+    if len(candidates) > 1:
+        hits = hits.union(*candidates[1:], all=True).order_by('-rank')[:limit]
+    hits = list(hits)
+
+    results = [
+        {
+            'type': hit['result_type'],
+            'id': hit['id'],
+            'course_id': hit['result_course_id'],
+            'title': hit['title'],
+            'rank': hit['rank'],
+        }
+        for hit in hits
+    ]
+    for result_type in types:
+        model, _, _, snippet_field, extra_fields = SEARCH_SOURCES[result_type]
+        typed_results = {result['id']: result for result in results if result['type'] == result_type}
+        if not typed_results:
+            continue
+        snippets = (
+            model.objects.filter(id__in=typed_results)
+            .annotate(snippet=SearchHeadline(snippet_field, query, config=SEARCH_CONFIG, **HEADLINE_OPTIONS))
+            .values('id', 'snippet', *extra_fields)
+        )
+        for row in snippets:
+            typed_results[row.pop('id')].update(row)
+    return results
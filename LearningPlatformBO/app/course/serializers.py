@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Course, CourseAdmin, EnrollmentRequest
+from .models import Course, CourseAdmin, CourseDeletion, CourseEnrollmentDailyStats, CourseEnrollmentStats, CourseOutline, EnrollmentRequest
+from .membership import CourseMembership
 from topic.serializers import TopicSerializer, ForumSerializer
 from django.db.models import Q
 from django.contrib.auth import get_user_model
@@ -9,32 +10,35 @@ User = get_user_model()
 class CourseSerializer(serializers.ModelSerializer):
     topics = TopicSerializer(many=True, read_only=True)
     forums = ForumSerializer(many=True, read_only=True)
-    enrolled_users = serializers.PrimaryKeyRelatedField(
-        many=True,
-        required=False,
-        allow_empty=True,  # Allows the list to be empty
-        read_only=True     # Ensures the field is read-only
-    )
     is_course_admin = serializers.SerializerMethodField()
 
     class Meta:
         model = Course
-        fields = '__all__'
+        # The members are served, paginated, by the `course-members` endpoint; `enrolled_count` has their total
+        exclude = ['enrolled_users', 'search_vector', 'is_hidden']
     
     def get_is_course_admin(self, obj):
         request = self.context.get('request', None)
         if request and request.user.is_authenticated:
-            return CourseAdmin.has_course_admin_permission(request.user, obj)
+            # Resolved from the request-scoped membership so a page of courses costs a single query
+            return CourseMembership.for_request(request).is_admin(obj)
         return False
         
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        request = self.context.get('request', None)
-        if request and request.user.is_authenticated:
-            if CourseAdmin.has_course_admin_permission(request.user, instance):
-                representation['isAdmin'] = True
+        if representation.get('is_course_admin'):
+            representation['isAdmin'] = True
         return representation
 
+class CourseOutlineSerializer(serializers.ModelSerializer):
+    """Renders the stored outline document as is."""
+    class Meta:
+        model = CourseOutline
+        fields = ['document']
+
+    def to_representation(self, instance):
+        return instance.document
+
 class CourseAdminSerializer(serializers.ModelSerializer):
     class Meta:
         model = CourseAdmin
@@ -57,21 +61,13 @@ class EnrollmentRequestSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
     
-class AdminEnrollmentRequestSerializer(serializers.ModelSerializer):
-    course_name = serializers.SerializerMethodField()  # Add a custom method field for course name
+class CourseCloneSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255, required=False)
+    visibility = serializers.ChoiceField(choices=Course._meta.get_field('visibility').choices, required=False)
 
-    class Meta:
-        model = EnrollmentRequest
-        fields = ['course_id', 'course_name', 'user_id']
-
-    def get_course_name(self, obj):
-        # This method will be used to fetch the course name
-        return obj.course.title if obj.course else None
-
-class CourseAdminEnrollmentRequestSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = EnrollmentRequest
-        fields = ['user_id']
+class EnrollmentDecisionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=10000)
+    decision = serializers.ChoiceField(choices=['approved', 'denied'])
 
 class EnrolledCoursesSerializer(serializers.ModelSerializer):
     class Meta:
@@ -88,9 +84,52 @@ class UserSerializerForEnrollment(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email'] 
 
+class AdminEnrollmentRequestSerializer(serializers.ModelSerializer):
+    """Rows of the enrollment review queue; expects `course` and `user` to be joined with `select_related`."""
+    course_name = serializers.CharField(source='course.title', read_only=True)
+    user = UserSerializerForEnrollment(read_only=True)
+
+    class Meta:
+        model = EnrollmentRequest
+        fields = ['id', 'course_id', 'course_name', 'user_id', 'user', 'status', 'created_at', 'updated_at']
+
+class CourseMemberSerializer(serializers.Serializer):
+    """Serializes rows of the `Course.enrolled_users` through table, fetched with `.values()`."""
+    id = serializers.UUIDField(source='user_id')
+    username = serializers.CharField(source='user__username')
+
 class EnrollmentRequestSerializerForEnrollment(serializers.ModelSerializer):
     user = UserSerializerForEnrollment()
 
     class Meta:
         model = EnrollmentRequest
-        fields = ['id', 'user', 'course', 'status', 'created_at', 'updated_at']
\ No newline at end of file
+        fields = ['id', 'user', 'course', 'status', 'created_at', 'updated_at']
+
+class CourseEnrollmentDailyStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CourseEnrollmentDailyStats
+        fields = ['day', 'requested', 'approved', 'denied']
+
+class CourseEnrollmentStatsSerializer(serializers.ModelSerializer):
+    total = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CourseEnrollmentStats
+        fields = ['course', 'pending', 'approved', 'denied', 'total', 'updated_at']
+
+    def get_total(self, obj):
+        return obj.pending + obj.approved + obj.denied
+
+class CourseDeletionSerializer(serializers.ModelSerializer):
+    percent = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CourseDeletion
+        fields = ['id', 'course_id', 'course_title', 'status', 'percent', 'progress', 'error', 'created_at', 'updated_at', 'finished_at']
+
+    def get_percent(self, obj):
+        if obj.status == 'done':
+            return 100
+        total = sum(step['total'] for step in obj.progress.values())
+        deleted = sum(step['deleted'] for step in obj.progress.values())
+        return min(100 * deleted // total, 99) if total else 0
@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+from .models import Course, CourseAdmin, EnrollmentRequest
+from .outline import schedule_rebuild
+from .stats import forget_user_requests, record_status_changes
+from topic.models import Forum, Question, Topic, TopicItem
+
+
+@receiver(m2m_changed, sender=Course.enrolled_users.through)
+def update_enrolled_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep `Course.enrolled_count` in sync with changes made through either side of `enrolled_users`."""
+    if action == 'pre_clear' and reverse:
+        # The course ids are gone after the clear, so grab them beforehand
+        instance._cleared_course_ids = list(instance.enrolled_courses.values_list('id', flat=True))
+    elif action == 'post_add' and pk_set:
+        # Django only reports the rows it actually inserted, so these can be applied as increments
+        if reverse:
+            Course.objects.filter(pk__in=pk_set).update(enrolled_count=F('enrolled_count') + 1)
+        else:
+            Course.objects.filter(pk=instance.pk).update(enrolled_count=F('enrolled_count') + len(pk_set))
+    elif action == 'post_remove' and pk_set:
+        Course.refresh_enrolled_counts(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        Course.refresh_enrolled_counts(getattr(instance, '_cleared_course_ids', []) if reverse else [instance.pk])
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def remember_enrolled_courses(sender, instance, **kwargs):
+    """Deleting a user cascades over the enrollment table without any m2m signal; remember what it touched."""
+    instance._enrolled_course_ids = list(instance.enrolled_courses.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def release_enrolled_courses(sender, instance, **kwargs):
+    if getattr(instance, '_enrolled_course_ids', None):
+        Course.refresh_enrolled_counts(instance._enrolled_course_ids)
+
+
+@receiver(post_save, sender=EnrollmentRequest)
+def record_enrollment_request_status(sender, instance, created, **kwargs):
+    """
+    Count single-object creations and status changes of enrollment requests in the course's stats. Bulk writes (see
+    `request_enrollment` and `decide_enrollment_requests`) record theirs explicitly.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    old_status = None if created else getattr(instance, '_loaded_status', None)
+    if old_status is None and not created:
+        # The stored status wasn't loaded, so the transition is unknown
+        return
+    record_status_changes(instance.course_id, [(old_status, instance.status)])
+    instance._loaded_status = instance.status
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def forget_user_enrollment_requests(sender, instance, **kwargs):
+    """
+    Deleting a user cascades over their enrollment requests: take them out of the stats at once, as a receiver on
+    `EnrollmentRequest` would load and update them one by one. Deleting a course deletes its stats along with them.
+    """
+    forget_user_requests([instance.pk])
+
+
+@receiver(post_save, sender=CourseAdmin)
+@receiver(post_delete, sender=CourseAdmin)
+def invalidate_course_claims(sender, instance, **kwargs):
+    """Stop trusting the `courses_admin` claims of the tokens already issued to the user(s) of the row."""
+    user_ids = {instance.user_id, getattr(instance, '_loaded_user_id', None)} - {None}
+    get_user_model().objects.bump_permissions_version(user_ids)
+
+
+@receiver(post_save, sender=Course)
+def rebuild_course_outline(sender, instance, created, **kwargs):
+    schedule_rebuild('course', course_id=instance.pk)
+
+
+# Deleting a parent rebuilds its course's section once, before the cascade: receivers on the children would make
+# Django load every cascaded row to send them. Children deleted on their own are rebuilt by their views instead.
+@receiver(post_save, sender=Topic)
+@receiver(pre_delete, sender=Topic)
+def rebuild_outline_topics(sender, instance, **kwargs):
+    schedule_rebuild('topics', course_id=instance.course_id)
+
+
+@receiver(post_save, sender=TopicItem)
+def rebuild_outline_topic_items(sender, instance, **kwargs):
+    schedule_rebuild('topics', topic_id=instance.topic_id)
+
+
+@receiver(post_save, sender=Forum)
+@receiver(pre_delete, sender=Forum)
+def rebuild_outline_forums(sender, instance, **kwargs):
+    schedule_rebuild('forums', course_id=instance.course_id)
+
+
+@receiver(post_save, sender=Question)
+def rebuild_outline_questions(sender, instance, **kwargs):
+    # Only the question counts of the forums section depend on questions
+    schedule_rebuild('forums', forum_id=instance.forum_id)
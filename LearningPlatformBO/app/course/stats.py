@@ -0,0 +1,91 @@
+from collections import Counter
+from django.db import connection
+from django.utils import timezone
+from .models import CourseEnrollmentDailyStats, CourseEnrollmentStats, EnrollmentRequest
+
+STATUSES = ('pending', 'approved', 'denied')
+DECISIONS = ('approved', 'denied')
+
+
+def record_status_changes(course_id, transitions):
+    """
+    Apply enrollment request status transitions to a course's counters and to today's bucket.
+
+    `transitions` is an iterable of `(old_status, new_status)` pairs, with `old_status` set to `None` for newly created
+    requests. Both tables are upserted with relative increments, in two statements whatever the number of transitions,
+    so concurrent writers never overwrite each other; decrements stop at zero. Call it in the same transaction as the
+    status change itself.
+    """
+    transitions = Counter((old, new) for old, new in transitions if old != new)
+    if not transitions:
+        return
+    totals = dict.fromkeys(STATUSES, 0)
+    daily = dict.fromkeys(('requested',) + DECISIONS, 0)
+    for (old, new), count in transitions.items():
+        if old is None:
+            daily['requested'] += count
+        else:
+            totals[old] -= count
+        totals[new] += count
+        if new in DECISIONS:
+            daily[new] += count
+
+    now = timezone.now()
+    stats_table = connection.ops.quote_name(CourseEnrollmentStats._meta.db_table)
+    daily_table = connection.ops.quote_name(CourseEnrollmentDailyStats._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {stats_table} AS stats (course_id, pending, approved, denied, updated_at)
+            VALUES (%s, GREATEST(%s, 0), GREATEST(%s, 0), GREATEST(%s, 0), %s)
+            ON CONFLICT (course_id) DO UPDATE SET
+                pending = GREATEST(stats.pending + %s, 0),
+                approved = GREATEST(stats.approved + %s, 0),
+                denied = GREATEST(stats.denied + %s, 0),
+                updated_at = EXCLUDED.updated_at
+            """,
+            [course_id, *totals.values(), now, *totals.values()],
+        )
+        if any(daily.values()):
+            cursor.execute(
+                f"""
+                INSERT INTO {daily_table} AS daily (course_id, day, requested, approved, denied)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (course_id, day) DO UPDATE SET
+                    requested = daily.requested + EXCLUDED.requested,
+                    approved = daily.approved + EXCLUDED.approved,
+                    denied = daily.denied + EXCLUDED.denied
+                """,
+                [course_id, timezone.localdate(now), *daily.values()],
+            )
+
+
+def forget_user_requests(user_ids):
+    """
+    Take the enrollment requests of users about to be deleted out of the counters of their courses, in a single
+    statement whatever the number of requests. Call it before the requests are deleted in cascade with the users.
+    Daily buckets are history and keep them.
+    """
+    stats_table = connection.ops.quote_name(CourseEnrollmentStats._meta.db_table)
+    request_table = connection.ops.quote_name(EnrollmentRequest._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {stats_table} AS stats SET
+                pending = GREATEST(stats.pending - removed.pending, 0),
+                approved = GREATEST(stats.approved - removed.approved, 0),
+                denied = GREATEST(stats.denied - removed.denied, 0)
+            FROM (
+                SELECT
+                    course_id,
+                    COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+                    COUNT(*) FILTER (WHERE status = 'approved') AS approved,
+                    COUNT(*) FILTER (WHERE status = 'denied') AS denied
+                FROM {request_table}
+                WHERE user_id = ANY(%s::uuid[])
+                GROUP BY course_id
+            ) AS removed
+            WHERE stats.course_id = removed.course_id
+            """,
+            [[str(user_id) for user_id in user_ids]],
+        )
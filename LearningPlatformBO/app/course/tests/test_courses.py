@@ -1,8 +1,23 @@
-from django.test import TestCase
+import os
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from users.models import User
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
-from course.models import Course, CourseAdmin
+from core.throttling import throttle_buckets
+from course.models import Course, CourseAdmin, CourseDeletion, CourseEnrollmentStats, CourseOutline, EnrollmentRequest
+from topic.models import Forum, QuestionAttachment, Topic, TopicItem
+from users.serializers import CustomTokenObtainPairSerializer
+from users.token_authentication import user_cache
 
 class CourseTests(TestCase):
 
@@ -95,3 +110,711 @@ class CourseTests(TestCase):
 
     def test_enrolled_user_is_enrolled_in_course(self):
         self.assertIn(self.enrolled_user, self.course.enrolled_users.all())
+
+    def test_course_list_query_budget(self):
+        """A page of courses costs a fixed handful of queries, no matter how many courses are on it."""
+        # Count, courses, topics, forums and the admin course ids: the user comes from the authentication cache
+        query_budget = 5
+        self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.course_admin_token)
+        self.course_admin_client.get('/api/courses/')
+
+        def count_list_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = self.course_admin_client.get('/api/courses/')
+            self.assertEqual(response.status_code, 200)
+            return len(context.captured_queries), response.json()
+
+        small_page_queries, _ = count_list_queries()
+        for i in range(10):
+            course = Course.objects.create(title=f'Budget Course {i}', visibility='public')
+            CourseAdmin.objects.create(user=self.course_admin_user, course=course, is_admin=True)
+            Topic.objects.create(course=course, title='Topic', description='Topic')
+            Forum.objects.create(course=course, title='Forum', description='Forum')
+            course.enrolled_users.add(self.enrolled_user)
+        # The new course admin rows dropped the user from the authentication cache
+        self.course_admin_client.get('/api/courses/')
+        full_page_queries, data = count_list_queries()
+
+        self.assertEqual(len(data['results']), 10)
+        self.assertTrue(all(course['is_course_admin'] for course in data['results'][2:]))
+        self.assertLessEqual(full_page_queries, query_budget)
+        self.assertEqual(small_page_queries, full_page_queries)
+
+    def test_enrolled_count_follows_enrollments(self):
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, 1)
+        self.course.enrolled_users.add(self.admin_user, self.enrolled_user)
+        self.admin_user.enrolled_courses.add(self.course_public)
+        self.course.refresh_from_db()
+        self.course_public.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, 2)
+        self.assertEqual(self.course_public.enrolled_count, 1)
+
+        self.course.enrolled_users.remove(self.enrolled_user)
+        self.admin_user.enrolled_courses.clear()
+        self.course.refresh_from_db()
+        self.course_public.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, 0)
+        self.assertEqual(self.course_public.enrolled_count, 0)
+
+    def test_course_detail_has_enrolled_count(self):
+        self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+        response = self.enrolled_user_client.get(f'/api/courses/{self.course.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['enrolled_count'], 1)
+        self.assertNotIn('enrolled_users', response.json())
+
+    def test_course_members_keyset_pagination(self):
+        members = [
+            User.objects.create_user(username=f'member{i}', password='memberpass', email=f'member{i}@example.com')
+            for i in range(4)
+        ]
+        self.course.enrolled_users.add(*members)
+        self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.course_admin_token)
+
+        usernames = []
+        url = f'/api/courses/{self.course.id}/members/?page_size=2'
+        while url:
+            response = self.course_admin_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            usernames += [member['username'] for member in response.json()['results']]
+            url = response.json()['next']
+        self.assertEqual(sorted(usernames), sorted([self.enrolled_user.username] + [m.username for m in members]))
+
+    def test_course_members_forbidden_for_outsiders(self):
+        self.admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_jwt_token(
+            User.objects.create_user(username='outsider', password='outsiderpass', email='outsider@example.com')
+        ))
+        response = self.admin_client.get(f'/api/courses/{self.course.id}/members/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_course_enrollment_requests_cursor_pagination(self):
+        for i in range(15):
+            user = User.objects.create_user(username=f'requester{i}', password='requesterpass', email=f'requester{i}@example.com')
+            EnrollmentRequest.objects.create(user=user, course=self.course)
+        self.admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+
+        first_page = self.admin_client.get(f'/api/courses/{self.course.id}/enrollment-requests/').json()
+        self.assertEqual(len(first_page['results']), 10)
+        self.assertNotIn('count', first_page)
+        second_page = self.admin_client.get(first_page['next']).json()
+        self.assertEqual(len(second_page['results']), 5)
+        self.assertIsNone(second_page['next'])
+        ids = [request['id'] for request in first_page['results'] + second_page['results']]
+        self.assertEqual(ids, list(EnrollmentRequest.objects.order_by('created_at', 'id').values_list('id', flat=True)))
+
+        cached = self.admin_client.get(f'/api/courses/{self.course.id}/enrollment-requests/?count=cached').json()
+        self.assertEqual(cached['count'], 15)
+        estimated = self.admin_client.get(f'/api/courses/{self.course.id}/enrollment-requests/?count=estimate').json()
+        self.assertIsInstance(estimated['count'], int)
+
+    def test_course_enrollment_requests_invalid_cursor(self):
+        self.admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+        response = self.admin_client.get(f'/api/courses/{self.course.id}/enrollment-requests/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_create_enrollment_request(self):
+        self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+        url = '/api/enrollment-requests/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.enrolled_user_client.post(url, {'course': self.course_public.id})
+        self.assertEqual(response.status_code, 201)
+        # User and the insert
+        self.assertEqual(len(queries), 2)
+        request = EnrollmentRequest.objects.get(user=self.enrolled_user, course=self.course_public)
+        self.assertEqual(response.json(), {
+            'id': request.id, 'user': str(self.enrolled_user.id), 'course': self.course_public.id, 'status': 'pending'
+        })
+
+        self.assertEqual(self.enrolled_user_client.post(url, {'course': self.course_public.id}).status_code, 409)
+        self.assertEqual(self.enrolled_user_client.post(url, {'course': 0}).status_code, 404)
+        self.assertEqual(self.enrolled_user_client.post(url, {'course': 'abc'}).status_code, 400)
+        self.assertEqual(self.anonymous_client.post(url, {'course': self.course.id}).status_code, 401)
+        self.assertEqual(EnrollmentRequest.objects.count(), 1)
+
+    def test_create_enrollment_request_throttled(self):
+        throttle_buckets.clear()
+        self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+        rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'enrollment_request': '2/minute'}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            self.assertEqual(self.enrolled_user_client.post('/api/enrollment-requests/', {'course': self.course_public.id}).status_code, 201)
+            self.assertEqual(self.enrolled_user_client.post('/api/enrollment-requests/', {'course': self.course_public.id}).status_code, 409)
+            response = self.enrolled_user_client.post('/api/enrollment-requests/', {'course': self.course.id})
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], '30')
+            # Other users have their own bucket
+            self.admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+            self.assertEqual(self.admin_client.post('/api/enrollment-requests/', {'course': self.course.id}).status_code, 201)
+        throttle_buckets.clear()
+
+    def test_course_enrollment_stats(self):
+        requesters = [
+            User.objects.create_user(username=f'stats{i}', password='statspass', email=f'stats{i}@example.com')
+            for i in range(4)
+        ]
+        for user in requesters:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_jwt_token(user))
+            self.assertEqual(client.post('/api/enrollment-requests/', {'course': self.course.id}).status_code, 201)
+        requests = list(EnrollmentRequest.objects.filter(course=self.course).order_by('id'))
+
+        self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.course_admin_token)
+        self.course_admin_client.post(f'/api/courses/{self.course.id}/enrollment-requests/decide/', {
+            'ids': [requests[0].id, requests[1].id], 'decision': 'approved'
+        })
+        request = EnrollmentRequest.objects.get(pk=requests[1].pk)
+        request.status = 'denied'
+        request.save()
+        requests[3].delete()
+
+        url = f'/api/courses/{self.course.id}/stats/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.course_admin_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # Administered courses, counters and daily buckets (the user was cached by the decide request)
+        self.assertEqual(len(queries), 3)
+        stats = response.json()
+        self.assertEqual((stats['pending'], stats['approved'], stats['denied'], stats['total']), (1, 1, 1, 3))
+        self.assertEqual(len(stats['daily']), 1)
+        self.assertEqual(
+            {key: stats['daily'][0][key] for key in ('requested', 'approved', 'denied')},
+            {'requested': 4, 'approved': 2, 'denied': 1},
+        )
+
+        # Deleting a user takes their requests out of the counters, in bulk
+        requesters[0].delete()
+        stats = self.course_admin_client.get(url).json()
+        self.assertEqual((stats['pending'], stats['approved'], stats['denied'], stats['total']), (1, 0, 1, 2))
+
+        # Bulk deletes recount the affected courses, and counters that drifted stop at zero
+        EnrollmentRequest.objects.filter(course=self.course, status='pending').delete()
+        stats = self.course_admin_client.get(url).json()
+        self.assertEqual((stats['pending'], stats['approved'], stats['denied'], stats['total']), (0, 0, 1, 1))
+        CourseEnrollmentStats.objects.filter(course=self.course).update(denied=0)
+        EnrollmentRequest.objects.get(course=self.course, status='denied').delete()
+        self.assertEqual(CourseEnrollmentStats.objects.get(course=self.course).denied, 0)
+
+        self.assertEqual(self.course_admin_client.get(url + '?days=abc').status_code, 400)
+        self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+        self.assertEqual(self.enrolled_user_client.get(url).status_code, 403)
+        self.admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+        public = self.admin_client.get(f'/api/courses/{self.course_public.id}/stats/').json()
+        self.assertEqual((public['total'], public['daily']), (0, []))
+        self.assertEqual(self.admin_client.get('/api/courses/0/stats/').status_code, 404)
+
+    def test_search(self):
+        Course.objects.filter(pk=self.course_public.pk).update(title='Quantum physics')
+        Topic.objects.create(course=self.course, title='Entanglement', description='Quantum entanglement in practice')
+        forum = Forum.objects.create(course=self.course_public, title='Forum', description='Forum')
+        question = forum.questions.create(title='Homework help', description='How do quantum computers work?')
+        Topic.objects.create(course=self.course_public, title='Classical', description='Newtonian mechanics')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.anonymous_client.get('/api/search/?q=quantum')
+        self.assertEqual(response.status_code, 200)
+        # The ranked union, then one snippet query per result type
+        self.assertEqual(len(queries), 3)
+        results = response.json()['results']
+        self.assertEqual({(result['type'], result['id']) for result in results}, {
+            ('course', self.course_public.id), ('question', question.id)
+        })
+        # Title matches outrank description matches
+        self.assertEqual(results[0]['type'], 'course')
+        self.assertEqual(results[1]['forum_id'], forum.id)
+        self.assertIn('<mark>quantum</mark>', results[1]['snippet'])
+
+        self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+        results = self.enrolled_user_client.get('/api/search/?q=quantum&type=topic').json()['results']
+        self.assertEqual([(result['type'], result['course_id']) for result in results], [('topic', self.course.id)])
+
+        self.assertEqual(self.anonymous_client.get('/api/search/?q=').status_code, 400)
+        self.assertEqual(self.anonymous_client.get('/api/search/?q=quantum&type=user').status_code, 400)
+
+    def test_course_admin_claims(self):
+        """Admin checks trust the token's claims until the user's course admins change."""
+        topic = Topic.objects.create(course=self.course, title='Topic', description='Topic')
+        self.course_admin_user.refresh_from_db()
+        refresh = CustomTokenObtainPairSerializer.get_token(self.course_admin_user)
+        self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.course_admin_client.patch(f'/api/topics/{topic.id}/', {'title': 'Renamed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if 'course_courseadmin' in query['sql']])
+
+        # The token still claims the course, but it's now outdated
+        CourseAdmin.objects.filter(user=self.course_admin_user).delete()
+        response = self.course_admin_client.patch(f'/api/topics/{topic.id}/', {'title': 'Renamed again'})
+        self.assertEqual(response.status_code, 403)
+
+        # Refreshing re-embeds the current claims
+        response = self.anonymous_client.post('/users/login/refresh/', {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, 200)
+        access = RefreshToken(response.json()['refresh']).access_token
+        self.assertEqual(access['courses_admin'], [])
+        self.assertEqual(access['permissions_version'], refresh['permissions_version'] + 1)
+
+    def test_course_admin_claims_revoked_in_another_process(self):
+        """A revoked claim isn't trusted by processes whose authentication cache still has the user as it was."""
+        topic = Topic.objects.create(course=self.course, title='Topic', description='Topic')
+        for version_cache in ('', 'default'):
+            with self.subTest(version_cache=version_cache), override_settings(PERMISSIONS_VERSION_CACHE=version_cache):
+                caches['default'].clear()
+                CourseAdmin.objects.get_or_create(user=self.course_admin_user, course=self.course, is_admin=True)
+                self.course_admin_user.refresh_from_db()
+                token = CustomTokenObtainPairSerializer.get_token(self.course_admin_user).access_token
+                self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(token))
+                self.assertEqual(self.course_admin_client.patch(f'/api/topics/{topic.id}/', {'title': 'A'}).status_code, 200)
+                if version_cache:
+                    # The version is read from the shared cache
+                    with CaptureQueriesContext(connection) as queries:
+                        self.course_admin_client.patch(f'/api/topics/{topic.id}/', {'title': 'B'})
+                    self.assertFalse([query for query in queries if 'permissions_version' in query['sql']])
+                stale_user = user_cache.get(str(self.course_admin_user.pk))
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    CourseAdmin.objects.filter(user=self.course_admin_user).delete()
+                # This process dropped the user from its cache, others still have it
+                user_cache.set(str(self.course_admin_user.pk), stale_user)
+                self.assertEqual(self.course_admin_client.patch(f'/api/topics/{topic.id}/', {'title': 'C'}).status_code, 403)
+
+    def test_clone_course(self):
+        second = Topic.objects.create(course=self.course, title='Second', description='Second', order=2)
+        first = Topic.objects.create(course=self.course, title='First', description='First', order=1)
+        for i in range(3):
+            TopicItem.objects.create(topic=first, file=f'topic_items/notes{i}.pdf')
+        TopicItem.objects.create(topic=second, file='topic_items/slides.pdf')
+        forum = Forum.objects.create(course=self.course, title='Forum', description='Forum')
+        forum.questions.create(title='Question', description='Question')
+        self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.course_admin_token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.course_admin_client.post(f'/api/courses/{self.course.id}/clone/', {'title': 'Next term'})
+        self.assertEqual(response.status_code, 201)
+        # Auth, permission and source course, then two inserts, a select and an insert per copied table, and the bump of
+        # the caller's permissions version for the new course admin row (plus savepoints)
+        self.assertLessEqual(len(queries), 14)
+        data = response.json()
+        self.assertEqual(
+            {key: data[key] for key in ('title', 'visibility', 'topics', 'topic_items', 'forums')},
+            {'title': 'Next term', 'visibility': 'private', 'topics': 2, 'topic_items': 4, 'forums': 1},
+        )
+        clone = Course.objects.get(pk=data['id'])
+        self.assertEqual(list(CourseAdmin.objects.filter(course=clone).values_list('user_id', flat=True)), [self.course_admin_user.id])
+        self.assertEqual(clone.enrolled_count, 0)
+        self.assertEqual(list(clone.topics.order_by('order').values_list('title', flat=True)), ['First', 'Second'])
+        self.assertEqual(
+            sorted(TopicItem.objects.filter(topic__course=clone, topic__title='First').values_list('file', flat=True)),
+            [f'topic_items/notes{i}.pdf' for i in range(3)],
+        )
+        self.assertFalse(Forum.objects.get(course=clone).questions.exists())
+        self.assertEqual(clone.outline.document['topics'][0]['title'], 'First')
+
+        self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+        self.assertEqual(self.enrolled_user_client.post(f'/api/courses/{self.course.id}/clone/').status_code, 403)
+
+    def test_background_course_deletion(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            topic = Topic.objects.create(course=self.course, title='Topic', description='Topic')
+            items = [TopicItem(topic=topic) for _ in range(3)]
+            for i, item in enumerate(items):
+                item.file.save(f'notes{i}.pdf', ContentFile(b'notes'))
+            # A clone of another course sharing the first file
+            clone_topic = Topic.objects.create(course=self.course_public, title='Topic', description='Topic')
+            TopicItem.objects.create(topic=clone_topic, file=items[0].file.name)
+            forum = Forum.objects.create(course=self.course, title='Forum', description='Forum')
+            question = forum.questions.create(title='Question', description='Question')
+            attachment = QuestionAttachment(question=question)
+            attachment.file.save('answer.txt', ContentFile(b'answer'))
+            EnrollmentRequest.objects.create(user=self.admin_user, course=self.course)
+            self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.course_admin_token)
+
+            response = self.course_admin_client.delete(f'/api/courses/{self.course.id}/?mode=background')
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()['status'], 'pending')
+            status_url = response.json()['status_url']
+            # Hidden right away, content included
+            self.assertEqual(self.course_admin_client.get(f'/api/courses/{self.course.id}/').status_code, 404)
+            self.assertEqual(self.course_admin_client.get(f'/api/topics/{topic.id}/').status_code, 404)
+            self.assertEqual(self.anonymous_client.get(f'/api/courses/{self.course.id}/outline/').status_code, 404)
+            self.assertEqual(self.course_admin_client.get(f'/api/courses/{self.course.id}/stats/').status_code, 404)
+            self.assertEqual(self.course_admin_client.post(f'/api/courses/{self.course.id}/clone/').status_code, 404)
+            response = self.course_admin_client.post(
+                f'/api/courses/{self.course.id}/enrollment-requests/decide/', {'ids': [1], 'decision': 'approved'}
+            )
+            self.assertEqual(response.status_code, 404)
+            self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+            self.assertEqual(self.enrolled_user_client.post('/api/enrollment-requests/', {'course': self.course.id}).status_code, 404)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('process_course_deletions', batch_size=2, stdout=StringIO())
+            deletion = self.course_admin_client.get(status_url).json()
+            self.assertEqual((deletion['status'], deletion['percent']), ('done', 100))
+            self.assertEqual(deletion['progress']['topic_items'], {'total': 3, 'deleted': 3})
+            self.assertEqual(deletion['progress']['enrollments'], {'total': 1, 'deleted': 1})
+            self.assertFalse(Course.all_objects.filter(pk=self.course.pk).exists())
+            self.assertFalse(Topic.objects.filter(pk=topic.pk).exists())
+            storage_files = set(os.listdir(os.path.join(media_root, 'topic_items')))
+            self.assertEqual(storage_files, {os.path.basename(items[0].file.name)})
+            self.assertEqual(os.listdir(os.path.join(media_root, 'question_attachments')), [])
+
+            self.assertEqual(self.enrolled_user_client.get(status_url).status_code, 404)
+            self.assertEqual(CourseDeletion.objects.count(), 1)
+
+    def test_course_archive(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            second = Topic.objects.create(course=self.course, title='Week 2', description='Week 2', order=2)
+            first = Topic.objects.create(course=self.course, title='Week 1/intro', description='Week 1', order=1)
+            for topic, name, content in ((second, 'slides.pdf', b'slides'), (first, 'notes.pdf', b'notes' * 50000)):
+                TopicItem(topic=topic).file.save(name, ContentFile(content))
+            TopicItem.objects.create(topic=second, file='topic_items/gone.pdf')
+            forum = Forum.objects.create(course=self.course, title='Forum', description='Forum')
+            question = forum.questions.create(title='Question', description='Question')
+            QuestionAttachment(question=question).file.save('answer.txt', ContentFile(b'answer'))
+            self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.course_admin_token)
+
+            response = self.course_admin_client.get(f'/api/courses/{self.course.id}/archive/')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            self.assertEqual(response['Content-Type'], 'application/zip')
+            archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+            self.assertEqual(archive.namelist(), [
+                '001 - Week 1-intro/notes.pdf',
+                '002 - Week 2/slides.pdf',
+                f'forums/Forum/{question.id} - Question/answer.txt',
+                'MISSING.txt',
+            ])
+            self.assertEqual(archive.read('001 - Week 1-intro/notes.pdf'), b'notes' * 50000)
+            self.assertIn('002 - Week 2/gone.pdf', archive.read('MISSING.txt').decode())
+
+        self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+        self.assertEqual(self.enrolled_user_client.get(f'/api/courses/{self.course.id}/archive/').status_code, 403)
+
+    def test_enrollment_review_queue(self):
+        requesters = [
+            User.objects.create_user(username=f'queued{i}', password='queuedpass', email=f'queued{i}@example.com')
+            for i in range(4)
+        ]
+        pending = [EnrollmentRequest.objects.create(user=user, course=self.course) for user in requesters[:3]]
+        EnrollmentRequest.objects.filter(pk=pending[2].pk).update(status='denied')
+        other_course_request = EnrollmentRequest.objects.create(user=requesters[3], course=self.course_public)
+        url = '/api/enrollment-requests-list/'
+
+        self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.course_admin_token)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.course_admin_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # User, administered courses and the joined page
+        self.assertLessEqual(len(queries), 3)
+        results = response.json()['results']
+        self.assertEqual([request['id'] for request in results], [pending[0].id, pending[1].id])
+        self.assertEqual(results[0]['course_name'], self.course.title)
+        self.assertEqual(results[0]['user']['username'], 'queued0')
+
+        self.assertEqual(len(self.course_admin_client.get(url + '?status=all').json()['results']), 3)
+        self.assertEqual(self.course_admin_client.get(url + '?status=denied').json()['results'][0]['id'], pending[2].id)
+        self.assertEqual(self.course_admin_client.get(url + '?status=bogus').status_code, 400)
+        self.assertEqual(self.course_admin_client.get(url + f'?course_id={self.course_public.id}').status_code, 403)
+        self.assertEqual(self.course_admin_client.get(url + '?created_before=2000-01-01T00:00:00Z').json()['results'], [])
+        self.assertEqual(self.course_admin_client.get(url + '?created_after=yesterday').status_code, 400)
+
+        self.admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+        results = self.admin_client.get(url).json()['results']
+        self.assertEqual(len(results), 3)
+        results = self.admin_client.get(url + f'?course_id={self.course_public.id}').json()['results']
+        self.assertEqual([request['id'] for request in results], [other_course_request.id])
+
+        self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+        self.assertEqual(self.enrolled_user_client.get(url).status_code, 403)
+
+    def test_course_detail_conditional_get(self):
+        url = f'/api/courses/{self.course_public.id}/'
+        response = self.anonymous_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(context.captured_queries), 1)
+
+        # Deleting a child moves no timestamp forward, so the response can only be validated by its etag
+        self.assertNotIn('Last-Modified', response)
+
+        topic = Topic.objects.create(course=self.course_public, title='New Topic', description='New Topic')
+        response = self.anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['topics']), 1)
+
+        etag = response['ETag']
+        topic.delete()
+        response = self.anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['topics'], [])
+
+    def test_forum_detail_conditional_get(self):
+        forum = Forum.objects.create(course=self.course_public, title='Forum', description='Forum')
+        url = f'/api/forums/{forum.id}/'
+        etag = self.anonymous_client.get(url)['ETag']
+        self.assertEqual(self.anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        forum.questions.create(title='Question', description='Question')
+        response = self.anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['questions']), 1)
+
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+        forum.questions.get().delete()
+        response = self.anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['questions'], [])
+
+    def test_forum_header_and_questions(self):
+        forum = Forum.objects.create(course=self.course_public, title='Forum', description='Forum')
+        other = Forum.objects.create(course=self.course_public, title='Other', description='Other')
+        other.questions.create(title='Elsewhere', description='Elsewhere')
+        questions = [forum.questions.create(title=f'Question {i}', description='Question') for i in range(5)]
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            for question in questions[:3]:
+                QuestionAttachment(question=question).file.save('answer.pdf', ContentFile(b'answer'))
+
+            response = self.anonymous_client.get(f'/api/forums/{forum.id}/header/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(set(response.json()), {'id', 'course', 'title', 'description', 'created_at', 'updated_at'})
+            response = self.anonymous_client.get(f'/api/forums/{forum.id}/header/', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+            url = f'/api/forums/{forum.id}/questions/?page_size=2'
+            ids = []
+            while url:
+                # The forum, the page and its attachments, whatever the page
+                with self.assertNumQueries(3):
+                    response = self.anonymous_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                data = response.json()
+                ids += [question['id'] for question in data['results']]
+                url = data['next']
+            self.assertEqual(ids, [question.id for question in questions])
+            first = self.anonymous_client.get(f'/api/forums/{forum.id}/questions/').json()['results'][0]
+            self.assertEqual(len(first['attachments']), 1)
+            self.assertTrue(first['attachments'][0]['file_url'].startswith('http://testserver/'))
+            self.assertEqual(self.anonymous_client.get('/api/forums/0/questions/').status_code, 404)
+
+    def test_forum_header_and_questions_private(self):
+        forum = Forum.objects.create(course=self.course, title='Forum', description='Forum')
+        forum.questions.create(title='Question', description='Question')
+        self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+        for url in (f'/api/forums/{forum.id}/header/', f'/api/forums/{forum.id}/questions/'):
+            self.assertIn(self.anonymous_client.get(url).status_code, (401, 403))
+            self.assertEqual(self.enrolled_user_client.get(url).status_code, 200)
+
+    def test_file_downloads(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            topic = Topic.objects.create(course=self.course_public, title='Week 1', description='Week 1')
+            item = TopicItem(topic=topic)
+            item.file.save('notes.pdf', ContentFile(b'0123456789'))
+            forum = Forum.objects.create(course=self.course, title='Forum', description='Forum')
+            attachment = QuestionAttachment(question=forum.questions.create(title='Question', description='Question'))
+            attachment.file.save('answer.pdf', ContentFile(b'answer'))
+            url = f'/api/topic-items/{item.id}/download/'
+
+            response = self.anonymous_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+            self.assertEqual(response['Content-Length'], '10')
+            self.assertEqual(response['Accept-Ranges'], 'bytes')
+            self.assertEqual(response['Content-Disposition'], 'attachment; filename="notes.pdf"')
+            etag = response['ETag']
+            self.assertEqual(self.anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+            for header, status, content, content_range in (
+                ('bytes=2-4', 206, b'234', 'bytes 2-4/10'),
+                ('bytes=7-', 206, b'789', 'bytes 7-9/10'),
+                ('bytes=-3', 206, b'789', 'bytes 7-9/10'),
+                ('bytes=8-100', 206, b'89', 'bytes 8-9/10'),
+                ('bytes=0-1,4-5', 200, b'0123456789', None),
+            ):
+                with self.subTest(range=header):
+                    response = self.anonymous_client.get(url, HTTP_RANGE=header)
+                    self.assertEqual(response.status_code, status)
+                    self.assertEqual(b''.join(response.streaming_content), content)
+                    self.assertEqual(response['Content-Length'], str(len(content)))
+                    self.assertEqual(response.get('Content-Range'), content_range)
+            response = self.anonymous_client.get(url, HTTP_RANGE='bytes=10-')
+            self.assertEqual(response.status_code, 416)
+            self.assertEqual(response['Content-Range'], 'bytes */10')
+            # A resumed download of a file changed since is sent whole
+            self.assertEqual(self.anonymous_client.get(url, HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE=etag).status_code, 206)
+            self.assertEqual(self.anonymous_client.get(url, HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE='"stale"').status_code, 200)
+            self.assertEqual(self.anonymous_client.get(url, HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE='W/' + etag).status_code, 200)
+
+            # Attachments of private courses are only sent to their members
+            url = f'/api/question-attachments/{attachment.id}/'
+            self.assertIn(self.anonymous_client.get(url).status_code, (401, 403))
+            self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+            response = self.enrolled_user_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content), b'answer')
+
+            with override_settings(DOWNLOAD_RESPONDER='core.downloads.NginxResponder'):
+                response = self.enrolled_user_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{attachment.file.name}')
+                self.assertEqual(response['Content-Disposition'], 'attachment; filename="answer.pdf"')
+            with override_settings(DOWNLOAD_RESPONDER='core.downloads.ApacheResponder'):
+                response = self.enrolled_user_client.get(url)
+                self.assertEqual(response['X-Sendfile'], attachment.file.path)
+
+    def test_course_outline(self):
+        url = f'/api/courses/{self.course_public.id}/outline/'
+        response = self.anonymous_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['topics'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Topic.objects.create(course=self.course_public, title='Second', description='Second', order=2)
+            Topic.objects.create(course=self.course_public, title='First', description='First', order=1)
+            forum = Forum.objects.create(course=self.course_public, title='Forum', description='Forum')
+            forum.questions.create(title='Question', description='Question')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.anonymous_client.get(url)
+        self.assertEqual(len(context.captured_queries), 1)
+        outline = response.json()
+        self.assertEqual([topic['title'] for topic in outline['topics']], ['First', 'Second'])
+        self.assertEqual(outline['forums'][0]['question_count'], 1)
+
+    def test_course_outline_rebuilt_once_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            forum = Forum.objects.create(course=self.course_public, title='Forum', description='Forum')
+        queries = []
+        for count in (1, 20):
+            with self.captureOnCommitCallbacks() as callbacks:
+                for i in range(count):
+                    forum.questions.create(title=f'Question {i}', description='Question')
+            with CaptureQueriesContext(connection) as context:
+                for callback in callbacks:
+                    callback()
+            queries.append(len(context.captured_queries))
+        # The forum lookup and a single rebuild of the forums section, however many questions were created
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(CourseOutline.objects.get(course=self.course_public).document['forums'][0]['question_count'], 21)
+
+        # The questions are deleted in cascade without loading them one by one
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as context:
+                forum.delete()
+        self.assertLess(len(context.captured_queries), 10)
+        self.assertEqual(CourseOutline.objects.get(course=self.course_public).document['forums'], [])
+
+    def test_topic_item_course_admin(self):
+        topic = Topic.objects.create(course=self.course, title='Topic', description='Topic')
+        item = TopicItem.objects.create(topic=topic, file='topic_items/notes.pdf', created_by=self.enrolled_user)
+        url = f'/api/topic-items/{item.id}/'
+        self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.course_admin_token)
+
+        response = self.course_admin_client.patch(url, {'topic': topic.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.course_admin_client.delete(url).status_code, 204)
+        self.assertFalse(TopicItem.objects.filter(pk=item.pk).exists())
+
+    def test_course_outline_child_deleted(self):
+        CourseAdmin.objects.create(user=self.course_admin_user, course=self.course_public, is_admin=True)
+        topic = Topic.objects.create(course=self.course_public, title='Topic', description='Topic')
+        forum = Forum.objects.create(course=self.course_public, title='Forum', description='Forum')
+        with self.captureOnCommitCallbacks(execute=True):
+            item = TopicItem.objects.create(topic=topic, file='topic_items/notes.pdf')
+            question = forum.questions.create(title='Question', description='Question')
+        self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.course_admin_token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.course_admin_client.delete(f'/api/topic-items/{item.id}/').status_code, 204)
+            self.assertEqual(self.course_admin_client.delete(f'/api/questions/{question.id}/').status_code, 204)
+        document = CourseOutline.objects.get(course=self.course_public).document
+        self.assertEqual(document['topics'][0]['items'], [])
+        self.assertEqual(document['forums'][0]['question_count'], 0)
+
+    def test_course_outline_private(self):
+        url = f'/api/courses/{self.course.id}/outline/'
+        self.assertEqual(self.anonymous_client.get(url).status_code, 403)
+        self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+        self.assertEqual(self.enrolled_user_client.get(url).status_code, 200)
+        self.assertEqual(self.anonymous_client.get('/api/courses/0/outline/').status_code, 404)
+
+    def test_decide_enrollment_requests(self):
+        requesters = [
+            User.objects.create_user(username=f'cohort{i}', password='cohortpass', email=f'cohort{i}@example.com')
+            for i in range(3)
+        ]
+        requests = [EnrollmentRequest.objects.create(user=user, course=self.course) for user in requesters]
+        other_course_request = EnrollmentRequest.objects.create(user=requesters[0], course=self.course_public)
+        course_updated_at = Course.objects.get(pk=self.course.pk).updated_at
+        self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.course_admin_token)
+
+        url = f'/api/courses/{self.course.id}/enrollment-requests/decide/'
+        with CaptureQueriesContext(connection) as context:
+            response = self.course_admin_client.post(url, {
+                'ids': [requests[0].id, requests[1].id, other_course_request.id], 'decision': 'approved'
+            })
+        self.assertEqual(response.status_code, 200)
+        # The enrolled count is increased, not recounted while the course row is locked
+        course_updates = [q['sql'] for q in context.captured_queries if q['sql'].startswith('UPDATE "course_course"')]
+        self.assertEqual(len(course_updates), 1)
+        self.assertNotIn('COUNT(', course_updates[0])
+        self.assertEqual(sorted(response.json()['updated']), [requests[0].id, requests[1].id])
+        self.assertEqual(EnrollmentRequest.objects.get(pk=other_course_request.pk).status, 'pending')
+        self.assertEqual(EnrollmentRequest.objects.get(pk=requests[2].pk).status, 'pending')
+        course = Course.objects.get(pk=self.course.pk)
+        self.assertEqual(course.enrolled_count, 3)
+        self.assertEqual(course.updated_at, course_updated_at)
+        self.assertEqual(set(course.enrolled_users.all()), {self.enrolled_user, requesters[0], requesters[1]})
+
+        # Deciding again is a no-op
+        response = self.course_admin_client.post(url, {'ids': [requests[0].id], 'decision': 'approved'})
+        self.assertEqual(response.json()['updated'], [])
+        self.assertEqual(Course.objects.get(pk=self.course.pk).enrolled_count, 3)
+
+    def test_decide_enrollment_requests_forbidden(self):
+        self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+        response = self.enrolled_user_client.post(
+            f'/api/courses/{self.course.id}/enrollment-requests/decide/', {'ids': [1], 'decision': 'approved'}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_import_course_enrollments(self):
+        roster = User.objects.create_user(username='rosteruser', password='rosterpass', email='roster@example.com')
+        csv_file = SimpleUploadedFile('roster.csv', (
+            'username\n'
+            'rosteruser\n'
+            f'{self.admin_user.email}\n'
+            'unknownuser\n'
+            '\n'
+            f'{self.enrolled_user.username}\n'
+        ).encode(), content_type='text/csv')
+        self.course_admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.course_admin_token)
+
+        response = self.course_admin_client.post(
+            f'/api/courses/{self.course.id}/enrollments/import/', {'file': csv_file}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual(report['rows'], 4)
+        # The enrolled user already was
+        self.assertEqual(report['enrolled'], 2)
+        self.assertEqual(report['errors'], [{'row': 4, 'value': 'unknownuser', 'error': 'User not found.'}])
+        course = Course.objects.get(pk=self.course.pk)
+        self.assertEqual(set(course.enrolled_users.all()), {self.enrolled_user, self.admin_user, roster})
+        self.assertEqual(course.enrolled_count, 3)
+
+    def test_import_course_enrollments_forbidden(self):
+        self.enrolled_user_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.enrolled_user_token)
+        csv_file = SimpleUploadedFile('roster.csv', b'rosteruser\n', content_type='text/csv')
+        response = self.enrolled_user_client.post(
+            f'/api/courses/{self.course.id}/enrollments/import/', {'file': csv_file}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 403)
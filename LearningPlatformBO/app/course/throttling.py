@@ -0,0 +1,6 @@
+from core.throttling import TokenBucketThrottle
+
+
+class EnrollmentRequestThrottle(TokenBucketThrottle):
+    """Throttle enrollment requests per user, see `core.throttling`."""
+    scope = 'enrollment_request'
@@ -1,5 +1,5 @@
 from django.urls import path, include
-from .views import CourseViewSet, CourseAdminViewSet, create_enrollment_request, update_enrollment_request, ListEnrollmentRequestsView, EnrolledCoursesView,ListCourseEnrollmentRequestsView
+from .views import CourseViewSet, CourseAdminViewSet, create_enrollment_request, update_enrollment_request, decide_enrollment_requests, import_course_enrollments, clone_course_view, course_archive, course_enrollment_stats, search, ListEnrollmentRequestsView, EnrolledCoursesView,ListCourseEnrollmentRequestsView, CourseMembersView, CourseOutlineView, CourseDeletionView
 from core.utilities.types import URLPatternsList
 
 urlpatterns: URLPatternsList = [
@@ -28,4 +28,13 @@ urlpatterns: URLPatternsList = [
     path('enrollment-requests/<int:pk>/', update_enrollment_request, name='update-enrollment-request'),
     path('enrolled-courses/', EnrolledCoursesView.as_view(), name='enrolled-courses'),
     path('courses/<int:course_id>/enrollment-requests/', ListCourseEnrollmentRequestsView.as_view(), name='course-enrollment-requests'),
+    path('courses/<int:course_id>/enrollment-requests/decide/', decide_enrollment_requests, name='decide-enrollment-requests'),
+    path('courses/<int:course_id>/clone/', clone_course_view, name='clone-course'),
+    path('courses/<int:course_id>/archive/', course_archive, name='course-archive'),
+    path('courses/<int:course_id>/enrollments/import/', import_course_enrollments, name='import-course-enrollments'),
+    path('courses/<int:course_id>/members/', CourseMembersView.as_view(), name='course-members'),
+    path('courses/<int:course_id>/outline/', CourseOutlineView.as_view(), name='course-outline'),
+    path('courses/<int:course_id>/stats/', course_enrollment_stats, name='course-enrollment-stats'),
+    path('search/', search, name='search'),
+    path('course-deletions/<int:pk>/', CourseDeletionView.as_view(), name='course-deletion-detail'),
 ]
\ No newline at end of file
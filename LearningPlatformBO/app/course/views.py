@@ -1,19 +1,60 @@
 from rest_framework import generics, viewsets, permissions, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.exceptions import PermissionDenied
-from .models import Course, CourseAdmin, EnrollmentRequest
-from .serializers import CourseSerializer, CourseAdminSerializer, EnrollmentRequestSerializer, AdminEnrollmentRequestSerializer, CourseAdminEnrollmentRequestSerializer, EnrolledCoursesSerializer, AdminCoursesSerializer,EnrollmentRequestSerializerForEnrollment
-from .permissions import IsCourseAdmin, CanCreateEnrollmentRequest
-from django.db.models import Q
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from .models import Course, CourseAdmin, CourseDeletion, CourseEnrollmentDailyStats, CourseEnrollmentStats, CourseOutline, EnrollmentRequest
+from .serializers import CourseSerializer, CourseAdminSerializer, EnrollmentRequestSerializer, AdminEnrollmentRequestSerializer, EnrolledCoursesSerializer, AdminCoursesSerializer,EnrollmentRequestSerializerForEnrollment, CourseMemberSerializer, CourseOutlineSerializer, EnrollmentDecisionSerializer, CourseCloneSerializer, CourseDeletionSerializer, CourseEnrollmentStatsSerializer, CourseEnrollmentDailyStatsSerializer
+from .permissions import IsCourseAdmin
+from .membership import CourseMembership
+from .archive import course_archive_entries, stream_course_archive
+from .cloning import clone_course
+from .deletion import schedule_course_deletion
+from .outline import rebuild_outline
+from .search import SEARCH_TYPES, search_content
+from .enrollment import enroll_users, import_enrollments, request_enrollment
+from .stats import record_status_changes
+from .throttling import EnrollmentRequestThrottle
+from core.extensions.views import ConditionalRetrieveMixin
+from core.pagination import CreatedAtKeysetPagination, KeysetPagination
+from core.utilities.queries import aggregate_subquery
+from topic.models import Forum, Topic
+from django.db.models import Count, Max, OuterRef, Q
+from datetime import timedelta
+from hashlib import md5
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import csv
 import logging
 
 # Set up logging
 logger = logging.getLogger(__name__)
-class CourseViewSet(viewsets.ModelViewSet):
+
+def prefetch_course_relations(queryset):
+    """Prefetch everything `CourseSerializer` renders, so a page of courses costs a fixed number of queries."""
+    return queryset.prefetch_related('topics', 'forums')
+
+
+def annotate_course_validators(queryset):
+    """
+    Annotate the latest change and the size of each relation `CourseSerializer` renders, so the validators of a
+    conditional GET come with the course row itself.
+    """
+    return queryset.annotate(
+        topics_updated_at=aggregate_subquery(Topic.objects.filter(course=OuterRef('pk')), 'course', Max('updated_at')),
+        topics_count=aggregate_subquery(Topic.objects.filter(course=OuterRef('pk')), 'course', Count('id')),
+        forums_updated_at=aggregate_subquery(Forum.objects.filter(course=OuterRef('pk')), 'course', Max('updated_at')),
+        forums_count=aggregate_subquery(Forum.objects.filter(course=OuterRef('pk')), 'course', Count('id')),
+    )
+
+
+class CourseViewSet(ConditionalRetrieveMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    retrieve_prefetch = ('topics', 'forums')
 
     def get_permissions(self):
         if self.action == 'list' or self.action == 'retrieve':
@@ -27,12 +68,25 @@ class CourseViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if self.action == 'list':
+            queryset = prefetch_course_relations(Course.objects.order_by('id'))
             if user.is_authenticated:
-                return Course.objects.filter().distinct()
+                return queryset
             else:
-                return Course.objects.filter(visibility='public').distinct()
+                return queryset.filter(visibility='public')
+        if self.action == 'retrieve':
+            # The relations are only prefetched if the client's copy is stale, see `conditional_retrieve`
+            return annotate_course_validators(Course.objects.all())
         return Course.objects.all()
 
+    def get_validators(self, course):
+        is_admin = CourseMembership.for_request(self.request).is_admin(course)
+        parts = (
+            course.pk, course.updated_at, course.enrolled_count, is_admin,
+            course.topics_updated_at, course.topics_count, course.forums_updated_at, course.forums_count,
+        )
+        # No `Last-Modified`: deleting a topic or forum doesn't move any timestamp forward, only the counts in the etag
+        return md5(repr(parts).encode()).hexdigest(), None
+
     def retrieve(self, request, *args, **kwargs):
         course = self.get_object()
         user = request.user
@@ -43,15 +97,29 @@ class CourseViewSet(viewsets.ModelViewSet):
             logger.info(f"Anonymous user retrieved course {course.title} (ID: {course.id})")
 
         if course.visibility == 'public':
-            return super().retrieve(request, *args, **kwargs)
+            return self.conditional_retrieve(request, course)
         else:
             if not user.is_authenticated:
                 logger.warning(f"Anonymous user denied access to course {course.title} (ID: {course.id})")
                 raise PermissionDenied("You must be authenticated to access this course.")
-            if not (user in course.enrolled_users.all() or CourseAdmin.objects.filter(user=user, course=course).exists()):
+            if not CourseMembership.for_request(request).can_access(course):
                 logger.warning(f"User {user.username} (ID: {user.id}) denied access to course {course.title} (ID: {course.id})")
                 raise PermissionDenied("You do not have permission to access this course.")
-            return super().retrieve(request, *args, **kwargs)
+            return self.conditional_retrieve(request, course)
+
+    def destroy(self, request, *args, **kwargs):
+        """
+        With `?mode=background` the course is hidden at once and its content deleted in batches by a worker (see
+        `course/deletion.py`); the response points to the deletion's status. Otherwise it's deleted right away.
+        """
+        if request.query_params.get('mode') != 'background':
+            return super().destroy(request, *args, **kwargs)
+        course = self.get_object()
+        deletion = schedule_course_deletion(course, request.user)
+        logger.info(f"User {request.user.username} scheduled the deletion of course {course.title} (ID: {course.id})")
+        data = CourseDeletionSerializer(deletion).data
+        data['status_url'] = request.build_absolute_uri(reverse('course-deletion-detail', args=[deletion.pk]))
+        return Response(data, status=status.HTTP_202_ACCEPTED)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -72,34 +140,25 @@ class CourseAdminViewSet(viewsets.ModelViewSet):
 
 ## We make it like this with an @api_view so that we only implement one type of request tt 
 @api_view(['POST'])
-@permission_classes([permissions.IsAuthenticated, CanCreateEnrollmentRequest])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([EnrollmentRequestThrottle])
 def create_enrollment_request(request):
-    user = request.user
-    course_id = request.data.get('course')
-
-       # Check if the course exists
-    course_exists_response = check_course_exists(course_id)
-    if course_exists_response:
-        return course_exists_response
-
-    # Check for an existing enrollment request
-    enrollment_exists_response = check_enrollment_request_exists(user, course_id)
-    if enrollment_exists_response:
-        return enrollment_exists_response
-
-    # Proceed to create the enrollment request
-    enrollment_request_data = {
-        'user': user.id,
-        'course': course_id,
-        'status': 'pending'  # Default status
-    }
-    serializer = EnrollmentRequestSerializer(data=enrollment_request_data, context={'request': request})
-    if serializer.is_valid():
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
-    else:
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
+    """
+    Request enrollment in a course. The request is created with a single `INSERT ... ON CONFLICT DO NOTHING`, which
+    also tells a missing course (404) from an existing request (409) without any prior lookups.
+    """
+    try:
+        course_id = int(request.data.get('course'))
+    except (TypeError, ValueError):
+        return Response({'course': ['A valid integer is required.']}, status=status.HTTP_400_BAD_REQUEST)
+
+    enrollment_request, course_exists = request_enrollment(request.user.pk, course_id)
+    if enrollment_request is None:
+        if not course_exists:
+            return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'error': 'Enrollment request already exists for this course'}, status=status.HTTP_409_CONFLICT)
+    return Response(EnrollmentRequestSerializer(enrollment_request).data, status=status.HTTP_201_CREATED)
+
 
 @api_view(['PATCH'])
 @permission_classes([IsCourseAdmin, permissions.IsAdminUser])
@@ -107,81 +166,228 @@ def update_enrollment_request(request, pk):
     logger.info(f"Received request to update enrollment request with ID: {pk}")
     logger.info(f"Request data: {request.data}")
 
-    enrollment_request = get_object_or_404(EnrollmentRequest, pk=pk)
-
     # Only allow updates to certain fields, here assuming 'status'
     if 'status' in request.data:
-        serializer = EnrollmentRequestSerializer(enrollment_request, data=request.data, partial=True)
-        if serializer.is_valid():
+        # Lock the request so the stats see every transition exactly once (see `course/signals.py`)
+        with transaction.atomic():
+            enrollment_request = get_object_or_404(EnrollmentRequest.objects.select_for_update(), pk=pk)
+            serializer = EnrollmentRequestSerializer(enrollment_request, data=request.data, partial=True)
+            if not serializer.is_valid():
+                logger.error(f"Serializer errors: {serializer.errors}")
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             serializer.save()
             if serializer.validated_data.get('status') == 'approved':
                 add_user_to_course(enrollment_request.user, enrollment_request.course)
-            updated_data = serializer.data
-            updated_data['updated_at'] = enrollment_request.updated_at.strftime('%Y-%m-%dT%H:%M:%S.%fZ')  # Add updated_at to response
-            return Response(updated_data, status=status.HTTP_200_OK)
-        else:
-            logger.error(f"Serializer errors: {serializer.errors}")
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        updated_data = serializer.data
+        updated_data['updated_at'] = enrollment_request.updated_at.strftime('%Y-%m-%dT%H:%M:%S.%fZ')  # Add updated_at to response
+        return Response(updated_data, status=status.HTTP_200_OK)
     
     logger.error("Status field not in request data")
     return Response({'error': 'Bad request'}, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def decide_enrollment_requests(request, course_id):
+    """
+    Approve or deny many enrollment requests of a course at once. The statuses are changed with a single `UPDATE`
+    and approved users are bulk-enrolled; the course row is never saved.
+    """
+    if not (request.user.is_staff or CourseMembership.for_request(request).is_admin(course_id)):
+        raise PermissionDenied("You do not have permission to decide enrollment requests of this course.")
+    # Courses being deleted in the background are hidden from `Course.objects`
+    get_object_or_404(Course.objects.only('id'), pk=course_id)
+    serializer = EnrollmentDecisionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    decision = serializer.validated_data['decision']
+
+    with transaction.atomic():
+        to_decide = EnrollmentRequest.objects.filter(course_id=course_id, id__in=serializer.validated_data['ids']).exclude(status=decision)
+        # Lock the affected requests so concurrent decisions can't interleave between the select and the update
+        decided = list(to_decide.select_for_update().values_list('id', 'user_id', 'status'))
+        EnrollmentRequest.objects.filter(id__in=[pk for pk, _, _ in decided]).update(status=decision, updated_at=timezone.now())
+        record_status_changes(course_id, [(old_status, decision) for _, _, old_status in decided])
+        if decision == 'approved':
+            enroll_users(course_id, [user_id for _, user_id, _ in decided])
+
+    logger.info(f"User {request.user.username} {decision} {len(decided)} enrollment request(s) of course {course_id}")
+    return Response({'decision': decision, 'updated': [pk for pk, _, _ in decided]}, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def clone_course_view(request, course_id):
+    """
+    Copy a course with its topics, topic items (sharing their files) and forum shells, making the caller its admin.
+    `title` defaults to the original's with a " (copy)" suffix and `visibility` to the original's. See `course/cloning.py`.
+    """
+    if not (request.user.is_staff or CourseMembership.for_request(request).is_admin(course_id)):
+        raise PermissionDenied("You do not have permission to clone this course.")
+    course = get_object_or_404(Course.objects.only('id', 'title', 'visibility'), pk=course_id)
+    serializer = CourseCloneSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    clone, copied = clone_course(course, request.user, **serializer.validated_data)
+    logger.info(f"User {request.user.username} cloned course {course_id} into course {clone.id}")
+    return Response({'id': clone.id, 'title': clone.title, 'visibility': clone.visibility, **copied}, status=status.HTTP_201_CREATED)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def course_archive(request, course_id):
+    """
+    Stream a ZIP of every topic item and question attachment of a course, built on the fly with constant memory (see
+    `course/archive.py`). For staff and the course's admins.
+    """
+    if not (request.user.is_staff or CourseMembership.for_request(request).is_admin(course_id)):
+        raise PermissionDenied("You do not have permission to export this course.")
+    get_object_or_404(Course.objects.only('id'), pk=course_id)
+    entries = course_archive_entries(course_id)
+
+    logger.info(f"User {request.user.username} exported {len(entries)} file(s) of course {course_id}")
+    response = StreamingHttpResponse(stream_course_archive(entries), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="course-{course_id}.zip"'
+    return response
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def import_course_enrollments(request, course_id):
+    """
+    Enroll the users of an uploaded CSV roster (usernames or emails, one per row) in a course. The file is streamed
+    and processed in chunks; the response reports, per row, the ones that couldn't be enrolled.
+    """
+    if not (request.user.is_staff or CourseMembership.for_request(request).is_admin(course_id)):
+        raise PermissionDenied("You do not have permission to enroll users in this course.")
+    get_object_or_404(Course.objects.only('id'), pk=course_id)
+    roster = request.FILES.get('file')
+    if roster is None:
+        return Response({'error': 'A CSV file is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        with transaction.atomic():
+            report = import_enrollments(course_id, roster)
+    except (UnicodeDecodeError, csv.Error) as e:
+        return Response({'error': f'Invalid CSV file: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    logger.info(f"User {request.user.username} imported {report.enrolled} enrollment(s) into course {course_id}")
+    return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def course_enrollment_stats(request, course_id):
+    """
+    Enrollment request counts of a course per status, plus daily buckets for the last `days` days (30 by default, at
+    most 365). Both are read from the incrementally maintained counters (see `course/stats.py`), never aggregated.
+    """
+    if not (request.user.is_staff or CourseMembership.for_request(request).is_admin(course_id)):
+        raise PermissionDenied("You do not have permission to view the statistics of this course.")
+    try:
+        days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+    except ValueError:
+        return Response({'days': ['A valid integer is required.']}, status=status.HTTP_400_BAD_REQUEST)
+
+    stats = CourseEnrollmentStats.objects.filter(course_id=course_id, course__is_hidden=False).first()
+    if stats is None:
+        # No request was ever made for this course, or it's missing or being deleted in the background
+        get_object_or_404(Course.objects.only('id'), pk=course_id)
+        stats = CourseEnrollmentStats(course_id=course_id)
+    since = timezone.localdate() - timedelta(days=days - 1)
+    daily = CourseEnrollmentDailyStats.objects.filter(course_id=course_id, day__gte=since).order_by('day')
+
+    data = CourseEnrollmentStatsSerializer(stats).data
+    data['daily'] = CourseEnrollmentDailyStatsSerializer(daily, many=True).data
+    return Response(data, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def search(request):
+    """
+    Full-text search across courses, topics and forum questions the user can see, best matches first. Takes the
+    query in `q`, optionally restricts the result types with `type` (comma separated: `course`, `topic`, `question`)
+    and returns at most `limit` results (20 by default, at most 50). See `course/search.py`.
+    """
+    text = request.query_params.get('q', '').strip()
+    if not text:
+        return Response({'q': ['This parameter is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    types = SEARCH_TYPES
+    if request.query_params.get('type'):
+        types = tuple(dict.fromkeys(request.query_params['type'].split(',')))
+        if not set(types) <= set(SEARCH_TYPES):
+            return Response({'type': [f'Valid types are: {", ".join(SEARCH_TYPES)}.']}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+    except ValueError:
+        return Response({'limit': ['A valid integer is required.']}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = search_content(text, CourseMembership.for_request(request), types=types, limit=limit)
+    return Response({'query': text, 'results': results}, status=status.HTTP_200_OK)
+
+class CourseDeletionView(generics.RetrieveAPIView):
+    """Progress of a background course deletion, for staff and the user who requested it."""
+    serializer_class = CourseDeletionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return CourseDeletion.objects.all()
+        return CourseDeletion.objects.filter(requested_by=self.request.user)
+
 def add_user_to_course(user, course):
     """Function to add a user to the enrolled users of a course."""
-    if user not in course.enrolled_users.all():
-        course.enrolled_users.add(user)
-        course.save()
-        logger.info(f"Added {user.username} to {course.title}")
-
-def check_course_exists(course_id):
-    """Check if the course with the given ID exists."""
-    if not Course.objects.filter(id=course_id).exists():
-        return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
-    return None
-
-def check_enrollment_request_exists(user, course_id):
-    """Check if there is an existing enrollment request for the given user and course."""
-    if EnrollmentRequest.objects.filter(user=user, course_id=course_id).exists():
-        return Response({'error': 'Enrollment request already exists for this course'}, status=status.HTTP_409_CONFLICT)
-    return None
-
+    # `add` skips existing enrollments by itself, and the course row doesn't need to be saved
+    course.enrolled_users.add(user)
+    logger.info(f"Added {user.username} to {course.title}")
 
 class ListEnrollmentRequestsView(generics.ListAPIView):
+    """
+    Enrollment review queue, oldest request first. Staff see every course, course admins only the courses they
+    administer. Filters: `status` (defaults to `pending`, `all` disables it), `course_id`, and `created_after` /
+    `created_before` (ISO 8601 datetimes).
+    """
+    serializer_class = AdminEnrollmentRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtKeysetPagination
+    status_choices = {choice for choice, _ in EnrollmentRequest.STATUS_CHOICES}
 
     def get_queryset(self):
-        """
-        Adjust the queryset based on the user's role.
-        """
-        user = self.request.user
-        if user.is_superuser:
-            return EnrollmentRequest.objects.filter(status='pending')
-        elif IsCourseAdmin().has_permission(self.request, self):
-            # Assuming you have a method to check if the user is a course admin
-            course_id = self.request.query_params.get('course_id')
-            if not course_id:
-                return EnrollmentRequest.objects.none()  # or handle error
-            return EnrollmentRequest.objects.filter(course__id=course_id)
-        else:
-            return EnrollmentRequest.objects.none()
+        params = self.request.query_params
+        queryset = EnrollmentRequest.objects.select_related('course', 'user').only(
+            'id', 'course', 'user', 'status', 'created_at', 'updated_at', 'course__title', 'user__username', 'user__email'
+        )
 
-    def get_serializer_class(self):
-        """
-        Choose the serializer class based on user permissions.
-        """
-        user = self.request.user
-        if user.is_superuser:
-            return AdminEnrollmentRequestSerializer
-        elif IsCourseAdmin().has_permission(self.request, self):
-            return CourseAdminEnrollmentRequestSerializer
-        else:
-            raise permissions.PermissionDenied("You do not have permission to view this.")
+        if not self.request.user.is_staff:
+            admin_course_ids = CourseMembership.for_request(self.request).admin_course_ids
+            if not admin_course_ids:
+                raise PermissionDenied("You do not have permission to view this.")
+            queryset = queryset.filter(course_id__in=admin_course_ids)
+
+        course_id = params.get('course_id')
+        if course_id:
+            try:
+                course_id = int(course_id)
+            except ValueError:
+                raise ValidationError({'course_id': 'A valid integer is required.'})
+            if not self.request.user.is_staff and not CourseMembership.for_request(self.request).is_admin(course_id):
+                raise PermissionDenied("You do not have permission to view this.")
+            queryset = queryset.filter(course_id=course_id)
+
+        status_filter = params.get('status', 'pending')
+        if status_filter != 'all':
+            if status_filter not in self.status_choices:
+                raise ValidationError({'status': f'"{status_filter}" is not a valid choice.'})
+            queryset = queryset.filter(status=status_filter)
+
+        for param, lookup in (('created_after', 'created_at__gte'), ('created_before', 'created_at__lt')):
+            value = params.get(param)
+            if value:
+                try:
+                    created_at = parse_datetime(value)
+                except ValueError:
+                    created_at = None
+                if created_at is None:
+                    raise ValidationError({param: 'A valid ISO 8601 datetime is required.'})
+                if timezone.is_naive(created_at):
+                    created_at = timezone.make_aware(created_at)
+                queryset = queryset.filter(**{lookup: created_at})
+        return queryset
 
-    def list(self, request, *args, **kwargs):
-        if not self.get_queryset():
-            return Response({"error": "No data available or you do not have permission to view this."}, status=status.HTTP_403_FORBIDDEN)
-        return super().list(request, *args, **kwargs)
-    
 class AdminCoursesView(generics.ListAPIView):
     serializer_class = AdminCoursesSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -214,17 +420,67 @@ class EnrolledCoursesView(generics.ListAPIView):
     def get_queryset(self):
         user = self.request.user
         if user.is_authenticated:
-            return Course.objects.filter(
+            queryset = Course.objects.filter(
                 Q(enrolled_users=user) | Q(courseadmin__user=user)
             ).distinct()
         else:
-            return Course.objects.filter(visibility='public')
+            queryset = Course.objects.filter(visibility='public')
+        return prefetch_course_relations(queryset.order_by('id'))
     
 class ListCourseEnrollmentRequestsView(generics.ListAPIView):
     serializer_class = EnrollmentRequestSerializerForEnrollment  # Use the appropriate serializer
     permission_classes = [ IsCourseAdmin, permissions.IsAdminUser]
+    pagination_class = CreatedAtKeysetPagination
 
     def get_queryset(self):
         course_id = self.kwargs['course_id']
-        return EnrollmentRequest.objects.filter(course_id=course_id)
-    
+        return EnrollmentRequest.objects.filter(course_id=course_id).select_related('user')
+
+
+class CourseMemberPagination(KeysetPagination):
+    page_size = 100
+    max_page_size = 1000
+
+class CourseMembersView(generics.ListAPIView):
+    """
+    Lists the users enrolled in a course, straight from the enrollment through table, with keyset pagination.
+    Only the course's admins, its enrolled users and staff can see it.
+    """
+    serializer_class = CourseMemberSerializer
+    pagination_class = CourseMemberPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        course_id = self.kwargs['course_id']
+        membership = CourseMembership.for_request(self.request)
+        if not (self.request.user.is_staff or membership.is_admin(course_id) or membership.is_enrolled(course_id)):
+            raise PermissionDenied("You do not have permission to view the members of this course.")
+        # Plain rows instead of model instances; the pagination orders them by the through table's primary key
+        return Course.enrolled_users.through.objects.filter(course_id=course_id).values('id', 'user_id', 'user__username')
+
+
+class CourseOutlineView(ConditionalRetrieveMixin, generics.RetrieveAPIView):
+    """
+    Returns the materialized outline of a course (see `course/outline.py`) with a single primary-key read; private
+    courses additionally check the requester's membership.
+    """
+    serializer_class = CourseOutlineSerializer
+    permission_classes = [permissions.AllowAny]
+    queryset = CourseOutline.objects.all()
+    lookup_url_kwarg = 'course_id'
+    lookup_field = 'course_id'
+
+    def get_object(self):
+        course_id = self.kwargs['course_id']
+        # Courses created before the outline existed get theirs built on their first read
+        outline = CourseOutline.objects.filter(course_id=course_id).first() or rebuild_outline(course_id)
+        if outline is None:
+            raise NotFound("Course not found.")
+        course = outline.document['course']
+        membership = CourseMembership.for_request(self.request)
+        if course['visibility'] != 'public' and not (membership.is_admin(course['id']) or membership.is_enrolled(course['id'])):
+            raise PermissionDenied("You do not have permission to access this course.")
+        return outline
+
+    def get_validators(self, outline):
+        return f"outline:{outline.course_id}:{outline.updated_at.timestamp()}", outline.updated_at
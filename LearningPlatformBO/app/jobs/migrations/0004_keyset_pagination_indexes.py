@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_alter_jobsmodel_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobsmodel',
+            index=models.Index(fields=['is_visible', 'created_at', 'id'], name='jobs_visible_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.4 on 2026-10-18 18:32
+
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='jobsmodel',
+            options={'default_manager_name': 'all_objects', 'ordering': ['created_at'], 'verbose_name_plural': 'Job Details'},
+        ),
+        migrations.AlterModelManagers(
+            name='jobsmodel',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='jobsmodel',
+            name='jobs_visible_created_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='jobsmodel',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_visible', True)), fields=['created_at', 'id'], name='jobs_live_visible_created_idx'),
+        ),
+    ]
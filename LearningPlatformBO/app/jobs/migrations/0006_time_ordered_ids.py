@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-18 18:33
+
+import core.extensions.models.base_abstract_model
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_soft_delete_managers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobsmodel',
+            name='id',
+            field=models.UUIDField(default=core.extensions.models.base_abstract_model.generate_id, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
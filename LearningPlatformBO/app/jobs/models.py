@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from core.extensions.models.base_abstract_model import BaseAbstractModel 
 
 #The BaseAbstractModel brings a uuid, created_at, updated_at and deleted_at
@@ -12,9 +13,17 @@ class JobsModel(BaseAbstractModel):
 
     auto_translate_fields = ("title","description")
 
-    class Meta:
+    class Meta(BaseAbstractModel.Meta):
         verbose_name_plural = "Job Details"
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination of the visible jobs list (see `core.pagination.CreatedAtKeysetPagination`)
+            models.Index(
+                fields=['created_at', 'id'],
+                name='jobs_live_visible_created_idx',
+                condition=Q(is_visible=True, is_deleted=False),
+            ),
+        ]
 
     # This is used by the admin
     def __str__(self):
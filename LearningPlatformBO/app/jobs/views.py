@@ -1,10 +1,10 @@
 from drf_spectacular.utils import extend_schema
-from rest_framework.pagination import PageNumberPagination
 from rest_framework import generics
+from core.pagination import CreatedAtKeysetPagination
 from jobs import serializers, models
 
 
-class StandardResultsSetPagination(PageNumberPagination):
+class StandardResultsSetPagination(CreatedAtKeysetPagination):
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 100
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-18 17:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topic', '0004_forum_order_topic_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['created_at', 'id'], name='question_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-18 18:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topic', '0006_search_vectors'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['forum', 'created_at', 'id'], name='question_forum_created_id_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from core.extensions.models.base_abstract_model import BaseAbstractModel
+from core.utilities.search import SearchableManager, search_vector_field
 
 class Topic(models.Model):
     course = models.ForeignKey('course.Course', on_delete=models.CASCADE, related_name='topics')
@@ -11,6 +13,15 @@ class Topic(models.Model):
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='created_topics', on_delete=models.SET_NULL, null=True, blank=True)
     updated_by = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='updated_topics', on_delete=models.SET_NULL, null=True, blank=True)
     order = models.PositiveIntegerField(default=0)
+    # Generated column, recomputed by the database on every write (see `core.utilities.search`)
+    search_vector = search_vector_field(title='A', description='B')
+
+    objects = SearchableManager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='topic_search_vector_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -46,6 +57,19 @@ class Question(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='created_questions', on_delete=models.SET_NULL, null=True, blank=True)
     updated_by = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='updated_questions', on_delete=models.SET_NULL, null=True, blank=True)
+    # Generated column, recomputed by the database on every write (see `core.utilities.search`)
+    search_vector = search_vector_field(title='A', description='B')
+
+    objects = SearchableManager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the question list (see `core.pagination.CreatedAtKeysetPagination`)
+            models.Index(fields=['created_at', 'id'], name='question_created_id_idx'),
+            # Keyset pagination of a forum's questions (see `ForumViewSet.questions`)
+            models.Index(fields=['forum', 'created_at', 'id'], name='question_forum_created_id_idx'),
+            GinIndex(fields=['search_vector'], name='question_search_vector_idx'),
+        ]
 
     def __str__(self):
         return self.title
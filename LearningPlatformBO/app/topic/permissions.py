@@ -1,13 +1,14 @@
 from rest_framework import permissions
-from course.models import CourseAdmin
+from course.membership import CourseMembership
+from topic.models import TopicItem
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         # Check if the user is the owner
-        if obj.created_by == request.user:
+        if obj.created_by_id is not None and obj.created_by_id == request.user.pk:
             return True
-        # Check if the user is a course admin
-        course = obj.course
-        if CourseAdmin.objects.filter(user=request.user, course=course).exists():
+        # Check if the user is a course admin (items belong to a course through their topic)
+        course_id = obj.topic.course_id if isinstance(obj, TopicItem) else obj.course_id
+        if CourseMembership.for_request(request).is_admin(course_id):
             return True
-        return False
\ No newline at end of file
+        return False
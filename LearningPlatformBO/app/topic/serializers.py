@@ -17,6 +17,12 @@ class ForumSerializer(serializers.ModelSerializer):
         model = Forum
         fields = ['id', 'title', 'description']
 
+class ForumHeaderSerializer(serializers.ModelSerializer):
+    """The forum alone, without its questions (see `ForumViewSet.questions` for them)."""
+    class Meta:
+        model = Forum
+        fields = ['id', 'course', 'title', 'description', 'created_at', 'updated_at']
+
 class QuestionSerializer(serializers.ModelSerializer):
     attachments = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
 
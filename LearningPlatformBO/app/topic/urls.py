@@ -27,6 +27,9 @@ urlpatterns: URLPatternsList = [
         'patch': 'partial_update',
         'delete': 'destroy'
     }), name='topicitem-detail'),
+    path('topic-items/<int:pk>/download/', TopicItemViewSet.as_view({
+        'get': 'download'
+    }), name='topicitem-download'),
 
     path('forums/', ForumViewSet.as_view({
         'post': 'create'
@@ -37,6 +40,12 @@ urlpatterns: URLPatternsList = [
         'patch': 'partial_update',
         'delete': 'destroy'
     }), name='forum-detail'),
+    path('forums/<int:pk>/header/', ForumViewSet.as_view({
+        'get': 'header'
+    }), name='forum-header'),
+    path('forums/<int:pk>/questions/', ForumViewSet.as_view({
+        'get': 'questions'
+    }), name='forum-questions'),
 
     path('questions/', QuestionViewSet.as_view({
         'get': 'list',
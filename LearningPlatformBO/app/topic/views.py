@@ -1,27 +1,34 @@
 from rest_framework import viewsets, permissions,status
 from rest_framework.response import Response
-from django.http import FileResponse
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.parsers import MultiPartParser, FormParser
 
 from .models import Topic, TopicItem, Forum, Question, QuestionAttachment
-from .serializers import TopicSerializer, TopicItemSerializer, ForumSerializer, QuestionSerializer, QuestionAttachmentSerializer, ForumDetailSerializer
+from .serializers import TopicSerializer, TopicItemSerializer, ForumSerializer, ForumHeaderSerializer, QuestionSerializer, QuestionDetailSerializer, QuestionAttachmentSerializer, ForumDetailSerializer
 from .permissions import IsOwnerOrReadOnly
-from course.models import CourseAdmin
+from course.membership import CourseMembership
+from course.outline import schedule_rebuild
+from core.downloads import download_response
+from core.extensions.views import ConditionalRetrieveMixin
+from core.pagination import CreatedAtKeysetPagination
+from core.utilities.queries import aggregate_subquery
 from django.db import transaction
+from django.db.models import Count, Max, OuterRef
+from hashlib import md5
 
 class IsCourseAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
-        course = obj.course
-        return CourseAdmin.objects.filter(user=request.user, course=course).exists()
+        return CourseMembership.for_request(request).is_admin(obj.course_id)
 
 class IsEnrolledOrCourseAdminOrPublic(permissions.BasePermission):
+    """Allow access to the objects of public courses, or of the user's courses. Views implement `get_object_course`."""
     def has_object_permission(self, request, view, obj):
+        course = view.get_object_course(obj)
         # Check if the related course is public
-        if obj.question.forum.course.visibility == 'public':
+        if course.visibility == 'public':
             return True
         
         # If the course is private, check if the user is authenticated
@@ -29,15 +36,17 @@ class IsEnrolledOrCourseAdminOrPublic(permissions.BasePermission):
             return False
 
         # Check if the user is enrolled, a course admin, or a superuser
-        course = obj.question.forum.course
-        return (course.enrolled_users.filter(id=request.user.id).exists() or
-                CourseAdmin.objects.filter(user=request.user, course=course).exists() or
-                request.user.is_superuser)
+        membership = CourseMembership.for_request(request)
+        return membership.is_enrolled(course) or membership.is_admin(course) or request.user.is_superuser
     
-class TopicViewSet(viewsets.ModelViewSet):
-    queryset = Topic.objects.all()
+class TopicViewSet(ConditionalRetrieveMixin, viewsets.ModelViewSet):
+    # Courses being deleted in the background are hidden along with their content
+    queryset = Topic.objects.filter(course__is_hidden=False)
     serializer_class = TopicSerializer
 
+    def get_validators(self, instance):
+        return md5(f"topic:{instance.pk}:{instance.updated_at.isoformat()}".encode()).hexdigest(), instance.updated_at
+
     def get_permissions(self):
         if self.action in ['update', 'partial_update', 'destroy', 'create']:
             return [IsCourseAdmin()]
@@ -45,7 +54,7 @@ class TopicViewSet(viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         course_id = request.data.get('course')
-        if not CourseAdmin.objects.filter(user=request.user, course_id=course_id).exists():
+        if not CourseMembership.for_request(request).is_admin(course_id):
             raise PermissionDenied("You do not have permission to create a topic in this course.")
         
         serializer = self.get_serializer(data=request.data)
@@ -56,47 +65,128 @@ class TopicViewSet(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         # Check if the user is a course admin
-        course = instance.course
-        if not CourseAdmin.objects.filter(user=request.user, course=course).exists():
+        if not CourseMembership.for_request(request).is_admin(instance.course_id):
             raise PermissionDenied("You do not have permission to edit this topic.")
         return super().update(request, *args, **kwargs)
 
     def partial_update(self, request, *args, **kwargs):
         instance = self.get_object()
         # Check if the user is a course admin
-        course = instance.course
-        if not CourseAdmin.objects.filter(user=request.user, course=course).exists():
+        if not CourseMembership.for_request(request).is_admin(instance.course_id):
             raise PermissionDenied("You do not have permission to edit this topic.")
         return super().partial_update(request, *args, **kwargs)
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        course = instance.course
-        if not CourseAdmin.objects.filter(user=request.user, course=course).exists():
+        if not CourseMembership.for_request(request).is_admin(instance.course_id):
             raise PermissionDenied("You do not have permission to delete this topic.")
         return super().destroy(request, *args, **kwargs)
 
 class TopicItemViewSet(viewsets.ModelViewSet):
-    queryset = TopicItem.objects.all()
+    queryset = TopicItem.objects.filter(topic__course__is_hidden=False)
     serializer_class = TopicItemSerializer
     permission_classes = [IsOwnerOrReadOnly]
 
-class ForumViewSet(viewsets.ModelViewSet):
-    queryset = Forum.objects.all()
+    def get_queryset(self):
+        if self.action == 'download':
+            return super().get_queryset().select_related('topic__course')
+        return super().get_queryset()
+
+    def get_permissions(self):
+        if self.action == 'download':
+            return [IsEnrolledOrCourseAdminOrPublic()]
+        return super().get_permissions()
+
+    def get_object_course(self, obj):
+        return obj.topic.course
+
+    def download(self, request, *args, **kwargs):
+        """The item's file, sent by the responder set in `DOWNLOAD_RESPONDER` (see `core.downloads`)."""
+        return download_response(request, self.get_object().file)
+
+    def perform_destroy(self, instance):
+        # Items have no delete receivers, so deleting a topic can remove them without loading them (see `course/signals.py`)
+        schedule_rebuild('topics', topic_id=instance.topic_id)
+        instance.delete()
+
+class ForumViewSet(ConditionalRetrieveMixin, viewsets.ModelViewSet):
+    """
+    `retrieve` returns the forum with all of its questions, so its cost grows with the forum. Clients showing a forum
+    should use `header` and the paginated `questions` instead, which cost the same whatever its size.
+    """
+    queryset = Forum.objects.filter(course__is_hidden=False)
     serializer_class = ForumSerializer
+    pagination_class = CreatedAtKeysetPagination
+
+    @property
+    def retrieve_prefetch(self):
+        return ('questions__attachments',) if self.action == 'retrieve' else ()
+
+    def get_queryset(self):
+        if self.action in ['header', 'questions']:
+            # The permission checks the forum's course
+            return super().get_queryset().select_related('course')
+        if self.action != 'retrieve':
+            return super().get_queryset()
+        # Annotate the validators of the whole forum so a conditional GET costs a single query
+        questions = Question.objects.filter(forum=OuterRef('pk'))
+        attachments = QuestionAttachment.objects.filter(question__forum=OuterRef('pk'))
+        return super().get_queryset().annotate(
+            questions_updated_at=aggregate_subquery(questions, 'forum', Max('updated_at')),
+            questions_count=aggregate_subquery(questions, 'forum', Count('id')),
+            attachments_uploaded_at=aggregate_subquery(attachments, 'question__forum', Max('uploaded_at')),
+            attachments_count=aggregate_subquery(attachments, 'question__forum', Count('id')),
+        )
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return ForumDetailSerializer
+        if self.action == 'header':
+            return ForumHeaderSerializer
+        if self.action == 'questions':
+            return QuestionDetailSerializer
+        return super().get_serializer_class()
+
+    def header(self, request, *args, **kwargs):
+        """The forum alone, without its questions."""
+        return self.conditional_retrieve(request, self.get_object())
+
+    def questions(self, request, *args, **kwargs):
+        """
+        The forum's questions with their attachments, paginated in creation order: one query for the page and one for
+        all of its attachments, served by the `(forum, created_at, id)` index.
+        """
+        forum = self.get_object()
+        page = self.paginate_queryset(forum.questions.prefetch_related('attachments'))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    def get_validators(self, instance):
+        if self.action == 'header':
+            return md5(f"forum:{instance.pk}:{instance.updated_at.isoformat()}".encode()).hexdigest(), instance.updated_at
+        parts = (
+            instance.pk, instance.updated_at, instance.questions_updated_at, instance.questions_count,
+            instance.attachments_uploaded_at, instance.attachments_count,
+        )
+        # No `Last-Modified`: deleting a question or attachment doesn't move any timestamp forward, only the counts
+        return md5(repr(parts).encode()).hexdigest(), None
 
     def get_permissions(self):
         if self.action in ['update', 'partial_update', 'destroy', 'create']:
             permission_classes = [IsCourseAdmin]
         elif self.action == 'retrieve':
             permission_classes = [permissions.AllowAny]
+        elif self.action in ['header', 'questions']:
+            permission_classes = [IsEnrolledOrCourseAdminOrPublic]
         else:
             permission_classes = [IsOwnerOrReadOnly]
         return [permission() for permission in permission_classes]
 
+    def get_object_course(self, obj):
+        return obj.course
+
     def create(self, request, *args, **kwargs):
         course_id = request.data.get('course')
-        if not CourseAdmin.objects.filter(user=request.user, course_id=course_id).exists():
+        if not CourseMembership.for_request(request).is_admin(course_id):
             raise PermissionDenied("You do not have permission to create a forum in this course.")
         
         serializer = self.get_serializer(data=request.data)
@@ -107,36 +197,29 @@ class ForumViewSet(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         # Check if the user is a course admin
-        course = instance.course
-        if not CourseAdmin.objects.filter(user=request.user, course=course).exists():
+        if not CourseMembership.for_request(request).is_admin(instance.course_id):
             raise PermissionDenied("You do not have permission to edit this forum.")
         return super().update(request, *args, **kwargs)
 
     def partial_update(self, request, *args, **kwargs):
         instance = self.get_object()
         # Check if the user is a course admin
-        course = instance.course
-        if not CourseAdmin.objects.filter(user=request.user, course=course).exists():
+        if not CourseMembership.for_request(request).is_admin(instance.course_id):
             raise PermissionDenied("You do not have permission to edit this forum.")
         return super().partial_update(request, *args, **kwargs)
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        course = instance.course
-        if not CourseAdmin.objects.filter(user=request.user, course=course).exists():
+        if not CourseMembership.for_request(request).is_admin(instance.course_id):
             raise PermissionDenied("You do not have permission to delete this forum.")
         return super().destroy(request, *args, **kwargs)
-    
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = ForumDetailSerializer(instance)
-        return Response(serializer.data)
 
 
 class QuestionViewSet(viewsets.ModelViewSet):
-    queryset = Question.objects.all()
+    queryset = Question.objects.filter(forum__course__is_hidden=False)
     serializer_class = QuestionSerializer
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = CreatedAtKeysetPagination
 
     def get_permissions(self):
         if self.action == 'create':
@@ -156,6 +239,11 @@ class QuestionViewSet(viewsets.ModelViewSet):
         user = self.request.user if self.request.user.is_authenticated else None
         serializer.save(created_by=user, updated_by=user)
 
+    def perform_destroy(self, instance):
+        # Questions have no delete receivers, so deleting a forum doesn't send a signal per question (see `course/signals.py`)
+        schedule_rebuild('forums', forum_id=instance.forum_id)
+        instance.delete()
+
     def create(self, request, *args, **kwargs):
         with transaction.atomic():
             serializer = self.get_serializer(data=request.data, context={'request': request})
@@ -178,7 +266,7 @@ class QuestionViewSet(viewsets.ModelViewSet):
 
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 class QuestionAttachmentViewSet(viewsets.ModelViewSet):
-    queryset = QuestionAttachment.objects.all()
+    queryset = QuestionAttachment.objects.filter(question__forum__course__is_hidden=False).select_related('question__forum__course')
     serializer_class = QuestionAttachmentSerializer
 
     def get_permissions(self):
@@ -186,9 +274,9 @@ class QuestionAttachmentViewSet(viewsets.ModelViewSet):
             return [IsEnrolledOrCourseAdminOrPublic()]
         return [permissions.IsAuthenticated()]
 
+    def get_object_course(self, obj):
+        return obj.question.forum.course
+
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        file_handle = instance.file.open()
-        response = FileResponse(file_handle, content_type='application/octet-stream')
-        response['Content-Disposition'] = f'attachment; filename="{instance.file.name.split("/")[-1]}"'
-        return response
+        """The attachment's file, sent by the responder set in `DOWNLOAD_RESPONDER` (see `core.downloads`)."""
+        return download_response(request, self.get_object().file)
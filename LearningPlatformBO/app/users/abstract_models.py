@@ -17,10 +17,13 @@ class BaseAbstractUser(PermissionsMixin, DjangoAbstractBaseUser, BaseAbstractMod
     added simultaneously too), and the following variables have to be defined:
     - `USERNAME_FIELD`: either "username" or "email".
     - `objects`: a UserManager capable of handling the concrete class.
+    - `all_objects`: the same UserManager, with `include_deleted=True` (Django's default manager, see
+      `BaseAbstractModel`).
     """
 
     USERNAME_FIELD: str = None  # type: ignore # Intentional to raise an error if not defined
     objects: BaseUserManager = None  # type: ignore # Intentional to raise an error if not defined
+    all_objects: BaseUserManager = None  # type: ignore # Intentional to raise an error if not defined
 
     class Meta(BaseAbstractModel.Meta):
         abstract = True
@@ -31,6 +34,11 @@ class BaseAbstractUser(PermissionsMixin, DjangoAbstractBaseUser, BaseAbstractMod
     is_active = models.BooleanField(
         default=True, help_text="Designates the user as active.", verbose_name="active status"
     )
+    permissions_version = models.PositiveIntegerField(
+        default=0,
+        help_text="Bumped whenever the user's permissions change, so tokens claiming older ones are not trusted.",
+        verbose_name="permissions version",
+    )
 
     # Fix the last_login help text
     last_login = models.DateTimeField(
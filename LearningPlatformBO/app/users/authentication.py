@@ -5,7 +5,6 @@ from rest_framework.permissions import IsAuthenticated as BaseIsAuthenticated
 from rest_framework.request import Request
 from rest_framework.views import APIView
 from users.models import User
-from django.db.models import Q
 
 
 class AuthenticationBackend(ModelBackend):
@@ -23,15 +22,15 @@ class AuthenticationBackend(ModelBackend):
             username = kwargs.get(User.USERNAME_FIELD)
         if username is None or password is None:
             return None
-        try:
-            user = User.objects.filter(Q(email=username) | Q(username=username)).get()
-        except User.DoesNotExist:
+        # Case-insensitive match on the email or the username, with a single index scan
+        user = User.objects.get_by_login(str(username).strip())
+        if user is None:
             # Run the default password hasher once to reduce the timing
             # difference between an existing and a nonexistent user (#20760), replicating the super method
             User().set_password(password)
-        else:
-            if user.check_password(password) and self.user_can_authenticate(user):
-                return user
+        # Rehashes the password if the hashing settings changed since it was set
+        elif user.check_password(password) and self.user_can_authenticate(user):
+            return user
         return None
 
 class AuthenticatedRequest(Request):
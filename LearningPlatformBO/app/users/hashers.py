@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher as DjangoPBKDF2PasswordHasher
+
+
+class PBKDF2PasswordHasher(DjangoPBKDF2PasswordHasher):
+    """
+    Django's PBKDF2-SHA256 hasher with its iterations set by `AUTH_PASSWORD_ITERATIONS` (Django's default if `0`).
+
+    The algorithm name is unchanged, so existing hashes keep working. When the iterations change, each password is
+    rehashed with the new ones the next time its user logs in (see `AbstractBaseUser.check_password`). Use the
+    `benchmark_login` command to measure the cost of a setting: a login takes about the time of one hash.
+    """
+
+    @property  # type: ignore # Read on use, so it follows the settings
+    def iterations(self) -> int:
+        return settings.AUTH_PASSWORD_ITERATIONS or DjangoPBKDF2PasswordHasher.iterations
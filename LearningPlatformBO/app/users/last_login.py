@@ -0,0 +1,114 @@
+"""
+Deferred, batched `last_login` writes.
+
+Updating `last_login` synchronously costs an `UPDATE` per login, which at peak times contends with the rest of the
+traffic. Logins are instead recorded in an in-process buffer (`last_login_buffer`) that keeps the latest login of each
+user and writes them all with a single `UPDATE ... FROM (VALUES ...)` every `AUTH_LAST_LOGIN_FLUSH_INTERVAL` seconds.
+
+The buffer is flushed at interpreter exit too, so a gracefully stopped worker loses nothing; a killed one loses at most
+the logins of its last interval, which only delays `last_login` and never breaks authentication.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any
+from django.conf import settings
+from django.db import DatabaseError, connection
+from users.models import User
+
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """
+    Thread-safe buffer of the latest login datetime of each user, flushed to the database by a daemon thread that is
+    started on the first login recorded by each process.
+
+    With a `flush_interval` of `0` nothing is buffered: every login is written right away.
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._logins: dict[Any, datetime] = {}
+        self._lock = threading.Lock()
+        self._flusher_pid: int | None = None
+
+    def record(self, user_id: Any, logged_in_at: datetime) -> None:
+        """Record a login, keeping only the latest one of each user until the next flush."""
+        with self._lock:
+            latest = self._logins.get(user_id)
+            if latest is None or latest < logged_in_at:
+                self._logins[user_id] = logged_in_at
+            if self.flush_interval > 0:
+                self._start_flusher()
+                return
+        self.flush()
+
+    def flush(self) -> int:
+        """Write the buffered logins in a single statement, returning how many users were updated."""
+        with self._lock:
+            logins, self._logins = self._logins, {}
+        if not logins:
+            return 0
+        try:
+            return write_last_logins(logins)
+        except DatabaseError:
+            # Put them back, unless a later login was recorded meanwhile, so the next flush retries them
+            logger.exception(f"Could not write the last login of {len(logins)} users")
+            with self._lock:
+                for user_id, logged_in_at in logins.items():
+                    latest = self._logins.get(user_id)
+                    if latest is None or latest < logged_in_at:
+                        self._logins[user_id] = logged_in_at
+            return 0
+
+    def _start_flusher(self) -> None:
+        # Threads don't survive a fork, so each worker process starts its own
+        if self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        threading.Thread(target=self._run_flusher, name="last-login-flusher", daemon=True).start()
+
+    def _run_flusher(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not flush the last login buffer")
+            finally:
+                # The thread has its own connection: don't keep it open between flushes
+                connection.close()
+
+
+def write_last_logins(logins: dict[Any, datetime]) -> int:
+    """
+    Set the `last_login` of many users with a single `UPDATE ... FROM (VALUES ...)`. A stored `last_login` that is
+    already more recent is kept, so flushes from several processes can't move it backwards.
+    """
+    table = connection.ops.quote_name(User._meta.db_table)
+    pk_column = connection.ops.quote_name(User._meta.get_field("id").column)
+    last_login_column = connection.ops.quote_name(User._meta.get_field("last_login").column)
+    values = ", ".join(["(%s::uuid, %s::timestamptz)"] * len(logins))
+    params: list[Any] = [param for user_id, logged_in_at in logins.items() for param in (str(user_id), logged_in_at)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table} SET {last_login_column} = logins.last_login
+            FROM (VALUES {values}) AS logins (id, last_login)
+            WHERE {table}.{pk_column} = logins.id
+                AND ({table}.{last_login_column} IS NULL OR {table}.{last_login_column} < logins.last_login)
+            """,
+            params,
+        )
+        return int(cursor.rowcount)
+
+
+last_login_buffer = LastLoginBuffer(settings.AUTH_LAST_LOGIN_FLUSH_INTERVAL)
+"""The process' last login buffer. See `LastLoginBuffer`."""
+
+atexit.register(last_login_buffer.flush)
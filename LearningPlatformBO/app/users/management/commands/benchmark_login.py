@@ -0,0 +1,75 @@
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.db import connection
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from core.management.commands._base_command import BaseCommand
+from core.utilities import uuid
+from users.models import User
+from users.serializers import CustomTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure how many logins per second a worker can serve with the current password hashing
+    settings (`AUTH_PASSWORD_HASHER`, `AUTH_PASSWORD_ITERATIONS`).
+
+    It times the hashing alone, then full logins through the login serializer (user lookup, password check and token
+    pair) for a temporary user, deleted at the end. With `--threads`, logins run concurrently: the standard hashers
+    release the GIL while hashing, so threads can hash in parallel on several cores.
+    """
+
+    help = "Measure the logins per second of a worker with the current password hashing settings."
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("--logins", type=int, default=50, help="Logins to time.")
+        parser.add_argument("--threads", type=int, default=1, help="Logins run concurrently.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        logins, threads = options["logins"], options["threads"]
+        hasher = get_hasher()
+        parameters = {
+            key: value
+            for key, value in hasher.safe_summary(make_password("benchmark")).items()
+            if key not in ("salt", "hash")
+        }
+        self.info(f"Hasher: {parameters}")
+
+        started_at = time.perf_counter()
+        for _ in range(logins):
+            make_password("benchmark")
+        hashing = (time.perf_counter() - started_at) / logins
+        self.info(f"Hashing: {hashing * 1000:.1f} ms per password")
+
+        password = uuid()
+        user = User.objects.create_user(
+            username=f"benchmark-{uuid()}", email=f"{uuid()}@example.com", password=password
+        )
+        try:
+            credentials = {"username": user.username, "password": password}
+            started_at = time.perf_counter()
+            if threads > 1:
+                counts = [logins // threads + (i < logins % threads) for i in range(threads)]
+                with ThreadPoolExecutor(threads) as executor:
+                    list(executor.map(lambda count: self.login(credentials, count, in_thread=True), counts))
+            else:
+                self.login(credentials, logins)
+            elapsed = time.perf_counter() - started_at
+        finally:
+            OutstandingToken.objects.filter(user=user).delete()
+            user.delete()
+        self.success(
+            f"{logins / elapsed:.1f} logins/s with {threads} thread(s), {elapsed / logins * 1000:.1f} ms per login"
+        )
+
+    def login(self, credentials: dict[str, str], count: int, in_thread: bool = False) -> None:
+        """Log in `count` times, the way the login view does."""
+        try:
+            for _ in range(count):
+                CustomTokenObtainPairSerializer(data=credentials).is_valid(raise_exception=True)
+        finally:
+            if in_thread:
+                # Each thread opened its own connection
+                connection.close()
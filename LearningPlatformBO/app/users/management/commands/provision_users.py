@@ -0,0 +1,62 @@
+import os
+from argparse import ArgumentParser
+from typing import Any
+from django.core.management.base import CommandError
+from course.models import Course
+from core.management.commands._base_command import BaseCommand
+from users.provisioning import ProvisioningReport, provision_users, read_users
+
+
+class Command(BaseCommand):
+    """
+    Django command to create many users at once from a CSV (`username,email,password` header) or JSON Lines file,
+    optionally enrolling them in a course. See `users.provisioning` for the details.
+
+    Existing usernames and emails are skipped, so an interrupted run can simply be started again.
+    """
+
+    help = "Create users in bulk from a CSV or JSON Lines file."
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("path", help="CSV or JSON Lines (.jsonl) file of users.")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="File format, guessed from its extension.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Users inserted per transaction.")
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(), help="Password hashing processes (0 to hash in-process)."
+        )
+        parser.add_argument("--course", type=int, help="Id of a course to enroll the users in.")
+        parser.add_argument(
+            "--enrollment",
+            choices=["enroll", "request"],
+            default="enroll",
+            help="With --course, enroll the users or create pending enrollment requests.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path = options["path"]
+        file_format = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        course_id = options["course"]
+        if course_id is not None and not Course.objects.filter(pk=course_id).exists():
+            raise CommandError(f"Course {course_id} does not exist.")
+
+        report = ProvisioningReport()
+        self.info(f"Provisioning users from {path}...")
+        with open(path, "rb") as file:
+            provision_users(
+                read_users(file, file_format),
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+                course_id=course_id,
+                enrollment=options["enrollment"],
+                report=report,
+            )
+
+        for error in report.errors:
+            self.warning(f"Row {error['row']}: {error['error']}")
+        if report.error_count > len(report.errors):
+            self.warning(f"... and {report.error_count - len(report.errors)} more errors.")
+        summary = f"{report.rows} rows: {report.created} users created, {report.skipped} already existed"
+        if course_id is not None:
+            action = "enrolled" if options["enrollment"] == "enroll" else "enrollment requests created"
+            summary += f", {report.enrolled} {action}"
+        self.success(f"{summary}, {report.error_count} errors.")
@@ -1,10 +1,29 @@
-from typing import Any
+from typing import Any, Iterable, Optional
+from django.conf import settings
 from django.contrib.auth.models import BaseUserManager
+from django.contrib.postgres.fields import ArrayField
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F, TextField
+from django.db.models.functions import Lower
+from core.extensions.models import SoftDeleteManager
+from core.utilities.queries import Array
 from core.utilities.types import GenericUser
 
 
-class UserManager(BaseUserManager[GenericUser]):
-    """Custom UserManager that uses our User model defined below."""
+def login_identifiers(fields: Iterable[str]) -> Array:
+    """
+    Expression of the lowercased values a user can log in with, e.g. `ARRAY[LOWER(username), LOWER(email)]`. Index it
+    with a `GinIndex` to find a user by any of them with a single index scan (see `UserManager.get_by_login`).
+    """
+    return Array(*[Lower(field) for field in fields], output_field=ArrayField(TextField()))
+
+
+class UserManager(SoftDeleteManager, BaseUserManager[GenericUser]):
+    """
+    Custom UserManager that uses our User model defined below. Leaves out the soft deleted users, unless created with
+    `include_deleted=True` (see `SoftDeleteManager`).
+    """
 
     def create_user(self, password: str, **fields: Any) -> GenericUser:
         """Create, save and return a new User."""
@@ -12,7 +31,7 @@ class UserManager(BaseUserManager[GenericUser]):
         for key in list(fields.keys()):
             if not hasattr(self.model, key):
                 del fields[key]
-        user = self.model(password=password, **fields)
+        user: GenericUser = self.model(password=password, **fields)
         user.set_password(password)
         user.save()
         return user
@@ -21,3 +40,65 @@ class UserManager(BaseUserManager[GenericUser]):
         """Shortcut method to create a User with `is_staff` and `is_superuser` as `True`."""
         fields.update({"is_staff": True, "is_superuser": True})
         return self.create_user(password, **fields)
+
+    def get_by_login(self, identifier: str) -> Optional[GenericUser]:
+        """
+        Return the user whose `LOGIN_FIELDS` (e.g. username or email) match `identifier`, ignoring the case, or `None`.
+
+        The lookup uses the `login_identifiers` expression index. Uniqueness is case-sensitive, so several users may
+        match: an exact match wins, otherwise the identifier is ambiguous and no user is returned.
+        """
+        candidates: list[GenericUser] = list(
+            self.alias(login_identifiers=login_identifiers(self.model.LOGIN_FIELDS))
+            .filter(login_identifiers__contains=[identifier.lower()])
+            .order_by()[:10]
+        )
+        if len(candidates) == 1:
+            return candidates[0]
+        exact = [
+            user for user in candidates if identifier in (getattr(user, field) for field in self.model.LOGIN_FIELDS)
+        ]
+        return exact[0] if len(exact) == 1 else None
+
+    def get_permissions_version(self, user_id: Any) -> Optional[int]:
+        """
+        Return the current `permissions_version` of a user, or `None` if there's no such user, to validate the
+        permission claims of their tokens. Never read from the cached users of the authentication, which other processes
+        may have left outdated: read from the `PERMISSIONS_VERSION_CACHE` cache if set, which every process must share,
+        or from the database.
+        """
+        cache = caches[settings.PERMISSIONS_VERSION_CACHE] if settings.PERMISSIONS_VERSION_CACHE else None
+        key = permissions_version_key(user_id)
+        version: Optional[int] = cache.get(key) if cache is not None else None
+        if version is None:
+            version = self.filter(pk=user_id).values_list("permissions_version", flat=True).first()
+            if cache is not None and version is not None:
+                # Only if missing: a version set by `bump_permissions_version` in the meantime is more recent
+                cache.add(key, version)
+        return version
+
+    def bump_permissions_version(self, user_ids: Iterable[Any]) -> None:
+        """
+        Invalidate the permission claims of the tokens issued so far to the given users, which then fall back to the
+        database until they are refreshed. Once the transaction commits, the new versions are stored in the
+        `PERMISSIONS_VERSION_CACHE` cache, if set. Cached copies of the users are dropped too, but only in this process.
+        """
+        from users.token_authentication import user_cache  # Imported here, as the models may not be loaded yet
+
+        user_ids = set(user_ids)
+        self.filter(pk__in=user_ids).update(permissions_version=F("permissions_version") + 1)
+        for user_id in user_ids:
+            user_cache.delete(str(user_id))
+        if settings.PERMISSIONS_VERSION_CACHE:
+            transaction.on_commit(lambda: self.cache_permissions_versions(user_ids))
+
+    def cache_permissions_versions(self, user_ids: Iterable[Any]) -> None:
+        """Store the committed `permissions_version` of the given users in the `PERMISSIONS_VERSION_CACHE` cache."""
+        versions = self.filter(pk__in=user_ids).values_list("pk", "permissions_version")
+        caches[settings.PERMISSIONS_VERSION_CACHE].set_many(
+            {permissions_version_key(user_id): version for user_id, version in versions}
+        )
+
+
+def permissions_version_key(user_id: Any) -> str:
+    return f"permissions_version:{user_id}"
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='permissions_version',
+            field=models.PositiveIntegerField(default=0, help_text="Bumped whenever the user's permissions change, so tokens claiming older ones are not trusted.", verbose_name='permissions version'),
+        ),
+    ]
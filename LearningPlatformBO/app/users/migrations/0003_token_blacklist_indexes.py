@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the token blacklist tables (owned by SimpleJWT) for the blacklist filter syncs and the expired token
+    compaction (see `users.token_blacklist` and the `compact_token_blacklist` command).
+    """
+
+    dependencies = [
+        ("users", "0002_user_permissions_version"),
+        ("token_blacklist", "0012_alter_outstandingtoken_user"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS token_outstanding_expires_idx ON token_blacklist_outstandingtoken (expires_at)",
+            "DROP INDEX IF EXISTS token_outstanding_expires_idx",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS token_blacklisted_at_idx ON token_blacklist_blacklistedtoken (blacklisted_at)",
+            "DROP INDEX IF EXISTS token_blacklisted_at_idx",
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.4 on 2026-10-18 18:24
+
+import core.utilities.queries
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_token_blacklist_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(core.utilities.queries.Array(django.db.models.functions.text.Lower('username'), django.db.models.functions.text.Lower('email'), output_field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)), name='user_login_identifiers_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.4 on 2026-10-18 18:32
+
+import core.utilities.queries
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0004_user_login_identifiers_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='user',
+            options={'default_manager_name': 'all_objects', 'ordering': ['-created_at']},
+        ),
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_login_identifiers_idx',
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(core.utilities.queries.Array(django.db.models.functions.text.Lower('username'), django.db.models.functions.text.Lower('email'), output_field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)), condition=models.Q(('is_deleted', False)), name='user_live_login_idx'),
+        ),
+    ]
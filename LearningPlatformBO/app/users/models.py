@@ -1,6 +1,8 @@
 from typing import Self
+from django.contrib.postgres.indexes import GinIndex
+from django.db.models import Q
 from users.abstract_models import BaseAbstractUser, UserEmailMixin, UserUsernameMixin
-from users.managers import UserManager
+from users.managers import UserManager, login_identifiers
 
 
 class User(UserUsernameMixin, UserEmailMixin, BaseAbstractUser):
@@ -18,10 +20,20 @@ class User(UserUsernameMixin, UserEmailMixin, BaseAbstractUser):
     """
 
     USERNAME_FIELD = "username"
+    # Fields a user can log in with, case-insensitively (see `UserManager.get_by_login`)
+    LOGIN_FIELDS = ("username", "email")
     objects = UserManager[Self]()
+    all_objects = UserManager[Self](include_deleted=True)
 
     class Meta(BaseAbstractUser.Meta):
-        ...
+        indexes = [
+            # Logins only look up live users
+            GinIndex(
+                login_identifiers(("username", "email")),
+                name="user_live_login_idx",
+                condition=Q(is_deleted=False),
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"User ({self.id}) {self.get_username()}"
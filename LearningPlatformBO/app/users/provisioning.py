@@ -0,0 +1,189 @@
+"""
+Bulk creation of users from a CSV or JSON Lines file (see the `provision_users` command).
+
+`UserManager.create_user` hashes and saves one user at a time, which for tens of thousands of accounts takes hours,
+nearly all of it hashing passwords. Here the file is handled `chunk_size` rows at a time: the existing accounts of a
+chunk are found with a single index lookup, the passwords of the new ones are hashed in parallel by a process pool, and
+they're inserted with `bulk_create`. The provisioned users can be enrolled in a course, or given a pending enrollment
+request, in the same pass.
+"""
+import csv
+import io
+import json
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import IO, Any, Iterator, Literal, Optional
+import django
+from django.contrib.auth.base_user import BaseUserManager
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from course.enrollment import enroll_users, request_enrollments
+from course.models import Course
+from users.managers import login_identifiers
+from users.models import User
+
+
+Enrollment = Literal["enroll", "request"]
+
+
+class ProvisioningReport:
+    """Outcome of a provisioning run. Only the first `max_errors` row errors are kept, to bound its size."""
+
+    def __init__(self, max_errors: int = 1000):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.created = 0
+        self.skipped = 0
+        self.enrolled = 0
+        self.error_count = 0
+        self.errors: list[dict[str, Any]] = []
+
+    def add_error(self, row: int, error: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": error})
+
+
+def read_users(file: IO[bytes], file_format: Literal["csv", "jsonl"]) -> Iterator[tuple[int, Any]]:
+    """
+    Yield the `(row number, user data)` of every non-blank row of a CSV file (with a `username,email,password` header;
+    `password` may be left out) or a JSON Lines file (one object with the same keys per line). Rows that can't be
+    parsed are yielded with their error message as data.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if file_format == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=2):
+            if any((value or "").strip() for value in row.values()):
+                yield row_number, row
+        return
+    for row_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, f"Invalid JSON: {e}"
+
+
+def provision_users(
+    rows: Iterator[tuple[int, Any]],
+    *,
+    chunk_size: int = 1000,
+    workers: int = 0,
+    course_id: Optional[int] = None,
+    enrollment: Enrollment = "enroll",
+    report: Optional[ProvisioningReport] = None,
+) -> ProvisioningReport:
+    """
+    Create the users of the given rows (see `read_users`), `chunk_size` at a time, each chunk in its own transaction.
+
+    Rows whose username or email is already taken, ignoring the case and by either field (soft deleted accounts
+    included), are skipped, as are repeated ones. Passwords are hashed by a pool of `workers` processes (in this
+    process if `0`); rows without one get an unusable password. With a `course_id`, every live user named in the file
+    by username or email, new or not, is enrolled in the course (`enrollment="enroll"`) or gets a pending enrollment
+    request for it (`enrollment="request"`); only the enrollments and requests that didn't exist yet are counted.
+    """
+    report = report or ProvisioningReport()
+    seen: set[str] = set()
+    executor = ProcessPoolExecutor(workers, initializer=django.setup) if workers > 0 else None
+    try:
+        while chunk := list(islice(rows, chunk_size)):
+            provision_chunk(chunk, seen, executor, course_id, enrollment, report)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if course_id is not None and enrollment == "enroll":
+        Course.refresh_enrolled_counts([course_id])
+    return report
+
+
+def provision_chunk(
+    chunk: list[tuple[int, Any]],
+    seen: set[str],
+    executor: Optional[Executor],
+    course_id: Optional[int],
+    enrollment: Enrollment,
+    report: ProvisioningReport,
+) -> None:
+    candidates = []
+    for row_number, data in chunk:
+        report.rows += 1
+        if isinstance(data, str):
+            report.add_error(row_number, data)
+            continue
+        try:
+            username, email, password = clean_user(data)
+        except ValidationError as e:
+            report.add_error(row_number, e.messages[0])
+            continue
+        if username.lower() in seen or email.lower() in seen:
+            report.add_error(row_number, "Repeated username or email.")
+            continue
+        seen.update((username.lower(), email.lower()))
+        candidates.append((username, email, password))
+    if not candidates:
+        return
+
+    # Every taken identifier (usernames and emails alike) the chunk collides with, in one index lookup. Soft deleted
+    # accounts still hold theirs
+    identifiers = [value.lower() for username, email, _ in candidates for value in (username, email)]
+    taken = {
+        value.lower()
+        for values in User.all_objects.alias(login_identifiers=login_identifiers(User.LOGIN_FIELDS))
+        .filter(login_identifiers__overlap=identifiers)
+        .values_list(*User.LOGIN_FIELDS)
+        for value in values
+    }
+    new = [
+        (username, email, password)
+        for username, email, password in candidates
+        if username.lower() not in taken and email.lower() not in taken
+    ]
+    report.skipped += len(candidates) - len(new)
+
+    passwords = [password for _, _, password in new]
+    if executor is None:
+        hashes = [make_password(password) for password in passwords]
+    else:
+        hashes = list(executor.map(make_password, passwords, chunksize=max(1, len(passwords) // 64)))
+
+    with transaction.atomic():
+        users = [
+            User(username=username, email=email, password=hashed) for (username, email, _), hashed in zip(new, hashes)
+        ]
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        # A concurrent run may have taken some of them meanwhile
+        created = User.all_objects.filter(pk__in=[user.pk for user in users]).count()
+        report.created += created
+        report.skipped += len(users) - created
+        if course_id is not None:
+            # The live users named in the chunk, found the way logins are
+            user_ids = list(
+                User.objects.alias(login_identifiers=login_identifiers(User.LOGIN_FIELDS))
+                .filter(login_identifiers__overlap=identifiers)
+                .values_list("pk", flat=True)
+            )
+            if enrollment == "enroll":
+                report.enrolled += enroll_users(course_id, user_ids, refresh_count=False)
+            else:
+                report.enrolled += request_enrollments(course_id, user_ids)
+
+
+def clean_user(data: Any) -> tuple[str, str, Optional[str]]:
+    """
+    Validate and normalize the `(username, email, password)` of a row, the way the User model's `save()` does, as
+    `bulk_create` skips it. Raises `ValidationError`.
+    """
+    if not isinstance(data, dict):
+        raise ValidationError("Expected an object with a username, an email and optionally a password.")
+    username = str(data.get("username") or "").strip()
+    email = str(data.get("email") or "").strip()
+    if not username:
+        raise ValidationError("Username cannot be empty.")
+    try:
+        validate_email(email)
+    except ValidationError as ve:
+        raise ValidationError("Email is invalid.") from ve
+    return username, BaseUserManager.normalize_email(email), data.get("password") or None
@@ -1,9 +1,17 @@
-from typing import Any
+from typing import Any, cast
+from django.utils import timezone
 from rest_framework import serializers
 from users import models
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from course.models import CourseAdmin
+from rest_framework_simplejwt.serializers import (
+    TokenBlacklistSerializer,
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from course.membership import PERMISSIONS_VERSION_CLAIM, add_course_claims
+from users.last_login import last_login_buffer
+from users.token_blacklist import FilteredBlacklistRefreshToken
 
 class UserRegisterSerializer(serializers.ModelSerializer):
     """Serializer for creating users."""
@@ -22,6 +30,7 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             "is_active",
             "is_superuser",
             "last_login",
+            "permissions_version",
             "groups",
             "user_permissions",
         )
@@ -89,6 +98,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
             "is_superuser",
             "password",
             "last_login",
+            "permissions_version",
             "groups",
             "user_permissions",
         )
@@ -98,11 +108,34 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def get_token(cls, user):
         token = super().get_token(user)
         token['is_admin'] = user.is_staff
-
-        courses_admin = CourseAdmin.objects.filter(user=user).values_list('course_id', flat=True)
-        token['courses_admin'] = list(courses_admin)
-        return token
+        return add_course_claims(token, user)
 
     def validate(self, attrs):
         data = super().validate(attrs)
-        return data
\ No newline at end of file
+        # Set by `super().validate()`, which raises if the credentials are wrong
+        last_login_buffer.record(cast(models.User, self.user).pk, timezone.now())
+        return data
+
+
+class CourseClaimsRefreshToken(FilteredBlacklistRefreshToken):
+    """
+    Refresh token that re-embeds its course claims when the user's permissions changed since it was issued, so the
+    tokens refreshed from it are trusted again instead of falling back to the database.
+    """
+
+    def __init__(self, token: Any = None, verify: bool = True) -> None:
+        super().__init__(token, verify)
+        user_id = self.get(api_settings.USER_ID_CLAIM)
+        if token is None or user_id is None:
+            return
+        user = models.User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).only("permissions_version").first()
+        if user is not None and self.get(PERMISSIONS_VERSION_CLAIM) != user.permissions_version:
+            add_course_claims(self, user)
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CourseClaimsRefreshToken
+
+
+class CustomTokenBlacklistSerializer(TokenBlacklistSerializer):
+    token_class = FilteredBlacklistRefreshToken
@@ -0,0 +1,13 @@
+from typing import Any
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+from users.models import User
+from users.token_authentication import user_cache
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender: type[User], instance: User, **kwargs: Any) -> None:
+    """Drop a changed or deleted user from the authentication `user_cache`."""
+    user_cache.delete(str(getattr(instance, api_settings.USER_ID_FIELD)))
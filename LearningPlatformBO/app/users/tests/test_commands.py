@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from course.models import Course, CourseEnrollmentStats, EnrollmentRequest
+from users.models import User
+from users.tests import VALID_PASSWORD, sample_user
+
+
+class TestBenchmarkLogin(TestCase):
+    """Test the benchmark_login command."""
+
+    def test_benchmark(self) -> None:
+        """Test it reports the logins per second, and cleans its temporary user up."""
+        users = User.objects.count()
+        out = StringIO()
+        call_command("benchmark_login", "--logins", "2", stdout=out)
+        self.assertIn("logins/s with 1 thread(s)", out.getvalue())
+        self.assertEqual(users, User.objects.count())
+
+
+class TestProvisionUsers(TestCase):
+    """Test the provision_users command."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.existing = sample_user(username="Existing", email="existing@example.com")
+        self.course = Course.objects.create(title="Course", visibility="private")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def provision(self, path: str, *args: str) -> str:
+        out, err = StringIO(), StringIO()
+        call_command("provision_users", path, *args, stdout=out, stderr=err)
+        return out.getvalue() + err.getvalue()
+
+    def test_csv(self) -> None:
+        """Test new users are created and enrolled, and existing, repeated and invalid rows skipped."""
+        sample_user(username="Deleted", email="deleted@example.com").soft_delete()
+        path = self.write(
+            "users.csv",
+            "username,email,password\n"
+            f"new1,New1@Example.COM,{VALID_PASSWORD}\n"
+            "new2,new2@example.com,\n"
+            "EXISTING,other@example.com,secret\n"
+            "new3,new1@example.com,secret\n"
+            "new4,not-an-email,secret\n"
+            "deleted,new5@example.com,secret\n"
+            "\n",
+        )
+        output = self.provision(path, "--workers", "2", "--course", str(self.course.pk))
+
+        self.assertIn("6 rows: 2 users created, 2 already existed, 3 enrolled, 2 errors.", output)
+        self.assertIn("Row 5: Repeated username or email.", output)
+        self.assertIn("Row 6: Email is invalid.", output)
+        new1 = User.objects.get(username="new1")
+        self.assertEqual("New1@example.com", new1.email)
+        self.assertTrue(new1.check_password(VALID_PASSWORD))
+        self.assertFalse(User.objects.get(username="new2").has_usable_password())
+        self.assertEqual("existing@example.com", User.objects.get(pk=self.existing.pk).email)
+        self.assertFalse(User.all_objects.filter(email="new5@example.com").exists())
+        self.course.refresh_from_db()
+        self.assertEqual(3, self.course.enrolled_count)
+
+        output = self.provision(path, "--workers", "0", "--course", str(self.course.pk))
+        self.assertIn("6 rows: 0 users created, 4 already existed, 0 enrolled, 2 errors.", output)
+
+    def test_jsonl_requests(self) -> None:
+        """Test users of a JSON Lines file get enrollment requests, existing ones included, on every run."""
+        path = self.write(
+            "users.jsonl",
+            json.dumps({"username": "new1", "email": "new1@example.com", "password": VALID_PASSWORD})
+            + "\n{not json}\n"
+            + json.dumps({"username": "Existing", "email": "existing@example.com"})
+            + "\n",
+        )
+        output = self.provision(path, "--workers", "0", "--course", str(self.course.pk), "--enrollment", "request")
+        self.assertIn("3 rows: 1 users created, 1 already existed, 2 enrollment requests created, 1 errors.", output)
+        self.assertEqual(2, EnrollmentRequest.objects.filter(course=self.course, status="pending").count())
+        self.assertEqual(2, CourseEnrollmentStats.objects.get(course=self.course).pending)
+
+        output = self.provision(path, "--workers", "0", "--course", str(self.course.pk), "--enrollment", "request")
+        self.assertIn("3 rows: 0 users created, 2 already existed, 0 enrollment requests created, 1 errors.", output)
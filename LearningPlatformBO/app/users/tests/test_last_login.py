@@ -0,0 +1,43 @@
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from users.last_login import LastLoginBuffer, last_login_buffer
+from users.models import User
+from users.tests import VALID_PASSWORD, sample_user
+
+
+class TestLastLoginBuffer(APITestCase):
+    """Test the LastLoginBuffer coalesces logins and writes them in a single statement."""
+
+    def test_flush(self) -> None:
+        """Test only the latest login of each user is written, in one query, and never moves `last_login` backwards."""
+        now = timezone.now()
+        users = [sample_user() for _ in range(3)]
+        User.objects.filter(pk=users[2].pk).update(last_login=now)
+        buffer = LastLoginBuffer(flush_interval=60)
+        buffer.record(users[0].pk, now - timedelta(minutes=1))
+        buffer.record(users[0].pk, now)
+        buffer.record(users[0].pk, now - timedelta(minutes=2))
+        buffer.record(users[1].pk, now)
+        buffer.record(users[2].pk, now - timedelta(minutes=1))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(2, buffer.flush())
+        self.assertEqual(0, buffer.flush())
+        for user in users:
+            user.refresh_from_db()
+            self.assertEqual(now, user.last_login)
+
+    def test_login(self) -> None:
+        """Test logging in records the login instead of writing it right away."""
+        user = sample_user()
+        res = self.client.post(reverse("users:login"), {"username": user.username, "password": VALID_PASSWORD})
+        self.assertEqual(status.HTTP_200_OK, res.status_code)
+        user.refresh_from_db()
+        self.assertIsNone(user.last_login)
+
+        last_login_buffer.flush()
+        user.refresh_from_db()
+        self.assertIsNotNone(user.last_login)
@@ -0,0 +1,106 @@
+from typing import Any, cast
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.throttling import CacheBuckets, LocalBuckets, next_arrival, throttle_buckets
+from users.tests import VALID_PASSWORD, sample_user
+
+
+def throttle_rates(**rates: Any) -> override_settings:
+    """Override the throttling rates of the given scopes."""
+    rest_framework = cast(dict[str, Any], settings.REST_FRAMEWORK)
+    return override_settings(
+        REST_FRAMEWORK={
+            **rest_framework,
+            "DEFAULT_THROTTLE_RATES": {**rest_framework["DEFAULT_THROTTLE_RATES"], **rates},
+        }
+    )
+
+
+class TestTokenBuckets(SimpleTestCase):
+    """Test the token buckets let bursts through, then refill at their rate."""
+
+    def test_next_arrival(self) -> None:
+        """Test a bucket of 2 tokens per 10 seconds."""
+        arrival, wait = next_arrival(None, 5, 10, now=100)
+        self.assertEqual((105, 0), (arrival, wait))
+        arrival, wait = next_arrival(arrival, 5, 10, now=100)
+        self.assertEqual((110, 0), (arrival, wait))
+        self.assertEqual((None, 5), next_arrival(arrival, 5, 10, now=100))
+        # A token was refilled
+        self.assertEqual((115, 0), next_arrival(arrival, 5, 10, now=105))
+        # A bucket idle for long is only full
+        self.assertEqual((1005, 0), next_arrival(arrival, 5, 10, now=1000))
+
+    def test_stores(self) -> None:
+        """Test both stores keep each bucket apart."""
+        for buckets in (LocalBuckets(), CacheBuckets("default")):
+            with self.subTest(buckets=type(buckets).__name__):
+                self.assertEqual(0, buckets.take("a", 5, 10, now=100))
+                self.assertEqual(0, buckets.take("a", 5, 10, now=100))
+                self.assertEqual(5, buckets.take("a", 5, 10, now=100))
+                self.assertEqual(0, buckets.take("b", 5, 10, now=100))
+                buckets.clear()
+                self.assertEqual(0, buckets.take("a", 5, 10, now=100))
+        caches["default"].clear()
+
+
+class TestThrottledViews(APITestCase):
+    """Test the login and registration endpoints are throttled."""
+
+    def setUp(self) -> None:
+        throttle_buckets.clear()
+
+    def tearDown(self) -> None:
+        throttle_buckets.clear()
+
+    def test_login_identifier(self) -> None:
+        """Test logins are throttled per account, whatever the case, with a Retry-After."""
+        user = sample_user()
+        with throttle_rates(login_identifier="2/minute"):
+            for identifier in (user.username, user.username.upper()):
+                res = self.client.post(reverse("users:login"), {"username": identifier, "password": "wrong"})
+                self.assertEqual(status.HTTP_401_UNAUTHORIZED, res.status_code)
+            res = self.client.post(reverse("users:login"), {"username": user.username, "password": VALID_PASSWORD})
+            self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, res.status_code)
+            self.assertEqual("30", res.headers["Retry-After"])
+
+            other = sample_user()
+            res = self.client.post(reverse("users:login"), {"username": other.username, "password": VALID_PASSWORD})
+            self.assertEqual(status.HTTP_200_OK, res.status_code)
+
+    def test_login_ip(self) -> None:
+        """Test logins are throttled per client IP address."""
+        with throttle_rates(login="1/hour"):
+            res = self.client.post(reverse("users:login"), {"username": "a", "password": "wrong"})
+            self.assertEqual(status.HTTP_401_UNAUTHORIZED, res.status_code)
+            res = self.client.post(reverse("users:login"), {"username": "b", "password": "wrong"})
+            self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, res.status_code)
+            self.assertEqual("3600", res.headers["Retry-After"])
+            # X-Forwarded-For isn't trusted without NUM_PROXIES
+            res = self.client.post(
+                reverse("users:login"), {"username": "b", "password": "wrong"}, HTTP_X_FORWARDED_FOR="10.0.0.2"
+            )
+            self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, res.status_code)
+            res = self.client.post(
+                reverse("users:login"), {"username": "b", "password": "wrong"}, REMOTE_ADDR="10.0.0.1"
+            )
+            self.assertEqual(status.HTTP_401_UNAUTHORIZED, res.status_code)
+
+    def test_registration(self) -> None:
+        """Test registrations are throttled per client IP address, and a scope without a rate isn't."""
+        data = {"username": "new", "email": "new@example.com", "password": VALID_PASSWORD}
+        with throttle_rates(registration="1/day"):
+            self.assertEqual(
+                status.HTTP_201_CREATED, self.client.post(reverse("users:public-register"), data).status_code
+            )
+            res = self.client.post(reverse("users:public-register"), data)
+            self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, res.status_code)
+        with throttle_rates(registration=None):
+            # Let through, to fail as a duplicate
+            res = self.client.post(reverse("users:public-register"), data)
+            self.assertEqual(status.HTTP_200_OK, res.status_code)
+            self.assertFalse(res.json()["ok"])
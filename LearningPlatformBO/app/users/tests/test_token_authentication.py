@@ -0,0 +1,72 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from core.utilities.cache import LRUCache
+from users.token_authentication import user_cache
+from users.tests import sample_user
+
+
+class TestLRUCache(APITestCase):
+    """Test the LRUCache used to cache authenticated users."""
+
+    def test_eviction_and_expiry(self) -> None:
+        """Test the least recently used entry is evicted when full and entries expire after the TTL."""
+        now = [0.0]
+        cache: LRUCache[int] = LRUCache(max_size=2, ttl=10, clock=lambda: now[0])
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(1, cache.get("a"))
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(1, cache.get("a"))
+        now[0] = 10
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNone(cache.get("c"))
+        self.assertEqual(0, len(cache))
+
+
+class TestCachedJWTAuthentication(APITestCase):
+    """Test the CachedJWTAuthentication resolves users from the cache and drops them when they change."""
+
+    URL = reverse("users:whoami")
+
+    def setUp(self) -> None:
+        user_cache.clear()
+        self.user = sample_user()
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def get_auth_queries(self) -> tuple[int, int]:
+        """Make a request, returning its status code and the number of queries on the users table."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(self.URL)
+        return res.status_code, sum('FROM "users_user"' in query["sql"] for query in queries)
+
+    def test_cached_user(self) -> None:
+        """Test only the first request looks the user up."""
+        self.assertEqual((status.HTTP_200_OK, 1), self.get_auth_queries())
+        self.assertEqual((status.HTTP_200_OK, 0), self.get_auth_queries())
+
+    def test_save_invalidates(self) -> None:
+        """Test saving the user, e.g. to change the password, drops the cached copy."""
+        self.get_auth_queries()
+        self.user.set_password("Another1.")
+        self.user.save()
+        self.assertEqual((status.HTTP_200_OK, 1), self.get_auth_queries())
+
+    def test_soft_deleted_user(self) -> None:
+        """Test a soft deleted user is no longer authenticated, cached or not."""
+        self.get_auth_queries()
+        self.user.soft_delete()
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, self.get_auth_queries()[0])
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, self.get_auth_queries()[0])
+
+    def test_inactive_user(self) -> None:
+        """Test deactivating the user takes effect on the next request."""
+        self.get_auth_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, self.get_auth_queries()[0])
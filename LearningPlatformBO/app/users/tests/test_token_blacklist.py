@@ -0,0 +1,111 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.utilities.bloom import BloomFilter
+from core.utilities import uuid
+from users.token_blacklist import blacklist_filter
+from users.tests import sample_user
+
+
+class TestBloomFilter(APITestCase):
+    """Test the BloomFilter used to filter the blacklisted tokens."""
+
+    def test_membership(self) -> None:
+        """Test added items are always found, and others rarely."""
+        bloom_filter = BloomFilter(1000, error_rate=0.01)
+        added = [uuid() for _ in range(1000)]
+        for item in added:
+            bloom_filter.add(item)
+        self.assertTrue(all(item in bloom_filter for item in added))
+        false_positives = sum(uuid() in bloom_filter for _ in range(10000))
+        self.assertLess(false_positives, 300)
+        self.assertFalse(bloom_filter.is_full)
+        bloom_filter.add(uuid())
+        self.assertTrue(bloom_filter.is_full)
+
+
+class TestBlacklist(APITestCase):
+    """Test refreshing without the blacklist filter (the default)."""
+
+    URL = reverse("users:login-refresh")
+
+    def test_blacklisted_elsewhere(self) -> None:
+        """Test tokens blacklisted by another process are rejected right away."""
+        refresh = RefreshToken.for_user(sample_user())
+        blacklist_filter.sync(force=True)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=refresh["jti"]))
+        res = self.client.post(self.URL, {"refresh": str(refresh)})
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, res.status_code)
+
+
+class TestFilteredBlacklist(APITestCase):
+    """Test refreshing and logging out with the blacklist filter."""
+
+    URL = reverse("users:login-refresh")
+
+    def setUp(self) -> None:
+        patcher = patch.object(blacklist_filter, "sync_interval", 60)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = sample_user()
+        self.refresh = RefreshToken.for_user(self.user)
+        blacklist_filter.sync(force=True)
+
+    def test_refresh_rotation(self) -> None:
+        """Test a refresh blacklists the used token in one statement without looking the blacklist up."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(self.URL, {"refresh": str(self.refresh)})
+        self.assertEqual(status.HTTP_200_OK, res.status_code)
+        blacklist_queries = [query for query in queries if "token_blacklist_blacklistedtoken" in query["sql"]]
+        self.assertEqual(1, len(blacklist_queries))
+        self.assertTrue(blacklist_queries[0]["sql"].lstrip().startswith("WITH"))
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=self.refresh["jti"]).exists())
+
+        # Reusing it is rejected, and the new one keeps working
+        res_reuse = self.client.post(self.URL, {"refresh": str(self.refresh)})
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, res_reuse.status_code)
+        res_new = self.client.post(self.URL, {"refresh": res.json()["refresh"]})
+        self.assertEqual(status.HTTP_200_OK, res_new.status_code)
+
+    def test_blacklisted_elsewhere(self) -> None:
+        """Test tokens blacklisted by another process are rejected once the filter is synced."""
+        outstanding = OutstandingToken.objects.get(jti=self.refresh["jti"])
+        BlacklistedToken.objects.create(token=outstanding)
+        blacklist_filter.sync(force=True)
+        res = self.client.post(self.URL, {"refresh": str(self.refresh)})
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, res.status_code)
+
+    def test_logout(self) -> None:
+        """Test logging out blacklists the token."""
+        res = self.client.post(reverse("users:logout"), {"refresh": str(self.refresh)})
+        self.assertEqual(status.HTTP_200_OK, res.status_code)
+        res = self.client.post(self.URL, {"refresh": str(self.refresh)})
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, res.status_code)
+
+
+class TestCompactTokenBlacklist(APITestCase):
+    """Test the compact_token_blacklist command."""
+
+    def test_compaction(self) -> None:
+        """Test only the expired tokens are deleted, along with their blacklist rows, in batches."""
+        now = timezone.now()
+        for i in range(5):
+            expired = OutstandingToken.objects.create(jti=f"expired-{i}", token="", expires_at=now - timedelta(days=1))
+            BlacklistedToken.objects.create(token=expired)
+        valid = OutstandingToken.objects.create(jti="valid", token="", expires_at=now + timedelta(days=1))
+        BlacklistedToken.objects.create(token=valid)
+
+        out = StringIO()
+        call_command("compact_token_blacklist", "--batch-size", "2", stdout=out)
+        self.assertIn("Deleted 5 expired tokens.", out.getvalue())
+        self.assertEqual(["valid"], list(OutstandingToken.objects.values_list("jti", flat=True)))
+        self.assertEqual(1, BlacklistedToken.objects.count())
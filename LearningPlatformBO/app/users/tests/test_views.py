@@ -33,6 +33,17 @@ class TestUserRegisterView(APITestCase):
         self.assertIn(created_user.get_username(), [username, email])
         self.assertTrue(created_user.check_password(password))
 
+    def test_soft_deleted_username_taken(self) -> None:
+        """Test the username of a soft deleted user can't be registered again."""
+        user = sample_user()
+        user.soft_delete()
+        res = self.client.post(
+            self.URL, data={"username": user.username, "email": generate_valid_email(), "password": VALID_PASSWORD}
+        )
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, res.status_code)
+        self.assertFalse(User.objects.filter(username=user.username).exists())
+        self.assertTrue(User.all_objects.filter(username=user.username).exists())
+
     @override_settings(AUTH_USER_REGISTRATION_ENABLED=False)
     def test_registration_disabled_fails(self) -> None:
         """Test creating a user with the registration disabled fails."""
@@ -101,6 +112,29 @@ class TestAuthentication(APITestCase):
         refresh_res = self.client.post(reverse("users:login-refresh"), data={"refresh": login_token_dict["refresh"]})
         self.assertEqual(status.HTTP_401_UNAUTHORIZED, refresh_res.status_code)
 
+    def test_login_identifier_case_insensitive(self) -> None:
+        """Test logging in with the email or the username in any case."""
+        user = sample_user(username="Some.User", email="Some.User@example.com")
+        for identifier in ("some.user", "SOME.USER@EXAMPLE.COM", "Some.User"):
+            res = self.client.post(self.LOGIN_URL, data={"username": identifier, "password": VALID_PASSWORD})
+            self.assertEqual(status.HTTP_200_OK, res.status_code, identifier)
+
+        # Only an exact match can tell case variants apart
+        sample_user(username="some.user")
+        self.assertEqual(user, User.objects.get_by_login("Some.User"))
+        self.assertIsNone(User.objects.get_by_login("SOME.USER"))
+
+    @override_settings(PASSWORD_HASHERS=["users.hashers.PBKDF2PasswordHasher"], AUTH_PASSWORD_ITERATIONS=1000)
+    def test_login_rehashes_password(self) -> None:
+        """Test the password is rehashed on login when the hashing settings changed."""
+        user = sample_user()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+        with override_settings(AUTH_PASSWORD_ITERATIONS=2000):
+            res = self.client.post(self.LOGIN_URL, data={"username": user.username, "password": VALID_PASSWORD})
+        self.assertEqual(status.HTTP_200_OK, res.status_code)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$2000$"))
+
     def test_invalid_token(self) -> None:
         """Test making a request with an invalid token (as opposed to no token at all)."""
         # Make the call
@@ -218,6 +252,15 @@ class TestUserProfileView(APITestCase):
         self.user.refresh_from_db()
         self.assertEqual(value, self.user.get_username())
 
+    def test_update_permissions_version_ignored(self) -> None:
+        """Test that the permissions version, which validates the token claims, can't be set through the profile."""
+        res = self.client.patch(self.URL, data={"permissions_version": self.user.permissions_version + 5})
+        self.assertEqual(status.HTTP_200_OK, res.status_code)
+        self.assertNotIn("permissions_version", res.json())
+        version = self.user.permissions_version
+        self.user.refresh_from_db()
+        self.assertEqual(version, self.user.permissions_version)
+
     def test_update_fails(self) -> None:
         """Test that updating the user's profile with bad data fails."""
         # We only certifications patch because we don't know all the customizations
@@ -0,0 +1,39 @@
+"""Throttles of the authentication endpoints, see `core.throttling` and the `DEFAULT_THROTTLE_RATES` setting."""
+from typing import Optional
+from rest_framework.request import Request
+from rest_framework.views import APIView
+from core.throttling import TokenBucketThrottle
+from users.models import User
+
+
+class LoginThrottle(TokenBucketThrottle):
+    """Throttle login attempts per client IP address."""
+
+    scope = "login"
+
+    def get_identifier(self, request: Request, view: APIView) -> Optional[str]:
+        return self.get_ident(request)
+
+
+class LoginIdentifierThrottle(TokenBucketThrottle):
+    """
+    Throttle login attempts per account, by the submitted username or email (ignoring the case, as logins do), so
+    guessing a password from many addresses is throttled too.
+    """
+
+    scope = "login_identifier"
+
+    def get_identifier(self, request: Request, view: APIView) -> Optional[str]:
+        identifier = request.data.get(User.USERNAME_FIELD) if hasattr(request.data, "get") else None
+        if not isinstance(identifier, str) or not identifier.strip():
+            return None
+        return identifier.strip().lower()
+
+
+class RegistrationThrottle(TokenBucketThrottle):
+    """Throttle registrations per client IP address."""
+
+    scope = "registration"
+
+    def get_identifier(self, request: Request, view: APIView) -> Optional[str]:
+        return self.get_ident(request)
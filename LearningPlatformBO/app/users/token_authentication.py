@@ -0,0 +1,57 @@
+"""
+JWT authentication backed by an in-process cache of users.
+
+DRF imports the authentication classes while the apps are still loading, so this module must not import any model at
+import time: the user model is only resolved per request, through `get_user_model()`.
+"""
+from typing import TYPE_CHECKING, Any, Optional, cast
+from django.conf import settings
+from django.utils.translation import gettext as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from core.utilities.cache import LRUCache
+
+if TYPE_CHECKING:
+    from users.models import User
+
+
+user_cache: LRUCache[tuple[Optional[str], tuple[Any, ...]]] = LRUCache(
+    settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL
+)
+"""Database alias and row values of the recently authenticated users, by the id in their tokens."""
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the token's user from an in-process cache (`user_cache`) instead of querying it
+    on every request. Only active, non-deleted users are cached, for `AUTH_USER_CACHE_TTL` seconds at most.
+
+    Entries are dropped whenever the user is saved (which includes `soft_delete()` and password changes) or deleted,
+    but only in the process that made the change: other workers may keep serving the previous state of the user until
+    their entry expires. Writes made with `QuerySet.update()` don't invalidate it either.
+    """
+
+    def get_user(self, validated_token: Token) -> "User":  # type: ignore # Use our User
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        field_names = [field.attname for field in self.user_model._meta.fields if field.concrete]
+        cached = user_cache.get(str(user_id))
+        if cached is None:
+            # `User.objects` leaves out the soft deleted users
+            user = cast("User", super().get_user(validated_token))
+            user_cache.set(str(user_id), (user._state.db, tuple(getattr(user, name) for name in field_names)))
+            return user
+
+        # Build a fresh instance per request, so changes made to it are never shared with other requests
+        db, values = cached
+        user = self.user_model.from_db(db, field_names, values)
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
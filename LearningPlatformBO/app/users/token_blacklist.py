@@ -0,0 +1,115 @@
+"""
+Refresh token blacklist with an in-process filter in front of the database.
+
+With `ROTATE_REFRESH_TOKENS` and `BLACKLIST_AFTER_ROTATION`, every refresh checks the blacklist and adds the used
+token to it, in a single statement with `FilteredBlacklistRefreshToken`. By default the blacklist is looked up on every
+check. With `AUTH_TOKEN_BLACKLIST_SYNC_INTERVAL`, it's only queried when the process' `blacklist_filter` says the token
+may be in it, which for a valid token is almost never, at the cost of accepting a token rotated by another process
+for up to that long (a replay window). The blacklist tables are kept to the tokens that haven't expired yet by the
+`compact_token_blacklist` command.
+"""
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from core.utilities.bloom import BloomFilter
+
+
+class BlacklistFilter:
+    """
+    Bloom filter of the JTIs of the blacklisted tokens that haven't expired yet, kept in sync with the database.
+
+    It's loaded on first use, then every `sync_interval` seconds it reads the tokens blacklisted since its last sync
+    (with an overlap of `SYNC_OVERLAP`, so rows committed late aren't missed). Tokens blacklisted by this process are
+    added right away, but one blacklisted by another process may be accepted here for up to `sync_interval` seconds.
+    With `0`, the filter isn't used and every token may be blacklisted, to be looked up in the database. When it grows
+    past its capacity, it's rebuilt twice as large.
+    """
+
+    INITIAL_CAPACITY = 100_000
+    ERROR_RATE = 0.01
+    SYNC_OVERLAP = timedelta(minutes=1)
+
+    def __init__(self, sync_interval: float):
+        self.sync_interval = sync_interval
+        self._filter: BloomFilter | None = None
+        self._synced_at = 0.0
+        self._synced_since = timezone.now()
+        self._lock = threading.Lock()
+
+    def might_contain(self, jti: str) -> bool:
+        """Whether the token may be blacklisted. `False` is certain (up to the sync interval), `True` is not."""
+        if self.sync_interval <= 0:
+            return True
+        self.sync()
+        with self._lock:
+            return self._filter is not None and jti in self._filter
+
+    def add(self, jti: str) -> None:
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+
+    def sync(self, force: bool = False) -> None:
+        """Read the newly blacklisted tokens, or load them all if the filter is empty or full."""
+        with self._lock:
+            if not force and self._filter is not None and time.monotonic() - self._synced_at < self.sync_interval:
+                return
+            started_at = timezone.now()
+            rows = BlacklistedToken.objects.filter(token__expires_at__gt=started_at)
+            if self._filter is None or self._filter.is_full:
+                count = rows.count()
+                capacity = self.INITIAL_CAPACITY if self._filter is None else self._filter.capacity
+                while capacity < 2 * count:
+                    capacity *= 2
+                self._filter = BloomFilter(capacity, self.ERROR_RATE)
+            else:
+                rows = rows.filter(blacklisted_at__gte=self._synced_since - self.SYNC_OVERLAP)
+            for jti in rows.values_list("token__jti", flat=True).iterator(chunk_size=10_000):
+                self._filter.add(jti)
+            self._synced_at = time.monotonic()
+            self._synced_since = started_at
+
+
+blacklist_filter = BlacklistFilter(settings.AUTH_TOKEN_BLACKLIST_SYNC_INTERVAL)
+"""The process' filter of blacklisted tokens. See `BlacklistFilter`."""
+
+
+class FilteredBlacklistRefreshToken(RefreshToken):
+    """Refresh token that checks the blacklist through `blacklist_filter`, and is blacklisted in a single statement."""
+
+    def check_blacklist(self) -> None:
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if blacklist_filter.might_contain(jti) and BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self) -> None:  # type: ignore # The row isn't needed: don't load it
+        """Add the token to the outstanding tokens unless already there (rotated ones aren't), and blacklist it."""
+        jti = self.payload[api_settings.JTI_CLAIM]
+        outstanding_table = connection.ops.quote_name(OutstandingToken._meta.db_table)
+        blacklisted_table = connection.ops.quote_name(BlacklistedToken._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH outstanding AS (
+                    INSERT INTO {outstanding_table} (jti, token, created_at, expires_at)
+                    VALUES (%s, %s, %s, %s)
+                    -- A no-op update, so the existing row is returned too
+                    ON CONFLICT (jti) DO UPDATE SET jti = EXCLUDED.jti
+                    RETURNING id
+                )
+                INSERT INTO {blacklisted_table} (token_id, blacklisted_at)
+                SELECT id, %s FROM outstanding
+                ON CONFLICT (token_id) DO NOTHING
+                """,
+                [jti, str(self), self.current_time, datetime_from_epoch(self.payload["exp"]), timezone.now()],
+            )
+        blacklist_filter.add(jti)
@@ -10,6 +10,7 @@ from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema
 from rest_framework_simplejwt import views as jwt_views  # type: ignore # No stubs available
 from users import serializers
+from users.throttling import LoginIdentifierThrottle, LoginThrottle, RegistrationThrottle
 from users.view_mixins import TargetAuthenticatedUserMixin
 from rest_framework.permissions import AllowAny
 
@@ -20,6 +21,7 @@ class UserRegisterView(generics.CreateAPIView):
     """Endpoint to register users."""
 
     serializer_class = serializers.UserRegisterSerializer
+    throttle_classes = [RegistrationThrottle]
 
     def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         """Override the POST method to block registration if disabled."""
@@ -33,14 +35,14 @@ class UserRegisterView(generics.CreateAPIView):
 class UserLoginView(jwt_views.TokenObtainPairView):  # type: ignore # missing stubs
     """Endpoint to login a user and obtain a pair of `(access_token, refresh_token)`."""
     serializer_class = serializers.CustomTokenObtainPairSerializer
-    ...
+    throttle_classes = [LoginThrottle, LoginIdentifierThrottle]
 
 
 @extend_schema(tags=["User Authentication"])
 class UserLoginRefreshView(jwt_views.TokenRefreshView):  # type: ignore # missing stubs
     """Endpoint to refresh the user's `access_token` and `refresh_token`, from a valid `refresh_token`."""
 
-    ...
+    serializer_class = serializers.CustomTokenRefreshSerializer
 
 
 @extend_schema(tags=["User Authentication"])
@@ -50,7 +52,7 @@ class UserLogoutView(jwt_views.TokenBlacklistView):  # type: ignore # missing st
     `refresh_token`.
     """
 
-    ...
+    serializer_class = serializers.CustomTokenBlacklistSerializer
 
 
 @extend_schema(tags=["Users"])
@@ -104,6 +106,7 @@ class PublicUserRegisterView(generics.CreateAPIView):
     serializer_class = serializers.PublicUserRegisterSerializer
     permission_classes = [AllowAny]
     authentication_classes = []
+    throttle_classes = [RegistrationThrottle]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
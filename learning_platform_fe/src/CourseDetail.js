@@ -20,6 +20,8 @@ const CourseDetail = () => {
   const [editForumId, setEditForumId] = useState(null);
   const [activeTab, setActiveTab] = useState('content');
   const [enrollmentRequests, setEnrollmentRequests] = useState([]);
+  const [members, setMembers] = useState([]);
+  const [membersNext, setMembersNext] = useState(null);
 
   useEffect(() => {
     const fetchCourseDetails = async () => {
@@ -187,6 +189,21 @@ const CourseDetail = () => {
     }
   };
 
+  const fetchMembers = async (url = `${process.env.REACT_APP_API_URL}/api/courses/${courseId}/members/`) => {
+    try {
+      const response = await fetch(url, {
+        headers: { Authorization: `Bearer ${localStorage.getItem('jwt')}` }
+      });
+      const data = await response.json();
+      if (response.ok) {
+        setMembers(prev => (url === membersNext ? [...prev, ...data.results] : data.results));
+        setMembersNext(data.next);
+      }
+    } catch (error) {
+      //toast.error(error.message);
+    }
+  };
+
   const updateEnrollmentRequest = async (id, status) => {
     const apiUrl = `${process.env.REACT_APP_API_URL}/api/enrollment-requests/${id}/`;
     try {
@@ -213,6 +230,9 @@ const CourseDetail = () => {
 };
 
   useEffect(() => {
+    if (activeTab === 'members') {
+      fetchMembers();
+    }
     if (activeTab === 'members' && isCourseAdmin) {
       fetchEnrollmentRequests();
     }
@@ -458,15 +478,15 @@ const CourseDetail = () => {
       )}
       {activeTab === 'members' && (
         <div>
-          <h2>Enrolled Users</h2>
-          {course?.enrolled_users && course?.enrolled_users.length > 0 ? (
+          <h2>Enrolled Users ({course?.enrolled_count})</h2>
+          {members.length > 0 ? (
             <ul>
-              {course?.enrolled_users.map((user) => (
+              {members.map((user) => (
                 <li key={user.id}>
-                  {user}
+                  {user.username}
                   {isCourseAdmin && (
                     <button
-                      onClick={() => handleMakeCourseAdmin(user)}
+                      onClick={() => handleMakeCourseAdmin(user.id)}
                       style={styles.button}
                     >
                       Make course admin
@@ -478,6 +498,9 @@ const CourseDetail = () => {
           ) : (
             <p>No users enrolled in this course.</p>
           )}
+          {membersNext && (
+            <button onClick={() => fetchMembers(membersNext)} style={styles.button}>Load more</button>
+          )}
           
           {isCourseAdmin && (
             <>
@@ -60,7 +60,7 @@ const Courses = () => {
       {courses.map(course => (
         <div key={course.id} style={styles.card}>
           <h3>{course.title}</h3>
-          <p>Enrolled Users: {course.enrolled_users.length}</p>
+          <p>Enrolled Users: {course.enrolled_count}</p>
           <button onClick={() => handleEnrollment(course.id)} style={styles.button}>Enter course</button>
         </div>
       ))}
@@ -70,7 +70,7 @@ const CoursesToEnroll = () => {
         {courses.map(course => (
             <div key={course.id} style={styles.card}>
             <h3>{course.id} : {course.title}</h3>
-            <p>Enrolled Users: {course.enrolled_users.length}</p>
+            <p>Enrolled Users: {course.enrolled_count}</p>
             <button onClick={() => handleEnrollment(course.id)} style={styles.button}>Enroll in Course</button>
             </div>
         ))}